@@ -11,13 +11,22 @@ import pandas as pd
 import numpy as np
 import chess
 import chess.pgn
+import chess.svg
 import math
 import tqdm
 import os
 from stockfish import Stockfish
 import io
+from collections import OrderedDict
+from komodo.chessbuddy.config.logging import init_logfire
+from komodo.chessbuddy.config.metrics import metrics
+from komodo.chessbuddy.lib.gemini import GeminiAdviceError, GeminiModelRegistry, generate_content
+from komodo.chessbuddy.lib.movetree import MoveTree
 
 
+# Exports the engine timing histograms (engine.ply.duration, engine.game.duration) to logfire
+init_logfire("chess_analyzer")
+
 GEMINI_API_KEY = "secret"
 
 # Configure Gemini API
@@ -27,6 +36,47 @@ except Exception as e:
     st.error(f"Failed to configure Gemini API: {e}")
 
 STOCKFISH_EXECUTABLE_PATH = "/opt/homebrew/bin/stockfish"
+STOCKFISH_PARAMETERS = {"Contempt": 0, "Threads": 4, "Hash": 256}
+BLUNDER_CP_THRESHOLD = 50
+# In incremental mode, the blunder summary and charts are redrawn after every this many games
+BLUNDER_RENDER_BATCH_GAMES = 10
+# Each analysis memoizes three stages (games, game data, blunder scan); keep the last two analyses
+SESSION_MEMO_MAX_ENTRIES = 6
+
+
+def session_memo(key, compute):
+    """Return the stored result for key, computing it once per browser session.
+
+    Streamlit reruns the whole script on every widget interaction; stages memoized here
+    (game fetch, Stockfish scan) are re-rendered from their stored results instead of
+    being recomputed. A None result is not stored, so failed fetches are retried. Only the
+    SESSION_MEMO_MAX_ENTRIES most recently used results are kept.
+    """
+    memo = st.session_state.setdefault("stage_memo", OrderedDict())
+    if key in memo:
+        memo.move_to_end(key)
+        return memo[key]
+    result = compute()
+    if result is None:
+        return None
+    memo[key] = result
+    while len(memo) > SESSION_MEMO_MAX_ENTRIES:
+        memo.popitem(last=False)
+    return result
+
+
+def get_engine_profile():
+    """Hashable description of the engine settings; cached analysis is keyed on it"""
+    return (STOCKFISH_EXECUTABLE_PATH, tuple(sorted(STOCKFISH_PARAMETERS.items())))
+
+
+def get_stockfish_engine(engine_profile):
+    # One engine process per browser session, instead of a new one on every rerun
+    if st.session_state.get("stockfish_profile") != engine_profile:
+        path, parameters = engine_profile
+        st.session_state.stockfish_engine = Stockfish(path, parameters=dict(parameters))
+        st.session_state.stockfish_profile = engine_profile
+    return st.session_state.stockfish_engine
 
 
 st.markdown("""
@@ -852,52 +902,30 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-_available_model_cache = None
+@st.cache_resource
+def get_gemini_registry():
+    # Cached across Streamlit reruns and sessions, so models are listed once per TTL
+    return GeminiModelRegistry(genai)
+
 
 def get_available_gemini_model():
-    """Get the first available Gemini model by listing available models"""
-    global _available_model_cache
-    
-    # Always check fresh (don't use cache for now)
-    _available_model_cache = None
-    
+    """Get the name of the Gemini model in use (resolved once and cached)"""
+    model_name, _ = get_gemini_registry().get_model()
+    return model_name
+
+
+def generate_gemini_advice(prompt, max_retries=3):
+    """Return advice for prompt, or an error message; successful answers are cached"""
     try:
-        # First, try to list available models
-        for model in genai.list_models():
-            if 'generateContent' in model.supported_generation_methods:
-                model_name = model.name
-                # Extract just the model name (remove 'models/' prefix if present)
-                if '/' in model_name:
-                    model_name = model_name.split('/')[-1]
-                # Skip preview/experimental models that might have issues
-                if 'preview' not in model_name.lower() and 'exp' not in model_name.lower():
-                    _available_model_cache = model_name
-                    return model_name
-    except Exception as e:
-        pass
-    
-    # Fallback: try common stable model names (prioritize gemini-2.5-flash which we know works)
-    model_names = [
-        'gemini-2.5-flash',
-        'gemini-1.5-flash',
-        'gemini-1.5-pro',
-        'gemini-pro',
-        'gemini-1.5-flash-002',
-        'gemini-1.5-pro-002',
-    ]
-    
-    # Try each model to see which one works
-    for model_name in model_names:
-        try:
-            model = genai.GenerativeModel(model_name)
-            # Quick test
-            test_response = model.generate_content("test")
-            _available_model_cache = model_name
-            return model_name
-        except:
-            continue
-    
-    return None
+        return _generate_gemini_advice_cached(prompt, max_retries)
+    except GeminiAdviceError as e:
+        return str(e)
+
+
+@st.cache_data(show_spinner=False, ttl=24 * 3600)
+def _generate_gemini_advice_cached(prompt, max_retries=3):
+    # Failures are raised rather than returned, so st.cache_data never stores them
+    return generate_content(get_gemini_registry(), prompt, max_retries)
 
 
 def generate_gemini_advice_blunders(forkCount, hangingCount, otherCount, pinCount):
@@ -910,53 +938,7 @@ def generate_gemini_advice_blunders(forkCount, hangingCount, otherCount, pinCoun
 
     Provide actionable advice focusing on common patterns for these types of blunders. Be concise and encouraging.
     """
-    
-    model_name = get_available_gemini_model()
-    if not model_name:
-        return "GEMINI ERROR: No available models found. Please check your API key permissions."
-    
-    # Try with retry logic for quota errors
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            model = genai.GenerativeModel(model_name)
-            response = model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            error_str = str(e)
-            
-            # Check if it's a quota error
-            if "429" in error_str or "quota" in error_str.lower() or "rate" in error_str.lower():
-                if attempt < max_retries - 1:
-                    # Extract retry delay if available
-                    import re
-                    delay_match = re.search(r'retry.*?(\d+)', error_str, re.IGNORECASE)
-                    delay = int(delay_match.group(1)) if delay_match else (attempt + 1) * 5
-                    time.sleep(min(delay, 30))  # Cap at 30 seconds
-                    continue
-                else:
-                    return f"GEMINI QUOTA ERROR: You've exceeded your free tier quota. Please wait a few minutes or upgrade your API plan. Error: {error_str[:200]}"
-            
-            # Try a different model if available
-            if attempt < max_retries - 1:
-                try:
-                    # Try to get a different model
-                    all_models = []
-                    for m in genai.list_models():
-                        if 'generateContent' in m.supported_generation_methods:
-                            model_n = m.name.split('/')[-1] if '/' in m.name else m.name
-                            if model_n != model_name:
-                                all_models.append(model_n)
-                    
-                    if all_models:
-                        model_name = all_models[0]
-                        continue
-                except:
-                    pass
-            
-            return f"GEMINI ERROR: Failed with model {model_name}: {error_str[:200]}"
-    
-    return f"GEMINI ERROR: Failed after {max_retries} attempts with model {model_name}"
+    return generate_gemini_advice(prompt)
 
 
 def get_cp_value(evaluation):
@@ -1013,300 +995,395 @@ def classify_blunder(blunder_row, stockfish_engine):
     return blunder_type
 
 
-def analyze_blunders(games_data, username, stockfish_engine):
-    st.markdown(f"<h2>Blunder Analysis</h2>", unsafe_allow_html=True)
-    st.markdown(f'<p style="color: rgba(255, 255, 255, 0.5); margin-bottom: 3rem; font-size: 1.1rem; font-weight: 300;">Analyzing games for <span style="color: rgba(255, 255, 255, 0.8);">{username}</span></p>', unsafe_allow_html=True)
-    
-    blunders_found = []
-    BLUNDER_CP_THRESHOLD = 50
-    
-    progress_container = st.container()
-    with progress_container:
-        my_bar = st.progress(0, text="Analyzing game moves for blunders...")
+engine_ply_duration = metrics.histogram("engine.ply.duration", "Stockfish evaluation time per ply")
+engine_game_duration = metrics.histogram("engine.game.duration", "Stockfish blunder scan time per game")
 
-    for game_idx, game_info in enumerate(games_data):
-        board = chess.Board()
-        stockfish_engine.set_fen_position(board.fen())
-        prev_cp_value = get_cp_value(stockfish_engine.get_evaluation())
-        for move_num, move_uci in enumerate(game_info['Moves_UCI'], 1):
-            try:
-                move = chess.Move.from_uci(move_uci)
-                player_to_move = "White" if board.turn == chess.WHITE else "Black"
-                fen_before_move = board.fen()
-                if move in board.legal_moves:
-                    board.push(move)
-                    fen_after_move = board.fen()
-                    stockfish_engine.set_fen_position(fen_after_move)
-                    current_cp_value = get_cp_value(stockfish_engine.get_evaluation())
-                    cp_change = prev_cp_value - current_cp_value
-                    is_blunder, centipawn_loss = False, 0
-                    if player_to_move == "White":
-                        if cp_change > BLUNDER_CP_THRESHOLD:
-                            is_blunder, centipawn_loss = True, cp_change
-                    else:
-                        if cp_change < -BLUNDER_CP_THRESHOLD:
-                            is_blunder, centipawn_loss = True, abs(cp_change)
-                    if is_blunder:
-                        blunders_found.append({
-                            'Game_Index': game_idx, 'Event': game_info['Event'], 'Site': game_info['Site'],
-                            'Date': game_info['Date'], 'White': game_info['White'], 'Black': game_info['Black'],
-                            'Result': game_info['Result'], 'Move_Number': move_num,
-                            'Player_Who_Blundered': player_to_move, 'Move_UCI': move_uci,
-                            'FEN_Before_Blunder': fen_before_move, 'FEN_After_Blunder': fen_after_move,
-                            'Eval_Before_Blunder_CP': prev_cp_value, 'Eval_After_Blunder_CP': current_cp_value,
-                            'Centipawn_Loss': centipawn_loss
-                        })
-                    prev_cp_value = current_cp_value
+
+def evaluate_position(stockfish_engine, fen):
+    """Centipawn evaluation of a position, timed into engine.ply.duration"""
+    started = time.perf_counter()
+    stockfish_engine.set_fen_position(fen)
+    cp_value = get_cp_value(stockfish_engine.get_evaluation())
+    engine_ply_duration.record(time.perf_counter() - started)
+    return cp_value
+
+
+def render_engine_timings():
+    """Sidebar panel with the Stockfish timings recorded in this process"""
+    rows = []
+    for histogram in (engine_ply_duration, engine_game_duration):
+        count = sum(series["count"] for series in histogram.series().values())
+        total = sum(series["sum"] for series in histogram.series().values())
+        if count:
+            rows.append({"Metric": histogram.description, "Count": count,
+                         "Total (s)": round(total, 2), "Mean (ms)": round(1000 * total / count, 1)})
+    with st.sidebar.expander("Engine timings"):
+        if rows:
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        else:
+            st.caption("No positions evaluated yet.")
+
+
+def scan_game_blunders(game_idx, game_info, username, stockfish_engine):
+    """Evaluate one game's moves with Stockfish and return the user's classified blunders in it"""
+    blunders_found = []
+    board = chess.Board()
+    prev_cp_value = evaluate_position(stockfish_engine, board.fen())
+    for move_num, move_uci in enumerate(game_info['Moves_UCI'], 1):
+        try:
+            move = chess.Move.from_uci(move_uci)
+            player_to_move = "White" if board.turn == chess.WHITE else "Black"
+            fen_before_move = board.fen()
+            if move in board.legal_moves:
+                board.push(move)
+                fen_after_move = board.fen()
+                current_cp_value = evaluate_position(stockfish_engine, fen_after_move)
+                cp_change = prev_cp_value - current_cp_value
+                is_blunder, centipawn_loss = False, 0
+                if player_to_move == "White":
+                    if cp_change > BLUNDER_CP_THRESHOLD:
+                        is_blunder, centipawn_loss = True, cp_change
                 else:
-                    break
-            except (ValueError, Exception):
+                    if cp_change < -BLUNDER_CP_THRESHOLD:
+                        is_blunder, centipawn_loss = True, abs(cp_change)
+                if is_blunder:
+                    blunders_found.append({
+                        'Game_Index': game_idx, 'Event': game_info['Event'], 'Site': game_info['Site'],
+                        'Date': game_info['Date'], 'White': game_info['White'], 'Black': game_info['Black'],
+                        'Result': game_info['Result'], 'Move_Number': move_num,
+                        'Player_Who_Blundered': player_to_move, 'Move_UCI': move_uci,
+                        'FEN_Before_Blunder': fen_before_move, 'FEN_After_Blunder': fen_after_move,
+                        'Eval_Before_Blunder_CP': prev_cp_value, 'Eval_After_Blunder_CP': current_cp_value,
+                        'Centipawn_Loss': centipawn_loss
+                    })
+                prev_cp_value = current_cp_value
+            else:
                 break
-        my_bar.progress((game_idx + 1) / len(games_data), text=f"Analyzing game {game_idx + 1}/{len(games_data)}")
+        except (ValueError, Exception):
+            break
 
-    my_bar.empty()
-    st.markdown('<div class="success-box"><p style="margin: 0; color: rgba(255, 255, 255, 0.8); font-weight: 400;">Analysis complete</p></div>', unsafe_allow_html=True)
-    
     blunders_df = pd.DataFrame(blunders_found)
-    if not blunders_df.empty:
-        st.markdown('<p style="color: rgba(255, 255, 255, 0.5); margin: 2rem 0 1rem 0; font-weight: 300;">Classifying blunder types...</p>', unsafe_allow_html=True)
-        blunders_df['Blunder_Type'] = blunders_df.apply(lambda row: classify_blunder(row, stockfish_engine), axis=1)
-        blunders_df['Move_Number_Display'] = np.ceil(blunders_df['Move_Number'] / 2).astype(int)
-        user_blunders_df = blunders_df[
-            ((blunders_df['White'].str.lower() == username) & (blunders_df['Player_Who_Blundered'] == 'White')) | (
-                        (blunders_df['Black'].str.lower() == username) & (
-                            blunders_df['Player_Who_Blundered'] == 'Black'))]
-    else:
-        user_blunders_df = pd.DataFrame()
-
-    if not user_blunders_df.empty:
-        st.markdown("<h3>Game-by-Game Blunder Details</h3>", unsafe_allow_html=True)
-        st.markdown('<p style="color: rgba(255, 255, 255, 0.4); font-size: 0.9rem; margin-bottom: 2rem; font-weight: 300;">Games where blunders were found</p>', unsafe_allow_html=True)
-        unique_game_indices = user_blunders_df['Game_Index'].unique()
-        games_data_map = {game['game_index']: game for game in games_data}
-        for game_idx in unique_game_indices:
-            game_info = games_data_map.get(game_idx)
-            if not game_info: continue
-            game_blunders = user_blunders_df[user_blunders_df['Game_Index'] == game_idx].copy()
-            game_board = chess.Board()
-            for move_uci in game_info['Moves_UCI']:
-                try:
-                    move = chess.Move.from_uci(move_uci)
-                    if move in game_board.legal_moves:
-                        game_board.push(move)
-                    else:
-                        break
-                except ValueError:
-                    break
-            board_svg = chess.svg.board(board=game_board, size=300)
-            with st.expander(
-                    f"Game {game_idx + 1}: {game_info['White']} vs. {game_info['Black']} — {game_info['Result']}"):
-                game_url = game_info['Site']
-                if game_url and "chess.com" in game_url:
-                    st.markdown(f'<a href="{game_url}" style="color: rgba(255, 255, 255, 0.7); text-decoration: none; font-weight: 400;">View Game on Chess.com →</a>', unsafe_allow_html=True)
-                col_board, col_details = st.columns([0.4, 0.6])
-                with col_board:
-                    st.markdown(board_svg, unsafe_allow_html=True)
-                with col_details:
-                    st.markdown(f"**Event:** {game_info['Event']}")
-                    st.markdown(f"**White:** {game_info['White']} | **Black:** {game_info['Black']}")
-                    st.markdown(f"**Result:** {game_info['Result']}")
-                    st.markdown(f"**Total Moves:** {len(game_info['Moves_UCI'])}")
-                st.markdown("---")
-                st.markdown(f"**Blunders by {username} in this game:**")
-                display_df = game_blunders[['Move_Number_Display', 'Move_UCI', 'Centipawn_Loss', 'Blunder_Type']].copy()
-                display_df.rename(
-                    columns={'Move_Number_Display': 'Move Number', 'Move_UCI': 'Move', 'Centipawn_Loss': 'CP Loss',
-                             'Blunder_Type': 'Type'}, inplace=True)
-                st.dataframe(display_df.style.set_properties(**{'font-size': '12px'}), hide_index=True)
-    else:
-        st.markdown(f'<div class="info-box"><p style="margin: 0; color: rgba(255, 255, 255, 0.6); font-weight: 300;">No blunders specifically attributed to "{username}" found in these games.</p></div>', unsafe_allow_html=True)
+    if blunders_df.empty:
+        return pd.DataFrame()
+    # Only the user's blunders are shown, so only those are classified
+    user_blunders_df = blunders_df[
+        ((blunders_df['White'].str.lower() == username) & (blunders_df['Player_Who_Blundered'] == 'White')) | (
+                    (blunders_df['Black'].str.lower() == username) & (
+                        blunders_df['Player_Who_Blundered'] == 'Black'))].copy()
+    if user_blunders_df.empty:
+        return pd.DataFrame()
+    user_blunders_df['Blunder_Type'] = user_blunders_df.apply(lambda row: classify_blunder(row, stockfish_engine), axis=1)
+    user_blunders_df['Move_Number_Display'] = np.ceil(user_blunders_df['Move_Number'] / 2).astype(int)
+    # The scan already replayed the game, so keep its final position for the detail view
+    user_blunders_df['Final_FEN'] = board.fen()
+    return user_blunders_df
+
+
+def scan_blunders(games_data, username, stockfish_engine, on_game=None):
+    """Scan every game and return the user's classified blunders as one DataFrame.
+
+    on_game(done, total, game_info, game_blunders) is called as each game finishes, so
+    callers can show results while the scan is still running.
+    """
+    per_game = []
+    for game_idx, game_info in enumerate(games_data):
+        with engine_game_duration.time():
+            game_blunders = scan_game_blunders(game_idx, game_info, username, stockfish_engine)
+        if not game_blunders.empty:
+            per_game.append(game_blunders)
+        if on_game:
+            on_game(game_idx + 1, len(games_data), game_info, game_blunders)
+    return pd.concat(per_game, ignore_index=True) if per_game else pd.DataFrame()
+
+
+@st.cache_data(show_spinner=False, max_entries=1000)
+def render_board_svg(fen, orientation, size=300):
+    """SVG of a position, cached by FEN and orientation ("white" or "black")"""
+    return chess.svg.board(board=chess.Board(fen), orientation=orientation == "white", size=size)
+
+
+def render_blunder_game(game_info, game_blunders, username):
+    orientation = "black" if game_info['Black'].lower() == username else "white"
+    with st.expander(
+            f"Game {game_info['game_index'] + 1}: {game_info['White']} vs. {game_info['Black']} — {game_info['Result']}"):
+        game_url = game_info['Site']
+        if game_url and "chess.com" in game_url:
+            st.markdown(f'<a href="{game_url}" style="color: rgba(255, 255, 255, 0.7); text-decoration: none; font-weight: 400;">View Game on Chess.com →</a>', unsafe_allow_html=True)
+        col_board, col_details = st.columns([0.4, 0.6])
+        with col_board:
+            # Streamlit has no expander-open event, so the board is drawn only on request
+            if st.toggle("Show final position", key=f"final_board_{game_info['game_index']}_{game_info['Site']}"):
+                st.markdown(render_board_svg(game_blunders['Final_FEN'].iloc[0], orientation), unsafe_allow_html=True)
+        with col_details:
+            st.markdown(f"**Event:** {game_info['Event']}")
+            st.markdown(f"**White:** {game_info['White']} | **Black:** {game_info['Black']}")
+            st.markdown(f"**Result:** {game_info['Result']}")
+            st.markdown(f"**Total Moves:** {len(game_info['Moves_UCI'])}")
+        st.markdown("---")
+        st.markdown(f"**Blunders by {username} in this game:**")
+        display_df = game_blunders[['Move_Number_Display', 'Move_UCI', 'Centipawn_Loss', 'Blunder_Type']].copy()
+        display_df.rename(
+            columns={'Move_Number_Display': 'Move Number', 'Move_UCI': 'Move', 'Centipawn_Loss': 'CP Loss',
+                     'Blunder_Type': 'Type'}, inplace=True)
+        st.dataframe(display_df.style.set_properties(**{'font-size': '12px'}), hide_index=True)
+
+
+def render_blunder_summary(user_blunders_df, render_key="final"):
+    """Blunder counts and charts; render_key keeps chart ids unique when redrawn mid-scan"""
+    fork_count = (user_blunders_df['Blunder_Type'] == "Fork Blunder").sum()
+    hanging_count = (user_blunders_df['Blunder_Type'] == "Hanging Piece").sum()
+    other_count = (user_blunders_df['Blunder_Type'] == "Positional/Other Blunder").sum()
+    pin_count = (user_blunders_df['Blunder_Type'] == "Pin/Skewer Blunder").sum()
+    checkmate_blunder_count = (user_blunders_df['Blunder_Type'] == "Checkmate Blunder").sum()
+
+    st.markdown("<h3>Blunder Summary</h3>", unsafe_allow_html=True)
+    col1, col2, col3, col4, col5 = st.columns(5)
+
+    with col1:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.metric(label="Forks", value=fork_count)
+        st.markdown('</div>', unsafe_allow_html=True)
+    with col2:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.metric(label="Hanging Pieces", value=hanging_count)
+        st.markdown('</div>', unsafe_allow_html=True)
+    with col3:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.metric(label="Pins/Skewers", value=pin_count)
+        st.markdown('</div>', unsafe_allow_html=True)
+    with col4:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.metric(label="Positional/Other", value=other_count)
+        st.markdown('</div>', unsafe_allow_html=True)
+    with col5:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.metric(label="Checkmate Blunders", value=checkmate_blunder_count)
+        st.markdown('</div>', unsafe_allow_html=True)
 
-    if not user_blunders_df.empty:
-        fork_count = (user_blunders_df['Blunder_Type'] == "Fork Blunder").sum()
-        hanging_count = (user_blunders_df['Blunder_Type'] == "Hanging Piece").sum()
-        other_count = (user_blunders_df['Blunder_Type'] == "Positional/Other Blunder").sum()
-        pin_count = (user_blunders_df['Blunder_Type'] == "Pin/Skewer Blunder").sum()
-        checkmate_blunder_count = (user_blunders_df['Blunder_Type'] == "Checkmate Blunder").sum()
-        
-        st.markdown("<h3>Blunder Summary</h3>", unsafe_allow_html=True)
-        col1, col2, col3, col4, col5 = st.columns(5)
-        
-        with col1:
-            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric(label="Forks", value=fork_count)
-            st.markdown('</div>', unsafe_allow_html=True)
-        with col2:
-            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric(label="Hanging Pieces", value=hanging_count)
-            st.markdown('</div>', unsafe_allow_html=True)
-        with col3:
-            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric(label="Pins/Skewers", value=pin_count)
-            st.markdown('</div>', unsafe_allow_html=True)
-        with col4:
-            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric(label="Positional/Other", value=other_count)
-            st.markdown('</div>', unsafe_allow_html=True)
-        with col5:
-            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric(label="Checkmate Blunders", value=checkmate_blunder_count)
-            st.markdown('</div>', unsafe_allow_html=True)
-        
-        # NEW FEATURE: Blunder Heatmap by Move Number
-        st.markdown("<br>", unsafe_allow_html=True)
-        st.markdown("<h3>Blunder Heatmap by Move Number</h3>", unsafe_allow_html=True)
-        st.markdown('<p style="color: rgba(255, 255, 255, 0.5); margin-bottom: 1rem; font-weight: 300;">When do you blunder most often?</p>', unsafe_allow_html=True)
-        
-        move_heatmap = user_blunders_df.groupby('Move_Number_Display').size().reset_index(name='Blunder_Count')
-        move_heatmap = move_heatmap.sort_values('Move_Number_Display')
-        
-        colors_heatmap = ['#90AFC5', '#336B87', '#763626', '#90AFC5', '#336B87']
-        fig_heatmap = go.Figure()
-        fig_heatmap.add_trace(go.Bar(
-            x=move_heatmap['Move_Number_Display'],
-            y=move_heatmap['Blunder_Count'],
+    # NEW FEATURE: Blunder Heatmap by Move Number
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown("<h3>Blunder Heatmap by Move Number</h3>", unsafe_allow_html=True)
+    st.markdown('<p style="color: rgba(255, 255, 255, 0.5); margin-bottom: 1rem; font-weight: 300;">When do you blunder most often?</p>', unsafe_allow_html=True)
+
+    move_heatmap = user_blunders_df.groupby('Move_Number_Display').size().reset_index(name='Blunder_Count')
+    move_heatmap = move_heatmap.sort_values('Move_Number_Display')
+
+    colors_heatmap = ['#90AFC5', '#336B87', '#763626', '#90AFC5', '#336B87']
+    fig_heatmap = go.Figure()
+    fig_heatmap.add_trace(go.Bar(
+        x=move_heatmap['Move_Number_Display'],
+        y=move_heatmap['Blunder_Count'],
+        marker=dict(
+            color=[colors_heatmap[i % len(colors_heatmap)] for i in range(len(move_heatmap))],
+            line=dict(width=0),
+            opacity=0.85,
+            pattern=dict(shape="", fillmode="overlay")
+        ),
+        text=move_heatmap['Blunder_Count'],
+        textposition='outside',
+        textfont=dict(color='#90AFC5', size=12),
+        hovertemplate='<b>Move %{x}</b><br>Blunders: %{y}<br><extra></extra>',
+        name='Blunders',
+        showlegend=False
+    ))
+    fig_heatmap.update_layout(
+        title=dict(text='Blunders by Move Number', font=dict(size=20, color='#90AFC5', family='Inter')),
+        xaxis=dict(
+            title=dict(text='Move Number', font=dict(color='#90AFC5', size=14)),
+            tickfont=dict(color='#90AFC5', size=12),
+            gridcolor='rgba(144, 175, 197, 0.08)',
+            showgrid=True,
+            showline=False,
+            zeroline=False
+        ),
+        yaxis=dict(
+            title=dict(text='Number of Blunders', font=dict(color='#90AFC5', size=14)),
+            tickfont=dict(color='#90AFC5', size=12),
+            gridcolor='rgba(144, 175, 197, 0.08)',
+            showgrid=True,
+            showline=False,
+            zeroline=False
+        ),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='Inter'),
+        height=500,
+        hovermode='x unified',
+        hoverlabel=dict(bgcolor='rgba(42, 49, 50, 0.95)', font_size=12, font_family='Inter', bordercolor='rgba(144, 175, 197, 0.3)'),
+        transition=dict(duration=800, easing='cubic-in-out')
+    )
+    st.plotly_chart(fig_heatmap, use_container_width=True, key=f"blunder_heatmap_{render_key}")
+
+    # NEW FEATURE: Blunder Type Distribution Pie Chart
+    st.markdown("<h3>Blunder Type Distribution</h3>", unsafe_allow_html=True)
+    col_chart1, col_chart2 = st.columns(2)
+
+    with col_chart1:
+        blunder_types = ['Forks', 'Hanging Pieces', 'Pins/Skewers', 'Positional/Other', 'Checkmate']
+        blunder_counts = [fork_count, hanging_count, pin_count, other_count, checkmate_blunder_count]
+        colors_pie = ['#90AFC5', '#336B87', '#763626', '#90AFC5', '#2A3132']
+
+        fig_pie = go.Figure(data=[go.Pie(
+            labels=blunder_types,
+            values=blunder_counts,
+            hole=0.5,
+            marker=dict(
+                colors=colors_pie,
+                line=dict(width=0),
+                pattern=dict(shape="", fillmode="overlay")
+            ),
+            textinfo='label+percent',
+            textfont=dict(size=12, color='#90AFC5', family='Inter'),
+            hovertemplate='<b>%{label}</b><br>Count: %{value}<br>Percentage: %{percent}<extra></extra>',
+            pull=[0.1] * len(blunder_types),
+            rotation=90
+        )])
+        fig_pie.update_layout(
+            title=dict(text='Blunder Distribution', font=dict(size=18, color='#90AFC5', family='Inter')),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(family='Inter'),
+            height=450,
+            showlegend=True,
+            legend=dict(font=dict(color='#90AFC5', size=11), bgcolor='rgba(0,0,0,0)', bordercolor='rgba(144, 175, 197, 0.2)'),
+            hoverlabel=dict(bgcolor='rgba(42, 49, 50, 0.95)', font_size=12, font_family='Inter', font_color='#90AFC5', bordercolor='rgba(144, 175, 197, 0.3)'),
+            transition=dict(duration=1000, easing='elastic-in-out')
+        )
+        st.plotly_chart(fig_pie, use_container_width=True, key=f"blunder_pie_{render_key}")
+
+    with col_chart2:
+        # Average Centipawn Loss by Blunder Type
+        avg_cp_loss = user_blunders_df.groupby('Blunder_Type')['Centipawn_Loss'].mean().reset_index()
+        avg_cp_loss = avg_cp_loss.sort_values('Centipawn_Loss', ascending=False)
+
+        colors_bar = ['#90AFC5', '#336B87', '#763626', '#90AFC5', '#2A3132']
+        fig_bar = go.Figure()
+        fig_bar.add_trace(go.Bar(
+            y=avg_cp_loss['Blunder_Type'],
+            x=avg_cp_loss['Centipawn_Loss'],
+            orientation='h',
             marker=dict(
-                color=[colors_heatmap[i % len(colors_heatmap)] for i in range(len(move_heatmap))],
+                color=[colors_bar[i % len(colors_bar)] for i in range(len(avg_cp_loss))],
                 line=dict(width=0),
                 opacity=0.85,
                 pattern=dict(shape="", fillmode="overlay")
             ),
-            text=move_heatmap['Blunder_Count'],
+            text=[f'{val:.0f}' for val in avg_cp_loss['Centipawn_Loss']],
             textposition='outside',
-            textfont=dict(color='#90AFC5', size=12),
-            hovertemplate='<b>Move %{x}</b><br>Blunders: %{y}<br><extra></extra>',
-            name='Blunders',
+            textfont=dict(color='#90AFC5', size=11),
+            hovertemplate='<b>%{y}</b><br>Average CP Loss: %{x:.0f}<extra></extra>',
+            name='CP Loss',
             showlegend=False
         ))
-        fig_heatmap.update_layout(
-            title=dict(text='Blunders by Move Number', font=dict(size=20, color='#90AFC5', family='Inter')),
+        fig_bar.update_layout(
+            title=dict(text='Average CP Loss by Blunder Type', font=dict(size=18, color='#90AFC5', family='Inter')),
             xaxis=dict(
-                title=dict(text='Move Number', font=dict(color='#90AFC5', size=14)),
-                tickfont=dict(color='#90AFC5', size=12),
-                gridcolor='rgba(144, 175, 197, 0.08)',
-                showgrid=True,
-                showline=False,
-                zeroline=False
-            ),
-            yaxis=dict(
-                title=dict(text='Number of Blunders', font=dict(color='#90AFC5', size=14)),
+                title=dict(text='Average Centipawn Loss', font=dict(color='#90AFC5', size=14)),
                 tickfont=dict(color='#90AFC5', size=12),
                 gridcolor='rgba(144, 175, 197, 0.08)',
                 showgrid=True,
                 showline=False,
                 zeroline=False
             ),
+            yaxis=dict(title='', tickfont=dict(color='#90AFC5', size=12), showline=False),
             plot_bgcolor='rgba(0,0,0,0)',
             paper_bgcolor='rgba(0,0,0,0)',
             font=dict(family='Inter'),
-            height=500,
-            hovermode='x unified',
-            hoverlabel=dict(bgcolor='rgba(42, 49, 50, 0.95)', font_size=12, font_family='Inter', bordercolor='rgba(144, 175, 197, 0.3)'),
+            height=450,
+            hovermode='y unified',
+            hoverlabel=dict(bgcolor='rgba(42, 49, 50, 0.95)', font_size=12, font_family='Inter', font_color='#90AFC5', bordercolor='rgba(144, 175, 197, 0.3)'),
             transition=dict(duration=800, easing='cubic-in-out')
         )
-        st.plotly_chart(fig_heatmap, use_container_width=True)
-        
-        # NEW FEATURE: Blunder Type Distribution Pie Chart
-        st.markdown("<h3>Blunder Type Distribution</h3>", unsafe_allow_html=True)
-        col_chart1, col_chart2 = st.columns(2)
-        
-        with col_chart1:
-            blunder_types = ['Forks', 'Hanging Pieces', 'Pins/Skewers', 'Positional/Other', 'Checkmate']
-            blunder_counts = [fork_count, hanging_count, pin_count, other_count, checkmate_blunder_count]
-            colors_pie = ['#90AFC5', '#336B87', '#763626', '#90AFC5', '#2A3132']
-            
-            fig_pie = go.Figure(data=[go.Pie(
-                labels=blunder_types,
-                values=blunder_counts,
-                hole=0.5,
-                marker=dict(
-                    colors=colors_pie,
-                    line=dict(width=0),
-                    pattern=dict(shape="", fillmode="overlay")
-                ),
-                textinfo='label+percent',
-                textfont=dict(size=12, color='#90AFC5', family='Inter'),
-                hovertemplate='<b>%{label}</b><br>Count: %{value}<br>Percentage: %{percent}<extra></extra>',
-                pull=[0.1] * len(blunder_types),
-                rotation=90
-            )])
-            fig_pie.update_layout(
-                title=dict(text='Blunder Distribution', font=dict(size=18, color='#90AFC5', family='Inter')),
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(family='Inter'),
-                height=450,
-                showlegend=True,
-                legend=dict(font=dict(color='#90AFC5', size=11), bgcolor='rgba(0,0,0,0)', bordercolor='rgba(144, 175, 197, 0.2)'),
-                hoverlabel=dict(bgcolor='rgba(42, 49, 50, 0.95)', font_size=12, font_family='Inter', font_color='#90AFC5', bordercolor='rgba(144, 175, 197, 0.3)'),
-                transition=dict(duration=1000, easing='elastic-in-out')
-            )
-            st.plotly_chart(fig_pie, use_container_width=True)
-        
-        with col_chart2:
-            # Average Centipawn Loss by Blunder Type
-            avg_cp_loss = user_blunders_df.groupby('Blunder_Type')['Centipawn_Loss'].mean().reset_index()
-            avg_cp_loss = avg_cp_loss.sort_values('Centipawn_Loss', ascending=False)
-            
-            colors_bar = ['#90AFC5', '#336B87', '#763626', '#90AFC5', '#2A3132']
-            fig_bar = go.Figure()
-            fig_bar.add_trace(go.Bar(
-                y=avg_cp_loss['Blunder_Type'],
-                x=avg_cp_loss['Centipawn_Loss'],
-                orientation='h',
-                marker=dict(
-                    color=[colors_bar[i % len(colors_bar)] for i in range(len(avg_cp_loss))],
-                    line=dict(width=0),
-                    opacity=0.85,
-                    pattern=dict(shape="", fillmode="overlay")
-                ),
-                text=[f'{val:.0f}' for val in avg_cp_loss['Centipawn_Loss']],
-                textposition='outside',
-                textfont=dict(color='#90AFC5', size=11),
-                hovertemplate='<b>%{y}</b><br>Average CP Loss: %{x:.0f}<extra></extra>',
-                name='CP Loss',
-                showlegend=False
-            ))
-            fig_bar.update_layout(
-                title=dict(text='Average CP Loss by Blunder Type', font=dict(size=18, color='#90AFC5', family='Inter')),
-                xaxis=dict(
-                    title=dict(text='Average Centipawn Loss', font=dict(color='#90AFC5', size=14)),
-                    tickfont=dict(color='#90AFC5', size=12),
-                    gridcolor='rgba(144, 175, 197, 0.08)',
-                    showgrid=True,
-                    showline=False,
-                    zeroline=False
-                ),
-                yaxis=dict(title='', tickfont=dict(color='#90AFC5', size=12), showline=False),
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(family='Inter'),
-                height=450,
-                hovermode='y unified',
-                hoverlabel=dict(bgcolor='rgba(42, 49, 50, 0.95)', font_size=12, font_family='Inter', font_color='#90AFC5', bordercolor='rgba(144, 175, 197, 0.3)'),
-                transition=dict(duration=800, easing='cubic-in-out')
-            )
-            st.plotly_chart(fig_bar, use_container_width=True)
-        
-        st.markdown("<br>", unsafe_allow_html=True)
-        st.markdown("<h3>Chess Coach Advice</h3>", unsafe_allow_html=True)
-        with st.container():
-            st.markdown('<div class="stContainer">', unsafe_allow_html=True)
-            advice = generate_gemini_advice_blunders(fork_count, hanging_count, other_count, pin_count)
-            st.markdown(advice)
-            st.markdown('</div>', unsafe_allow_html=True)
-        
-        # NEW FEATURE: Export Blunder Data
-        st.markdown("<br>", unsafe_allow_html=True)
-        st.markdown("<h3>Export Data</h3>", unsafe_allow_html=True)
-        csv = user_blunders_df.to_csv(index=False)
-        st.download_button(
-            label="Download Blunder Analysis CSV",
-            data=csv,
-            file_name=f"chess_blunders_{username}_{time.strftime('%Y%m%d')}.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
+        st.plotly_chart(fig_bar, use_container_width=True, key=f"blunder_cp_loss_{render_key}")
+
+
+def render_blunder_advice_and_export(user_blunders_df, username):
+    fork_count = (user_blunders_df['Blunder_Type'] == "Fork Blunder").sum()
+    hanging_count = (user_blunders_df['Blunder_Type'] == "Hanging Piece").sum()
+    other_count = (user_blunders_df['Blunder_Type'] == "Positional/Other Blunder").sum()
+    pin_count = (user_blunders_df['Blunder_Type'] == "Pin/Skewer Blunder").sum()
+
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown("<h3>Chess Coach Advice</h3>", unsafe_allow_html=True)
+    with st.container():
+        st.markdown('<div class="stContainer">', unsafe_allow_html=True)
+        advice = generate_gemini_advice_blunders(fork_count, hanging_count, other_count, pin_count)
+        st.markdown(advice)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    # NEW FEATURE: Export Blunder Data
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown("<h3>Export Data</h3>", unsafe_allow_html=True)
+    csv = user_blunders_df.to_csv(index=False)
+    st.download_button(
+        label="Download Blunder Analysis CSV",
+        data=csv,
+        file_name=f"chess_blunders_{username}_{time.strftime('%Y%m%d')}.csv",
+        mime="text/csv",
+        use_container_width=True
+    )
+
+
+def analyze_blunders(games_data, username, stockfish_engine, engine_profile, incremental=True):
+    st.markdown(f"<h2>Blunder Analysis</h2>", unsafe_allow_html=True)
+    st.markdown(f'<p style="color: rgba(255, 255, 255, 0.5); margin-bottom: 3rem; font-size: 1.1rem; font-weight: 300;">Analyzing games for <span style="color: rgba(255, 255, 255, 0.8);">{username}</span></p>', unsafe_allow_html=True)
+
+    progress_container = st.container()
+    details_container = st.container()
+    summary_placeholder = st.empty()
+    games_data_map = {game['game_index']: game for game in games_data}
+    details_header_shown = []
+
+    def show_game(game_info, game_blunders):
+        with details_container:
+            if not details_header_shown:
+                st.markdown("<h3>Game-by-Game Blunder Details</h3>", unsafe_allow_html=True)
+                st.markdown('<p style="color: rgba(255, 255, 255, 0.4); font-size: 0.9rem; margin-bottom: 2rem; font-weight: 300;">Games where blunders were found</p>', unsafe_allow_html=True)
+                details_header_shown.append(True)
+            render_blunder_game(game_info, game_blunders, username)
+
+    def run_scan():
+        with progress_container:
+            my_bar = st.progress(0, text="Analyzing game moves for blunders...")
+        found = []
+
+        def on_game(done, total, game_info, game_blunders):
+            my_bar.progress(done / total, text=f"Analyzing game {done}/{total}")
+            if not incremental:
+                return
+            # Stream each game's results as it finishes, and redraw the summary in batches
+            if not game_blunders.empty:
+                found.append(game_blunders)
+                show_game(game_info, game_blunders)
+            if found and (done % BLUNDER_RENDER_BATCH_GAMES == 0) and done < total:
+                with summary_placeholder.container():
+                    st.markdown(f'<p style="color: rgba(255, 255, 255, 0.5); font-weight: 300;">Partial results: {done}/{total} games analyzed</p>', unsafe_allow_html=True)
+                    render_blunder_summary(pd.concat(found, ignore_index=True), render_key=f"partial_{done}")
+
+        user_blunders = scan_blunders(games_data, username, stockfish_engine, on_game=on_game)
+        my_bar.empty()
+        return user_blunders
+
+    # Keyed on the games and engine settings, so reruns from UI interactions never rescan
+    game_ids = tuple(game['Site'] for game in games_data)
+    memo_key = ("blunders", username, game_ids, engine_profile)
+    scanned_now = memo_key not in st.session_state.get("stage_memo", {})
+    user_blunders_df = session_memo(memo_key, run_scan)
+    with progress_container:
+        st.markdown('<div class="success-box"><p style="margin: 0; color: rgba(255, 255, 255, 0.8); font-weight: 400;">Analysis complete</p></div>', unsafe_allow_html=True)
+
+    if user_blunders_df.empty:
+        st.markdown(f'<div class="info-box"><p style="margin: 0; color: rgba(255, 255, 255, 0.6); font-weight: 300;">No blunders specifically attributed to "{username}" found in these games.</p></div>', unsafe_allow_html=True)
+        return
+
+    if not (scanned_now and incremental):
+        for game_idx in user_blunders_df['Game_Index'].unique():
+            game_info = games_data_map.get(game_idx)
+            if game_info:
+                show_game(game_info, user_blunders_df[user_blunders_df['Game_Index'] == game_idx].copy())
+    with summary_placeholder.container():
+        render_blunder_summary(user_blunders_df)
+    render_blunder_advice_and_export(user_blunders_df, username)
 
 
 def get_json_from_url(url, max_retries=3):
@@ -1362,53 +1439,53 @@ def generate_gemini_advice_openings(opening_full_name, stats, rating, example_mo
     - If performance is good, suggest ways to deepen their understanding, introduce key strategic plans, or mention related variations to explore.
     Give 1-2 concise action steps and be encouraging.
     """
-    
-    model_name = get_available_gemini_model()
-    if not model_name:
-        return "GEMINI ERROR: No available models found. Please check your API key permissions."
-    
-    # Try with retry logic for quota errors
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            model = genai.GenerativeModel(model_name)
-            response = model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            error_str = str(e)
-            
-            # Check if it's a quota error
-            if "429" in error_str or "quota" in error_str.lower() or "rate" in error_str.lower():
-                if attempt < max_retries - 1:
-                    # Extract retry delay if available
-                    import re
-                    delay_match = re.search(r'retry.*?(\d+)', error_str, re.IGNORECASE)
-                    delay = int(delay_match.group(1)) if delay_match else (attempt + 1) * 5
-                    time.sleep(min(delay, 30))  # Cap at 30 seconds
-                    continue
-                else:
-                    return f"GEMINI QUOTA ERROR: You've exceeded your free tier quota. Please wait a few minutes or upgrade your API plan. Error: {error_str[:200]}"
-            
-            # Try a different model if available
-            if attempt < max_retries - 1:
-                try:
-                    # Try to get a different model
-                    all_models = []
-                    for m in genai.list_models():
-                        if 'generateContent' in m.supported_generation_methods:
-                            model_n = m.name.split('/')[-1] if '/' in m.name else m.name
-                            if model_n != model_name:
-                                all_models.append(model_n)
-                    
-                    if all_models:
-                        model_name = all_models[0]
-                        continue
-                except:
-                    pass
-            
-            return f"GEMINI ERROR: Failed with model {model_name}: {error_str[:200]}"
-    
-    return f"GEMINI ERROR: Failed after {max_retries} attempts with model {model_name}"
+    return generate_gemini_advice(prompt)
+
+
+LOSS_OUTCOMES = ["lose", "resigned", "timeout", "abandoned", "checkmated", "disconnected"]
+DRAW_OUTCOMES = ["draw", "agreed", "repetition", "stalemate", "insufficientmaterial", "50move"]
+
+
+def build_move_tree(games, player_username):
+    """Index the player's games by move sequence, with win/draw/loss counts at every prefix"""
+    tree = MoveTree()
+    for game in games:
+        for color in ("white", "black"):
+            side = game.get(color, {})
+            if side.get("username", "").lower() != player_username:
+                continue
+            result = side.get("result")
+            outcome = "win" if result == "win" else "loss" if result in LOSS_OUTCOMES else "draw" if result in DRAW_OUTCOMES else None
+            pgn_game = chess.pgn.read_game(io.StringIO(game.get("pgn", ""))) if outcome else None
+            if pgn_game:
+                moves = [move.uci() for _, move in zip(range(tree.max_depth), pgn_game.mainline_moves())]
+                tree.add_game(moves, outcome, color, game.get("url"))
+    return tree
+
+
+def render_move_explorer(games, player_username):
+    st.markdown("<h3>Move Explorer</h3>", unsafe_allow_html=True)
+    # Build the index once per set of games; reruns from widget interactions reuse it
+    tree_key = ("move_tree", player_username, len(games), games[-1].get("url") if games else None)
+    if st.session_state.get("move_tree_key") != tree_key:
+        st.session_state.move_tree = build_move_tree(games, player_username)
+        st.session_state.move_tree_key = tree_key
+    tree = st.session_state.move_tree
+
+    col_moves, col_color = st.columns([3, 1])
+    with col_moves:
+        prefix = st.text_input("Moves so far (e.g. 1.e4 c5 2.Nf3)", value="", key="move_explorer_prefix")
+    with col_color:
+        color = st.selectbox("Playing as", ["any", "white", "black"], key="move_explorer_color")
+    try:
+        stats = tree.query(prefix, color=None if color == "any" else color)
+    except ValueError as e:
+        st.markdown(f'<div class="error-box"><p style="margin: 0; color: rgba(255, 255, 255, 0.7);">{e}</p></div>', unsafe_allow_html=True)
+        return
+    score = f"{stats['score']:.0%}" if stats["score"] is not None else "-"
+    st.markdown(f"Games: {stats['games']} | Wins: {stats['wins']} | Losses: {stats['losses']} | Draws: {stats['draws']} | Score: {score}")
+    if stats["next_moves"]:
+        st.dataframe(pd.DataFrame(stats["next_moves"]).drop(columns=["uci"]), use_container_width=True, hide_index=True)
 
 
 def analyze_openings(games, player_username):
@@ -1485,9 +1562,6 @@ def analyze_openings(games, player_username):
             except Exception:
                 pass
 
-        loss_outcomes = ["lose", "resigned", "timeout", "abandoned", "checkmated", "disconnected"]
-        draw_outcomes = ["draw", "agreed", "repetition", "stalemate", "insufficientmaterial", "50move"]
-
         main_opening_key = None
         normalized_final_name = final_opening_name.lower().replace("'", "")
 
@@ -1514,10 +1588,10 @@ def analyze_openings(games, player_username):
         if player_outcome == "win":
             stats["total_wins"] += 1;
             player_wins += 1
-        elif player_outcome in loss_outcomes:
+        elif player_outcome in LOSS_OUTCOMES:
             stats["total_losses"] += 1;
             player_losses += 1
-        elif player_outcome in draw_outcomes:
+        elif player_outcome in DRAW_OUTCOMES:
             stats["total_draws"] += 1;
             player_draws += 1
 
@@ -1529,9 +1603,9 @@ def analyze_openings(games, player_username):
         var_stats["games"] += 1
         if player_outcome == "win":
             var_stats["wins"] += 1
-        elif player_outcome in loss_outcomes:
+        elif player_outcome in LOSS_OUTCOMES:
             var_stats["losses"] += 1
-        elif player_outcome in draw_outcomes:
+        elif player_outcome in DRAW_OUTCOMES:
             var_stats["draws"] += 1
 
     st.markdown(f"<h2>Player Summary</h2>", unsafe_allow_html=True)
@@ -1659,6 +1733,8 @@ def analyze_openings(games, player_username):
             )
             st.plotly_chart(fig_opening, use_container_width=True)
     
+    render_move_explorer(games, player_username)
+
     sorted_main_openings = sorted(grouped_openings.items(), key=lambda item: item[1]["total_games"], reverse=True)
     for main_op_name, main_op_data in sorted_main_openings:
         with st.expander(f"**{main_op_name}** ({main_op_data['total_games']} games)", expanded=False):
@@ -1717,6 +1793,70 @@ def analyze_openings(games, player_username):
                         st.markdown('</div>', unsafe_allow_html=True)
 
 
+def fetch_recent_games(username, games_to_fetch_count):
+    """Fetch the user's most recent games, newest archives first; None if the archives cannot be read"""
+    archives_url = f"https://api.chess.com/pub/player/{username}/games/archives"
+    archives_data = get_json_from_url(archives_url)
+
+    if not archives_data or "archives" not in archives_data:
+        st.markdown('<div class="error-box"><p style="margin: 0; color: rgba(255, 255, 255, 0.8);">Failed to fetch game archives. Please check the username or ensure the user has public archives.</p></div>', unsafe_allow_html=True)
+        return None
+
+    all_games = []
+    progress_bar = st.progress(0, text="Fetching games...")
+
+    archives_list = archives_data["archives"]
+    archives_to_check = list(reversed(archives_list))  # newest first
+
+    for idx, archive_url in enumerate(archives_to_check):
+        if len(all_games) >= games_to_fetch_count:
+            break
+
+        progress_fraction = min(1.0, len(all_games) / max(1, games_to_fetch_count))
+        progress_bar.progress(progress_fraction, text=f"Fetching games from: {archive_url.split('/')[-2]}/{archive_url.split('/')[-1]}")
+
+        archive_data = get_json_from_url(archive_url)
+        if archive_data and "games" in archive_data:
+            games_from_archive = archive_data["games"]
+            if games_from_archive:
+                games_from_archive = sorted(games_from_archive, key=lambda g: g.get("end_time", 0))
+                for game in games_from_archive:
+                    if len(all_games) >= games_to_fetch_count:
+                        break
+                    all_games.append(game)
+
+        time.sleep(0.1)
+
+    progress_bar.progress(1.0, text="Finished fetching games")
+    progress_bar.empty()
+
+    return all_games[-games_to_fetch_count:]
+
+
+def build_blunder_games_data(recent_games):
+    """Parse each game's PGN into the per-game records used by the blunder scan"""
+    blunder_analysis_games_data = []
+    for idx, game in enumerate(recent_games):
+        pgn_moves = []
+        pgn_text = game.get("pgn", "")
+        try:
+            pgn_game = chess.pgn.read_game(io.StringIO(pgn_text))
+            if pgn_game: pgn_moves = [x.uci() for x in pgn_game.mainline_moves()]
+        except Exception as e:
+            st.markdown(f'<div class="info-box"><p style="margin: 0; color: rgba(255, 255, 255, 0.6); font-weight: 300;">Could not parse PGN for game {idx}: {e}</p></div>', unsafe_allow_html=True)
+
+        event_name = game.get("time_class", "Live Game").replace("_", " ").capitalize()
+
+        blunder_analysis_games_data.append({
+            'game_index': idx, 'Event': event_name, 'Site': game.get("url", "N/A"),
+            'Date': game.get("end_time", "N/A"), 'White': game.get("white", {}).get("username", "N/A"),
+            'Black': game.get("black", {}).get("username", "N/A"),
+            'Result': game.get("white", {}).get("result", "N/A"), 'Moves_UCI': pgn_moves
+        })
+
+    return blunder_analysis_games_data
+
+
 def main():
     st.set_page_config(
         page_title="Chess Analyzer",
@@ -1735,8 +1875,9 @@ def main():
     st.markdown('<p style="color: rgba(255, 255, 255, 0.6); text-align: center; margin-bottom: 4rem; font-size: 1.1rem; font-weight: 300; line-height: 1.8;">Enter your Chess.com username to get personalized insights on your openings<br>and analyze your blunders with AI-powered coaching.</p>', unsafe_allow_html=True)
 
     engine = None
+    engine_profile = get_engine_profile()
     try:
-        engine = Stockfish(STOCKFISH_EXECUTABLE_PATH, parameters={"Contempt": 0, "Threads": 4, "Hash": 256})
+        engine = get_stockfish_engine(engine_profile)
     except Exception as e:
         st.markdown(f'<div class="error-box"><p style="margin: 0; color: rgba(255, 255, 255, 0.8);">Error initializing Stockfish engine. Please ensure the path is correct and Stockfish is installed. Error: {e}</p></div>', unsafe_allow_html=True)
         st.stop()
@@ -1761,63 +1902,25 @@ def main():
     st.markdown('<div style="margin-bottom: 2rem;"></div>', unsafe_allow_html=True)
 
     if st.button("Analyze My Games", key="analyze_button", use_container_width=True) and username:
+        st.session_state.analysis_request = (username, int(games_to_fetch_count))
+        # A new click re-fetches games; stages keyed on game ids are reused if nothing changed
+        st.session_state.setdefault("stage_memo", OrderedDict()).pop(("games",) + st.session_state.analysis_request, None)
+
+    # The request outlives the button click, so widget interactions re-render the stored results
+    analysis_request = st.session_state.get("analysis_request")
+    if analysis_request:
+        username, games_to_fetch_count = analysis_request
         with st.spinner("Fetching games and analyzing... This might take a moment, especially for blunder analysis."):
             try:
-                archives_url = f"https://api.chess.com/pub/player/{username}/games/archives"
-                archives_data = get_json_from_url(archives_url)
-
-                if not archives_data or "archives" not in archives_data:
-                    st.markdown('<div class="error-box"><p style="margin: 0; color: rgba(255, 255, 255, 0.8);">Failed to fetch game archives. Please check the username or ensure the user has public archives.</p></div>', unsafe_allow_html=True)
+                recent_games = session_memo(("games", username, games_to_fetch_count),
+                                            lambda: fetch_recent_games(username, games_to_fetch_count))
+                if recent_games is None:
                     return
 
-                all_games = []
-                progress_bar = st.progress(0, text="Fetching games...")
-
-                archives_list = archives_data["archives"]
-                archives_to_check = list(reversed(archives_list))  # newest first
-
-                for idx, archive_url in enumerate(archives_to_check):
-                    if len(all_games) >= games_to_fetch_count:
-                        break
-
-                    progress_fraction = min(1.0, len(all_games) / max(1, games_to_fetch_count))
-                    progress_bar.progress(progress_fraction, text=f"Fetching games from: {archive_url.split('/')[-2]}/{archive_url.split('/')[-1]}")
-
-                    archive_data = get_json_from_url(archive_url)
-                    if archive_data and "games" in archive_data:
-                        games_from_archive = archive_data["games"]
-                        if games_from_archive:
-                            games_from_archive = sorted(games_from_archive, key=lambda g: g.get("end_time", 0))
-                            for game in games_from_archive:
-                                if len(all_games) >= games_to_fetch_count:
-                                    break
-                                all_games.append(game)
-
-                    time.sleep(0.1)
-
-                progress_bar.progress(1.0, text="Finished fetching games")
-                progress_bar.empty()
-
-                if all_games:
-                    recent_games = all_games[-games_to_fetch_count:]
-                    blunder_analysis_games_data = []
-                    for idx, game in enumerate(recent_games):
-                        pgn_moves = []
-                        pgn_text = game.get("pgn", "")
-                        try:
-                            pgn_game = chess.pgn.read_game(io.StringIO(pgn_text))
-                            if pgn_game: pgn_moves = [x.uci() for x in pgn_game.mainline_moves()]
-                        except Exception as e:
-                            st.markdown(f'<div class="info-box"><p style="margin: 0; color: rgba(255, 255, 255, 0.6); font-weight: 300;">Could not parse PGN for game {idx}: {e}</p></div>', unsafe_allow_html=True)
-
-                        event_name = game.get("time_class", "Live Game").replace("_", " ").capitalize()
-
-                        blunder_analysis_games_data.append({
-                            'game_index': idx, 'Event': event_name, 'Site': game.get("url", "N/A"),
-                            'Date': game.get("end_time", "N/A"), 'White': game.get("white", {}).get("username", "N/A"),
-                            'Black': game.get("black", {}).get("username", "N/A"),
-                            'Result': game.get("white", {}).get("result", "N/A"), 'Moves_UCI': pgn_moves
-                        })
+                if recent_games:
+                    game_ids = tuple(game.get("url") for game in recent_games)
+                    blunder_analysis_games_data = session_memo(("games_data", game_ids),
+                                                               lambda: build_blunder_games_data(recent_games))
 
                     st.markdown(f'<div class="success-box"><p style="margin: 0; color: rgba(255, 255, 255, 0.8); font-weight: 400;">Successfully fetched {len(recent_games)} most recent games for analysis</p></div>', unsafe_allow_html=True)
 
@@ -1825,13 +1928,15 @@ def main():
                     with tab1:
                         analyze_openings(recent_games, username)
                     with tab2:
-                        analyze_blunders(blunder_analysis_games_data, username, engine)
+                        analyze_blunders(blunder_analysis_games_data, username, engine, engine_profile)
                 else:
                     st.markdown('<div class="info-box"><p style="margin: 0; color: rgba(255, 255, 255, 0.6); font-weight: 300;">No games found for this username.</p></div>', unsafe_allow_html=True)
             except Exception as e:
                 st.markdown(f'<div class="error-box"><p style="margin: 0; color: rgba(255, 255, 255, 0.8);">An unexpected error occurred: {e}</p></div>', unsafe_allow_html=True)
                 st.markdown('<div class="info-box"><p style="margin: 0; color: rgba(255, 255, 255, 0.6); font-weight: 300;">Common issues: Incorrect username, network problems, or temporary Chess.com API issues.</p></div>', unsafe_allow_html=True)
 
+    render_engine_timings()
+
 
 if __name__ == "__main__":
     main()
@@ -1,3 +1,5 @@
+from typing import Dict
+
 from pydantic_settings import BaseSettings
 
 class SettingsClass(BaseSettings):
@@ -5,5 +7,31 @@ class SettingsClass(BaseSettings):
     LOGFIRE_TOKEN: str = ""
     LOGFIRE_ENVIRONMENT: str = "development"
     CHESSBUDDY_MCP_SERVER_URL: str = "http://localhost:8000"
+    CHESSBUDDY_PREFETCH_ENABLED: bool = False
+    CHESSBUDDY_PREFETCH_INTERVAL_SECONDS: int = 600
+    CHESSBUDDY_PREFETCH_IDLE_SECONDS: int = 30
+    CHESSBUDDY_PREFETCH_MAX_MONTHS: int = 3
+    CHESSBUDDY_CHESSCOM_MAX_CONCURRENCY: int = 4
+    CHESSBUDDY_CHESSCOM_RATE_PER_SECOND: float = 8.0
+    CHESSBUDDY_BATCH_MAX_USERS: int = 100
+    CHESSBUDDY_DF_CACHE_MAX_BYTES: int = 128 * 1024 * 1024
+    # "llm": always reformat with a second LLM call; "auto": format structured results locally,
+    # LLM otherwise; "fused": the agent writes the final markdown itself, no second call.
+    CHESSBUDDY_FORMAT_MODE: str = "auto"
+    CHESSBUDDY_RESPONSE_CACHE_TTL_SECONDS: int = 3600
+    CHESSBUDDY_CHAT_HISTORY_MAX_TOKENS: int = 1500
+    CHESSBUDDY_CHAT_MAX_SESSIONS: int = 50
+    CHESSBUDDY_CHAT_SESSION_IDLE_SECONDS: int = 1800
+    # Cache tier shared across processes: "" (off), "disk" (a local directory) or "modal"
+    # (the workspaces volume, mounted at the directory's parent).
+    CHESSBUDDY_SHARED_CACHE: str = ""
+    CHESSBUDDY_SHARED_CACHE_DIR: str = "~/.cache/chessbuddy"
+    # Shared cache entries are swept this long after they were written.
+    CHESSBUDDY_SHARED_CACHE_MAX_AGE_DAYS: float = 30
+    # Span policy for config.instrumentation.instrument; rates are a JSON object, e.g.
+    # {"parse_pgns": 0.1}, overriding the per-function defaults in code.
+    CHESSBUDDY_TRACING_ENABLED: bool = True
+    CHESSBUDDY_TRACE_SAMPLE_RATES: Dict[str, float] = {}
+    CHESSBUDDY_TRACE_MAX_VALUE_CHARS: int = 2000
 
 Settings = SettingsClass()
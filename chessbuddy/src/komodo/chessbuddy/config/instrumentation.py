@@ -0,0 +1,104 @@
+import functools
+import inspect
+import json
+import random
+from typing import Any, Callable, Optional, TypeVar, Union
+
+import logfire
+
+from komodo.chessbuddy.config.env import Settings
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Containers with more items than this are summarized by length instead of recorded.
+MAX_ITEMS = 50
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... (+{len(text) - max_chars} chars)"
+
+
+def summarize_value(value: Any, max_chars: Optional[int] = None) -> Any:
+    """
+    A span-sized stand-in for `value`: scalars as they are, strings truncated, DataFrames
+    as their shape and columns, and containers kept only while small enough to serialize
+    within `max_chars` (default CHESSBUDDY_TRACE_MAX_VALUE_CHARS).
+    """
+    max_chars = max_chars or Settings.CHESSBUDDY_TRACE_MAX_VALUE_CHARS
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return _truncate(value, max_chars)
+    # DataFrames, checked by shape so pandas does not have to be imported here.
+    if hasattr(value, "shape") and hasattr(value, "columns"):
+        return {"type": type(value).__name__, "rows": int(value.shape[0]), "columns": [str(c) for c in value.columns]}
+    if isinstance(value, (list, tuple, set, dict)):
+        if len(value) <= MAX_ITEMS:
+            try:
+                if len(json.dumps(value, default=str)) <= max_chars:
+                    return value
+            except (TypeError, ValueError):
+                pass
+        summary = {"type": type(value).__name__, "len": len(value)}
+        if isinstance(value, dict):
+            summary["keys"] = [str(k) for k in list(value)[:20]]
+        return summary
+    return _truncate(repr(value), max_chars)
+
+
+def _sample_rate(name: str, default: float) -> float:
+    rates = Settings.CHESSBUDDY_TRACE_SAMPLE_RATES
+    return rates.get(name, rates.get(name.rsplit(".", 1)[-1], default))
+
+
+def instrument(
+    func: Optional[F] = None,
+    *,
+    msg_template: Optional[str] = None,
+    sample_rate: float = 1.0,
+    record_return: bool = False,
+    max_value_chars: Optional[int] = None,
+) -> Union[F, Callable[[F], F]]:
+    """
+    Like logfire.instrument, with a per-function policy for hot library code.
+
+    Only a `sample_rate` fraction of calls open a span; arguments and (with `record_return`)
+    the return value are recorded through summarize_value, so DataFrames and long payloads
+    never get serialized into a span. When tracing is disabled or the rate is 0, the function
+    is returned undecorated and costs nothing.
+
+    CHESSBUDDY_TRACE_SAMPLE_RATES overrides the rate per function, keyed by qualified name
+    ("komodo.chessbuddy.lib.pgnanalytics.parse_pgns") or bare name ("parse_pgns").
+
+    Usable as @instrument or @instrument(sample_rate=0.1, record_return=True).
+    """
+    def decorate(fn: F) -> F:
+        name = f"{fn.__module__}.{fn.__qualname__}"
+        rate = _sample_rate(name, sample_rate)
+        if not Settings.CHESSBUDDY_TRACING_ENABLED or rate <= 0:
+            return fn
+        template = msg_template or f"Calling {name}"
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if rate < 1 and random.random() >= rate:
+                return fn(*args, **kwargs)
+            try:
+                bound = signature.bind(*args, **kwargs)
+                attributes = {k: summarize_value(v, max_value_chars) for k, v in bound.arguments.items()}
+            except TypeError:
+                attributes = {}
+            if rate < 1:
+                attributes["sample_rate"] = rate
+            with logfire.span(template, _span_name=name, **attributes) as span:
+                result = fn(*args, **kwargs)
+                if record_return:
+                    span.set_attribute("return", summarize_value(result, max_value_chars))
+                return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate(func) if func is not None else decorate
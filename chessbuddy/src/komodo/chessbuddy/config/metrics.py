@@ -0,0 +1,216 @@
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import logfire
+
+# Histogram bucket upper bounds, in seconds: from a cached lookup to a slow chess.com month.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+Collector = Callable[[], Dict[str, float]]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Counter:
+    """
+    Monotonic count per label set, mirrored to a logfire (OpenTelemetry) counter.
+    """
+
+    def __init__(self, name: str, description: str = "", unit: str = "1"):
+        self.name = name
+        self.description = description
+        self.unit = unit
+        self._lock = threading.Lock()
+        self._values: Dict[Labels, float] = {}
+        self._otel = logfire.metric_counter(name, unit=unit, description=description)
+
+    def add(self, value: float = 1, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+        self._otel.add(value, dict(key))
+
+    def values(self) -> Dict[Labels, float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class _Series:
+    __slots__ = ("count", "sum", "bucket_counts")
+
+    def __init__(self, buckets: int):
+        self.count = 0
+        self.sum = 0.0
+        self.bucket_counts = [0] * (buckets + 1)  # the last one is +Inf
+
+
+class Histogram:
+    """
+    Distribution of observed values (durations by default) per label set, with fixed
+    bucket bounds, mirrored to a logfire (OpenTelemetry) histogram.
+    """
+
+    def __init__(self, name: str, description: str = "", unit: str = "s", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.unit = unit
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series: Dict[Labels, _Series] = {}
+        self._otel = logfire.metric_histogram(name, unit=unit, description=description)
+
+    def record(self, value: float, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets))
+            series.count += 1
+            series.sum += value
+            series.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._otel.record(value, dict(key))
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """
+        Record the duration of the block, labelled status="ok" or status="error".
+        """
+        started = time.perf_counter()
+        status = "error"
+        try:
+            yield
+            status = "ok"
+        finally:
+            self.record(time.perf_counter() - started, status=status, **labels)
+
+    def timed(self, **labels: Any) -> Callable:
+        """
+        Decorator form of `time`.
+        """
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def series(self) -> Dict[Labels, Dict[str, Any]]:
+        with self._lock:
+            return {key: {"count": s.count, "sum": s.sum, "bucket_counts": list(s.bucket_counts)}
+                    for key, s in self._series.items()}
+
+
+class MetricsRegistry:
+    """
+    In-process registry of counters, histograms and gauge collectors.
+
+    Counters and histograms are also exported through logfire's OpenTelemetry metrics when
+    logfire is configured; the registry keeps its own totals so they can be served by the
+    /metrics endpoint. Collectors are called at read time and return current gauge values,
+    such as cache hit counts or queue depths owned by other objects.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Counter] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self._collectors: List[Collector] = []
+
+    def counter(self, name: str, description: str = "", unit: str = "1") -> Counter:
+        with self._lock:
+            if name not in self._counters:
+                self._counters[name] = Counter(name, description, unit)
+            return self._counters[name]
+
+    def histogram(self, name: str, description: str = "", unit: str = "s",
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram(name, description, unit, buckets)
+            return self._histograms[name]
+
+    def add_collector(self, collector: Collector) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def gauges(self) -> Dict[str, float]:
+        with self._lock:
+            collectors = list(self._collectors)
+        values: Dict[str, float] = {}
+        for collector in collectors:
+            try:
+                values.update(collector())
+            except Exception:
+                logfire.exception("Metrics collector failed")
+        return values
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        All current values as JSON-friendly dicts.
+        """
+        with self._lock:
+            counters, histograms = list(self._counters.values()), list(self._histograms.values())
+        return {
+            "counters": {c.name: [{"labels": dict(k), "value": v} for k, v in c.values().items()] for c in counters},
+            "histograms": {
+                h.name: [{"labels": dict(k), "count": s["count"], "sum": s["sum"],
+                          "buckets": dict(zip([*map(str, h.buckets), "+Inf"], s["bucket_counts"]))}
+                         for k, s in h.series().items()]
+                for h in histograms
+            },
+            "gauges": self.gauges(),
+        }
+
+    def render_prometheus(self) -> str:
+        """
+        All current values in the Prometheus text exposition format.
+        """
+        with self._lock:
+            counters, histograms = list(self._counters.values()), list(self._histograms.values())
+        lines: List[str] = []
+        for c in counters:
+            name = _prometheus_name(c.name) + "_total"
+            lines += [f"# HELP {name} {c.description}", f"# TYPE {name} counter"]
+            lines += [f"{name}{_prometheus_labels(k)} {v}" for k, v in c.values().items()]
+        for h in histograms:
+            name = _prometheus_name(h.name) + _unit_suffix(h.unit)
+            lines += [f"# HELP {name} {h.description}", f"# TYPE {name} histogram"]
+            for key, s in h.series().items():
+                cumulative = 0
+                for bound, count in zip([*map(str, h.buckets), "+Inf"], s["bucket_counts"]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_prometheus_labels(key, le=bound)} {cumulative}")
+                lines.append(f"{name}_sum{_prometheus_labels(key)} {s['sum']}")
+                lines.append(f"{name}_count{_prometheus_labels(key)} {s['count']}")
+        for gauge, value in sorted(self.gauges().items()):
+            name = _prometheus_name(gauge)
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+def _prometheus_name(name: str) -> str:
+    return "".join(ch if ch.isalnum() or ch == "_" else "_" for ch in name)
+
+
+def _unit_suffix(unit: str) -> str:
+    return "_seconds" if unit == "s" else ""
+
+
+def _prometheus_labels(labels: Labels, le: Optional[str] = None) -> str:
+    pairs = [*labels, ("le", le)] if le is not None else list(labels)
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+# Shared by the whole process; served by the FastAPI /metrics endpoint.
+metrics = MetricsRegistry()
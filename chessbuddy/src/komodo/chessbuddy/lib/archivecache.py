@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# The archive list and the running month change as new games are played.
+DEFAULT_TTL_SECONDS = 300
+# Upper bound on cached (username, year, month) entries.
+DEFAULT_MAX_MONTHS = 2000
+# Namespace of closed months in the shared cache tier.
+SHARED_NAMESPACE = "archives"
+
+
+@dataclass
+class _Entry:
+    value: Any
+    fetched_at: float
+    immutable: bool = False
+
+
+class ArchiveCache:
+    """
+    Process-local cache for chess.com game archives.
+
+    Closed months never change once they are over, so they are kept until evicted
+    (LRU). The archive list and the current month are refreshed after `ttl_seconds`.
+    With a shared cache, closed months are also looked up in and written to it, so
+    other processes and containers do not fetch them again.
+
+    Args:
+        fetch_archive_urls: Callable returning the archive URLs for a username.
+        fetch_month: Callable returning the list of game dicts for (username, year, month).
+        ttl_seconds: Freshness window for mutable entries.
+        max_months: Maximum number of cached months across all users.
+        clock: Time source, in seconds since the epoch.
+        shared: Optional cross-process cache tier (see sharedcache.DirectoryCache).
+    """
+
+    def __init__(
+        self,
+        fetch_archive_urls: Callable[[str], List[str]],
+        fetch_month: Callable[[str, str, str], List[Dict[str, Any]]],
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_months: int = DEFAULT_MAX_MONTHS,
+        clock: Callable[[], float] = time.time,
+        shared: Optional[Any] = None,
+    ):
+        self._fetch_archive_urls = fetch_archive_urls
+        self._fetch_month = fetch_month
+        self.ttl_seconds = ttl_seconds
+        self.max_months = max_months
+        self._clock = clock
+        self.shared = shared
+        self._lock = threading.RLock()
+        self._archives: Dict[str, _Entry] = {}
+        self._months: "OrderedDict[Tuple[str, str, str], _Entry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_archive_urls(self, username: str, refresh: bool = False) -> List[str]:
+        """
+        Return the monthly archive URLs for a user, oldest first.
+        """
+        key = username.lower()
+        with self._lock:
+            entry = self._archives.get(key)
+            if entry and not refresh and self._is_fresh(entry):
+                self.hits += 1
+                return entry.value
+            self.misses += 1
+        urls = self._fetch_archive_urls(username)
+        with self._lock:
+            self._archives[key] = _Entry(urls, self._clock())
+        return urls
+
+    def get_month_games(self, username: str, year: str, month: str, refresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        Return the games a user played in the given month.
+        """
+        key = (username.lower(), str(year), str(month).zfill(2))
+        with self._lock:
+            entry = self._months.get(key)
+            if entry and not refresh and self._is_fresh(entry):
+                self._months.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            self.misses += 1
+        closed = self._is_closed_month(key[1], key[2])
+        shared_key = "/".join(key)
+        games = None
+        if closed and not refresh and self.shared is not None:
+            games = self.shared.get_json(SHARED_NAMESPACE, shared_key)
+        if games is None:
+            games = self._fetch_month(username, key[1], key[2])
+            if closed and self.shared is not None:
+                self.shared.put_json(SHARED_NAMESPACE, shared_key, games)
+        with self._lock:
+            self._months[key] = _Entry(games, self._clock(), immutable=closed)
+            self._months.move_to_end(key)
+            while len(self._months) > self.max_months:
+                self._months.popitem(last=False)
+        return games
+
+    def window_version(self, username: str, max_months: int) -> Tuple[str, Optional[int]]:
+        """
+        Return a version string for a user's newest `max_months` archives, and the
+        latest game end_time in them. The version changes whenever a game is added.
+        """
+        parts = []
+        last_end_time = None
+        for archive_url in self.get_archive_urls(username)[-max_months:]:
+            year, month = split_archive_url(archive_url)
+            games = self.get_month_games(username, year, month)
+            end_time = max((g.get("end_time") or 0 for g in games), default=0)
+            parts.append(f"{year}{month}.{len(games)}.{end_time}")
+            last_end_time = max(last_end_time or 0, end_time)
+        return "-".join(parts), last_end_time
+
+    def invalidate(self, username: Optional[str] = None) -> None:
+        """
+        Drop cached entries for one user, or everything if no username is given.
+        """
+        with self._lock:
+            if username is None:
+                self._archives.clear()
+                self._months.clear()
+                return
+            key = username.lower()
+            self._archives.pop(key, None)
+            for month_key in [k for k in self._months if k[0] == key]:
+                del self._months[month_key]
+
+    def _is_fresh(self, entry: _Entry) -> bool:
+        return entry.immutable or self._clock() - entry.fetched_at < self.ttl_seconds
+
+    def _is_closed_month(self, year: str, month: str) -> bool:
+        now = datetime.fromtimestamp(self._clock(), timezone.utc)
+        return (int(year), int(month)) < (now.year, now.month)
+
+
+def split_archive_url(archive_url: str) -> Tuple[str, str]:
+    """
+    Return the (year, month) strings of a chess.com archive URL.
+    """
+    parts = archive_url.rstrip("/").split("/")
+    return parts[-2], parts[-1]
@@ -1,13 +1,42 @@
-import logfire
 from chessdotcom import ChessDotComClient
+from contextlib import contextmanager
 from datetime import datetime, timezone
 import re
-from typing import List, Tuple, Optional, Dict, Any
+import time
+from typing import List, Tuple, Optional, Dict, Any, Union
+
+from komodo.chessbuddy.config.env import Settings
+from komodo.chessbuddy.config.instrumentation import instrument
+from komodo.chessbuddy.config.metrics import metrics
+from komodo.chessbuddy.lib.archivecache import ArchiveCache, split_archive_url
+from komodo.chessbuddy.lib.sharedcache import shared_cache
+from komodo.chessbuddy.lib.ratelimit import RateLimiter
 
 client = ChessDotComClient(user_agent="thechessbuddy/0.1.0 (https://github.com/ryanoberoi/thechessbuddy)")
 
+# Shared by all threads in this process, so concurrent batch requests stay polite to chess.com.
+chesscom_limiter = RateLimiter(
+    max_concurrent=Settings.CHESSBUDDY_CHESSCOM_MAX_CONCURRENCY,
+    rate_per_second=Settings.CHESSBUDDY_CHESSCOM_RATE_PER_SECOND,
+)
+
+fetch_duration = metrics.histogram("chesscom.fetch.duration", "chess.com API call latency, by endpoint")
+limiter_wait = metrics.histogram("chesscom.limiter.wait", "Time chess.com calls spent queued for the rate limiter")
+
+
+@contextmanager
+def _chesscom_call(endpoint: str):
+    """
+    Hold a rate limiter slot for one chess.com call, recording queueing and call time separately.
+    """
+    queued = time.perf_counter()
+    with chesscom_limiter:
+        limiter_wait.record(time.perf_counter() - queued, endpoint=endpoint)
+        with fetch_duration.time(endpoint=endpoint):
+            yield
+
 
-@logfire.instrument(record_return=True)
+@instrument(record_return=True)
 def get_profile(username: str) -> Dict[str, Any]:
     """
     Fetch the public profile of a chess.com user.
@@ -18,11 +47,12 @@ def get_profile(username: str) -> Dict[str, Any]:
     Returns:
         dict: The user's profile information.
     """
-    response = client.get_player_profile(username)  # type: ignore[reportAttributeAccessIssue]
+    with _chesscom_call("profile"):
+        response = client.get_player_profile(username)  # type: ignore[reportAttributeAccessIssue]
     return response.json['player']
 
 
-@logfire.instrument
+@instrument
 def get_latest_games(username: str, n: int = 10) -> Dict[str, Any]:
     """
     Fetch the last N games played by a chess.com user (across months if needed).
@@ -35,16 +65,14 @@ def get_latest_games(username: str, n: int = 10) -> Dict[str, Any]:
         dict: The latest games data, with up to N most recent games.
     """
     # Get all archive URLs (sorted oldest to newest)
-    archives_response = client.get_player_game_archives(username)  # type: ignore[reportAttributeAccessIssue]
-    archive_urls = archives_response.json.get("archives", [])
+    archive_urls = archive_cache.get_archive_urls(username)
     if not archive_urls:
         return {"games": []}
     # Process archives from newest to oldest
     all_games = []
     for archive_url in reversed(archive_urls):
-        parts = archive_url.rstrip("/").split("/")
-        year, month = parts[-2], parts[-1]
-        games = _get_games_by_month(username, year, month).get("games", [])
+        year, month = split_archive_url(archive_url)
+        games = archive_cache.get_month_games(username, year, month)
         all_games.extend(games)
         if len(all_games) >= n:
             break
@@ -55,7 +83,7 @@ def get_latest_games(username: str, n: int = 10) -> Dict[str, Any]:
     return {"games": all_games[:n]}
 
 
-@logfire.instrument
+@instrument
 def download_pgn(username: str, game_url: str) -> str:
     """
     Download the PGN for a given chess.com game.
@@ -72,14 +100,126 @@ def download_pgn(username: str, game_url: str) -> str:
     """
     game_id = _extract_game_id(game_url)
     for year, month in _recent_year_months(3):
-        games = _get_games_by_month(username, year, month).get("games", [])
+        games = archive_cache.get_month_games(username, year, month)
         for game in games:
             if "url" in game and game_id in game["url"]:
                 return game.get("pgn", "")
     raise ValueError("PGN not found for this game URL and username")
 
 
-@logfire.instrument
+Cursor = Union[int, str]
+
+
+def parse_cursor(cursor: Cursor) -> Tuple[int, Optional[int]]:
+    """
+    Split a page cursor into (end_time, game_id). A bare unix time has no game id.
+
+    Raises:
+        ValueError: If the cursor is not "<end_time>" or "<end_time>.<game_id>".
+    """
+    m = re.fullmatch(r"(\d+)(?:\.(\d+))?", str(cursor))
+    if not m:
+        raise ValueError(f"Invalid cursor {cursor!r}: expected a unix time or a cursor returned by a previous page")
+    return int(m.group(1)), int(m.group(2)) if m.group(2) else None
+
+
+def _page_key(game: Dict[str, Any]) -> Tuple[int, int]:
+    # Games that end in the same second are ordered by game id, so a cursor can point between them.
+    m = re.search(r"/(\d+)$", game.get("url") or "")
+    return game.get("end_time") or 0, int(m.group(1)) if m else 0
+
+
+def _format_cursor(game: Dict[str, Any]) -> str:
+    end_time, game_id = _page_key(game)
+    return f"{end_time}.{game_id}"
+
+
+@instrument
+def page_games(
+    username: str,
+    limit: int = 20,
+    before: Optional[Cursor] = None,
+    after: Optional[Cursor] = None,
+    time_class: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Return one page of a user's games, newest first, ordered by (end_time, game id).
+
+    Only the archive months that overlap the requested window are read, and they are
+    served from the archive cache.
+
+    Args:
+        username (str): The chess.com username.
+        limit (int): Maximum number of games to return.
+        before (int | str, optional): A cursor; only games ordered before it. A bare unix
+            timestamp means games that ended strictly before that time.
+        after (int | str, optional): A cursor; only games ordered after it. A bare unix
+            timestamp means games that ended strictly after that time.
+        time_class (str, optional): Only games of this time class (e.g. "blitz", "rapid").
+
+    Returns:
+        dict: {"games": [...], "has_more": bool, "cursors": {"before": str, "after": str}}.
+        Pass cursors["before"] as `before` for the next (older) page, or cursors["after"]
+        as `after` for newer games. Cursors carry the game id as well as the end time, so
+        games that ended in the same second are never skipped between pages.
+
+    Raises:
+        ValueError: If a cursor is malformed.
+    """
+    # A bare timestamp bounds by time alone: before every game at that second, or after all of them.
+    upper = lower = None
+    if before is not None:
+        before_time, before_id = parse_cursor(before)
+        upper = (before_time, -1 if before_id is None else before_id)
+    if after is not None:
+        after_time, after_id = parse_cursor(after)
+        lower = (after_time, float("inf") if after_id is None else after_id)
+
+    archive_urls = archive_cache.get_archive_urls(username)
+    # Walk forward from `after` when only `after` is given, otherwise backward from the newest game.
+    forward = lower is not None and upper is None
+    lower_month = _end_time_year_month(lower[0]) if lower is not None else None
+    upper_month = _end_time_year_month(upper[0]) if upper is not None else None
+
+    def matches(game: Dict[str, Any]) -> bool:
+        key = _page_key(game)
+        return ((upper is None or key < upper)
+                and (lower is None or key > lower)
+                and (time_class is None or game.get("time_class") == time_class))
+
+    selected: List[Dict[str, Any]] = []
+    for archive_url in (archive_urls if forward else reversed(archive_urls)):
+        year, month = split_archive_url(archive_url)
+        if upper_month and (year, month) > upper_month:
+            if forward:
+                break
+            continue
+        if lower_month and (year, month) < lower_month:
+            if forward:
+                continue
+            break
+        games = [g for g in archive_cache.get_month_games(username, year, month) if matches(g)]
+        games.sort(key=_page_key, reverse=not forward)
+        selected.extend(games)
+        if len(selected) > limit:
+            break
+
+    has_more = len(selected) > limit
+    page = selected[:limit]
+    if forward:
+        page.reverse()
+    cursors = {}
+    if page:
+        cursors = {"before": _format_cursor(page[-1]), "after": _format_cursor(page[0])}
+    return {"games": page, "has_more": has_more, "cursors": cursors}
+
+
+def _end_time_year_month(end_time: int) -> Tuple[str, str]:
+    dt = datetime.fromtimestamp(end_time, timezone.utc)
+    return str(dt.year), str(dt.month).zfill(2)
+
+
+@instrument
 def _get_latest_archive_year_month(username: str) -> Tuple[Optional[str], Optional[str]]:
     """
     Get the year and month of the latest game archive for a user.
@@ -87,25 +227,47 @@ def _get_latest_archive_year_month(username: str) -> Tuple[Optional[str], Option
     Returns:
         (year, month) as strings, or (None, None) if not found.
     """
-    archives_response = client.get_player_game_archives(username)  # type: ignore[reportAttributeAccessIssue]
-    archive_urls = archives_response.json.get("archives", [])
+    archive_urls = archive_cache.get_archive_urls(username)
     if not archive_urls:
         return None, None
-    latest_archive_url = archive_urls[-1]
-    parts = latest_archive_url.rstrip("/").split("/")
-    return parts[-2], parts[-1]
+    return split_archive_url(archive_urls[-1])
 
 
-@logfire.instrument
+@instrument
+def _fetch_archive_urls(username: str) -> List[str]:
+    """
+    Fetch the monthly archive URLs for a user, oldest first.
+    """
+    with _chesscom_call("archives"):
+        archives_response = client.get_player_game_archives(username)  # type: ignore[reportAttributeAccessIssue]
+    return archives_response.json.get("archives", [])
+
+
+@instrument
 def _get_games_by_month(username: str, year: str, month: str) -> Dict[str, Any]:
     """
     Fetch games for a user for a specific year and month.
     """
-    games_response = client.get_player_games_by_month(username, year, month)  # type: ignore[reportAttributeAccessIssue]
+    with _chesscom_call("month"):
+        games_response = client.get_player_games_by_month(username, year, month)  # type: ignore[reportAttributeAccessIssue]
     return games_response.json
 
 
-@logfire.instrument
+# Shared by every caller in this process; see ArchiveCache for freshness rules.
+archive_cache = ArchiveCache(
+    fetch_archive_urls=_fetch_archive_urls,
+    fetch_month=lambda username, year, month: _get_games_by_month(username, year, month).get("games", []),
+    shared=shared_cache,
+)
+
+metrics.add_collector(lambda: {
+    "archive_cache.hits": archive_cache.hits,
+    "archive_cache.misses": archive_cache.misses,
+    "chesscom.limiter.waiting": chesscom_limiter.waiting,
+    "chesscom.limiter.in_flight": chesscom_limiter.in_flight,
+})
+
+
 def _extract_game_id(game_url: str) -> str:
     """
     Extract the game ID from a chess.com game URL.
@@ -119,7 +281,6 @@ def _extract_game_id(game_url: str) -> str:
     return m.group(1)
 
 
-@logfire.instrument
 def _recent_year_months(n: int) -> List[Tuple[str, str]]:
     """
     Generate (year, month) tuples for the current and previous n-1 months, in UTC.
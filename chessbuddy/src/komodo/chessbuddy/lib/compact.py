@@ -0,0 +1,111 @@
+import json
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+# Default size budget (in JSON characters) for a tool result handed to an LLM.
+DEFAULT_MAX_CHARS = 8000
+
+# Fields returned for analytics games when no selection is given; moves are left out.
+COMPACT_GAME_FIELDS = ("date", "white", "black", "result", "opening", "num_moves", "time_class", "url")
+
+
+def json_size(value: Any) -> int:
+    return len(json.dumps(value, separators=(",", ":"), default=str))
+
+
+def compact_game_record(record: Dict[str, Any], fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Project a parsed game record onto `fields` (default COMPACT_GAME_FIELDS).
+    Moves, when requested, are encoded as one space-separated UCI string.
+    """
+    compact = {}
+    for field in fields or COMPACT_GAME_FIELDS:
+        value = record.get(field)
+        if field == "moves" and isinstance(value, (list, tuple)):
+            value = " ".join(value)
+        compact[field] = value
+    return compact
+
+
+def compact_chesscom_game(game: Dict[str, Any], include_pgn: bool = False) -> Dict[str, Any]:
+    """
+    Reduce a raw chess.com game payload to the fields an agent usually needs.
+    """
+    def side(player: Dict[str, Any]) -> Dict[str, Any]:
+        return {"username": player.get("username"), "rating": player.get("rating"), "result": player.get("result")}
+
+    compact = {
+        "url": game.get("url"),
+        "end_time": game.get("end_time"),
+        "time_class": game.get("time_class"),
+        "time_control": game.get("time_control"),
+        "rated": game.get("rated"),
+        "white": side(game.get("white", {})),
+        "black": side(game.get("black", {})),
+        "eco": game.get("eco"),
+    }
+    if include_pgn:
+        compact["pgn"] = game.get("pgn")
+    return compact
+
+
+def user_result(record: Dict[str, Any], username: str) -> str:
+    """
+    The result of a parsed game record from `username`'s side: "win", "loss", "draw" or
+    "other" (the user did not play, or the game has no result). Same rule as
+    pgnanalytics.summarize_user_stats.
+    """
+    is_white = (record.get("white") or "").lower() == username.lower()
+    is_black = (record.get("black") or "").lower() == username.lower()
+    result = record.get("result")
+    if result == "1/2-1/2" and (is_white or is_black):
+        return "draw"
+    if (is_white and result == "1-0") or (is_black and result == "0-1"):
+        return "win"
+    if (is_white and result == "0-1") or (is_black and result == "1-0"):
+        return "loss"
+    return "other"
+
+
+def summarize_game_records(records: List[Dict[str, Any]], username: str, top: int = 5) -> Dict[str, Any]:
+    """
+    Pre-aggregate parsed game records into a small summary, with results counted from
+    `username`'s side.
+    """
+    dates = sorted(r["date"] for r in records if r.get("date"))
+    results = Counter(user_result(r, username) for r in records)
+    return {
+        "total_games": len(records),
+        "first_date": dates[0] if dates else None,
+        "last_date": dates[-1] if dates else None,
+        "time_classes": dict(Counter(r.get("time_class") for r in records if r.get("time_class"))),
+        "wins": results["win"],
+        "losses": results["loss"],
+        "draws": results["draw"],
+        "win_rate": results["win"] / len(records) if records else 0.0,
+        "top_openings": dict(Counter(r.get("opening") for r in records if r.get("opening")).most_common(top)),
+        "average_num_moves": round(sum(r.get("num_moves", 0) for r in records) / len(records), 1) if records else 0.0,
+    }
+
+
+def fit_to_budget(items: List[Any], max_chars: int = DEFAULT_MAX_CHARS, key: str = "items") -> Dict[str, Any]:
+    """
+    Keep as many leading items as fit in `max_chars` of JSON, and say how many were left out.
+
+    Returns:
+        dict: {key: kept_items, "total": int, "returned": int, "omitted": int}, plus a "note"
+        when items were omitted, so truncation is never silent.
+    """
+    kept: List[Any] = []
+    used = 2
+    for item in items:
+        size = json_size(item) + 1
+        if used + size > max_chars:
+            break
+        kept.append(item)
+        used += size
+    result: Dict[str, Any] = {key: kept, "total": len(items), "returned": len(kept), "omitted": len(items) - len(kept)}
+    if result["omitted"]:
+        result["note"] = (f"{result['omitted']} of {len(items)} {key} omitted to stay within {max_chars} characters; "
+                          "use summary mode, fewer fields, a smaller window or a larger max_chars to see them.")
+    return result
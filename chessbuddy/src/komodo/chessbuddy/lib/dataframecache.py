@@ -0,0 +1,97 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+import pandas as pd
+
+Key = Tuple[Hashable, ...]
+
+
+def _object_size(value: Any) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(sys.getsizeof(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return size
+
+
+def frame_size_bytes(df: pd.DataFrame) -> int:
+    """
+    Approximate resident size of a DataFrame, including the contents of object columns.
+
+    memory_usage(deep=True) sizes each object but not what it holds, so a list-valued
+    column such as `moves` is undercounted several times over. Object columns are walked
+    here, one level deep, so the cache budget bounds what the frames actually keep alive.
+    """
+    size = int(df.memory_usage(index=True, deep=False).sum())
+    for column in df.columns[df.dtypes == object]:
+        size += sum(_object_size(value) for value in df[column])
+    return size
+
+
+class DataFrameCache:
+    """
+    Memory-bounded LRU cache of computed DataFrames, shared by every caller in the process.
+
+    Keys are tuples whose last element is a data version (e.g. the archive window version).
+    Storing a new version drops older versions of the same key, so stale frames do not
+    linger until eviction. Cached frames are shared: callers must not mutate them.
+
+    Args:
+        max_bytes: Upper bound on the summed size of cached frames (see frame_size_bytes).
+    """
+
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._frames: "OrderedDict[Key, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def get(self, key: Key) -> Optional[pd.DataFrame]:
+        with self._lock:
+            item = self._frames.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: Key, df: pd.DataFrame) -> None:
+        size = frame_size_bytes(df)
+        with self._lock:
+            for old_key in [k for k in self._frames if k[:-1] == key[:-1]]:
+                self._discard(old_key)
+            if size > self.max_bytes:
+                return
+            self._frames[key] = (df, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._discard(next(iter(self._frames)))
+
+    def get_or_compute(self, key: Key, compute: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        df = self.get(key)
+        if df is None:
+            df = compute()
+            self.put(key, df)
+        return df
+
+    def clear(self) -> None:
+        with self._lock:
+            self._frames.clear()
+            self._bytes = 0
+
+    def _discard(self, key: Key) -> None:
+        _, size = self._frames.pop(key)
+        self._bytes -= size
@@ -0,0 +1,133 @@
+import re
+import time
+from typing import Any, Callable, List, Optional, Set, Tuple
+
+GEMINI_MODEL_TTL_SECONDS = 3600
+# Tried in order when the model list cannot be read (gemini-2.5-flash is known to work)
+GEMINI_FALLBACK_MODELS = [
+    'gemini-2.5-flash',
+    'gemini-1.5-flash',
+    'gemini-1.5-pro',
+    'gemini-pro',
+    'gemini-1.5-flash-002',
+    'gemini-1.5-pro-002',
+]
+QUOTA_MARKERS = ("429", "quota", "resource_exhausted", "rate limit")
+
+
+def is_model_not_found(error_str: str) -> bool:
+    lowered = error_str.lower()
+    return "404" in error_str or "not found" in lowered or "not supported" in lowered
+
+
+def is_quota_error(error_str: str) -> bool:
+    lowered = error_str.lower()
+    return any(marker in lowered for marker in QUOTA_MARKERS)
+
+
+class GeminiAdviceError(Exception):
+    pass
+
+
+class GeminiModelRegistry:
+    """
+    Resolves a usable Gemini model once and reuses its client until the TTL expires.
+
+    A model that fails with not-found is skipped and the next candidate is used, without
+    probing candidates with test requests.
+
+    Args:
+        genai: The google.generativeai module (or a stand-in with list_models and GenerativeModel).
+        ttl_seconds: How long a resolved model list is reused.
+        clock: Time source, in seconds.
+    """
+
+    def __init__(self, genai: Any, ttl_seconds: float = GEMINI_MODEL_TTL_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.genai = genai
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._candidates: List[str] = []
+        self._excluded: Set[str] = set()
+        self._model_name: Optional[str] = None
+        self._model: Any = None
+        self._resolved_at: Optional[float] = None
+
+    def _list_models(self) -> List[str]:
+        names = []
+        try:
+            for model in self.genai.list_models():
+                if 'generateContent' in model.supported_generation_methods:
+                    # Extract just the model name (remove 'models/' prefix if present)
+                    model_name = model.name.split('/')[-1]
+                    # Skip preview/experimental models that might have issues
+                    if 'preview' not in model_name.lower() and 'exp' not in model_name.lower():
+                        names.append(model_name)
+        except Exception:
+            pass
+        return names or list(GEMINI_FALLBACK_MODELS)
+
+    def get_model(self) -> Tuple[Optional[str], Any]:
+        """
+        Return (model_name, GenerativeModel), or (None, None) if no model is available.
+        """
+        expired = self._resolved_at is None or self._clock() - self._resolved_at > self.ttl_seconds
+        if expired:
+            self._candidates = self._list_models()
+            self._excluded.clear()
+            self._model_name = self._model = None
+            self._resolved_at = self._clock()
+        if self._model is None:
+            self._model_name = next((name for name in self._candidates if name not in self._excluded), None)
+            self._model = self.genai.GenerativeModel(self._model_name) if self._model_name else None
+        return self._model_name, self._model
+
+    def mark_not_found(self, model_name: str) -> None:
+        """
+        Stop using a model that the API no longer serves; the next get_model picks another.
+        """
+        self._excluded.add(model_name)
+        if self._model_name == model_name:
+            self._model_name = self._model = None
+
+
+def generate_content(registry: GeminiModelRegistry, prompt: str, max_retries: int = 3,
+                     sleep: Callable[[float], None] = time.sleep) -> str:
+    """
+    Generate text for `prompt` with the registry's current model.
+
+    A not-found model is excluded and the next candidate is tried; a quota error is retried
+    on the same model after the delay the API suggests (at most 30 seconds).
+
+    Raises:
+        GeminiAdviceError: With a user-facing message, if no attempt succeeds.
+    """
+    model_name = None
+    for attempt in range(max_retries):
+        model_name, model = registry.get_model()
+        if model is None:
+            raise GeminiAdviceError("GEMINI ERROR: No available models found. Please check your API key permissions.")
+        try:
+            response = model.generate_content(prompt)
+            return response.text
+        except Exception as e:
+            error_str = str(e)
+            last_attempt = attempt == max_retries - 1
+
+            # Checked first: "not supported for generateContent" is not a quota problem.
+            if is_model_not_found(error_str):
+                registry.mark_not_found(model_name)
+                if not last_attempt:
+                    continue
+            elif is_quota_error(error_str):
+                if last_attempt:
+                    raise GeminiAdviceError(f"GEMINI QUOTA ERROR: You've exceeded your free tier quota. Please wait a few minutes or upgrade your API plan. Error: {error_str[:200]}")
+                # Extract retry delay if available
+                delay_match = re.search(r'retry.*?(\d+)', error_str, re.IGNORECASE)
+                delay = int(delay_match.group(1)) if delay_match else (attempt + 1) * 5
+                sleep(min(delay, 30))  # Cap at 30 seconds
+                continue
+
+            raise GeminiAdviceError(f"GEMINI ERROR: Failed with model {model_name}: {error_str[:200]}")
+
+    raise GeminiAdviceError(f"GEMINI ERROR: Failed after {max_retries} attempts with model {model_name}")
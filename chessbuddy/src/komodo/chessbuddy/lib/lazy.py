@@ -0,0 +1,42 @@
+import importlib
+from types import ModuleType
+from typing import Any, Optional
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    Lets entry points name heavy dependencies (pandas-backed analytics, the agent stack) at
+    module level while only paying their import cost when a request first needs them.
+    Attributes are looked up on the real module every time, so monkeypatching it works.
+
+    Args:
+        name: Absolute module name, e.g. "komodo.chessbuddy.lib.pgnanalytics".
+    """
+
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self) -> ModuleType:
+        module: Optional[ModuleType] = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self._name)
+            self.__dict__["_module"] = module
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return self.__dict__["_module"] is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    return LazyModule(name)
@@ -0,0 +1,212 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+import chess
+
+COLORS = ("white", "black")
+UCI_RE = re.compile(r"^[a-h][1-8][a-h][1-8][qrbn]?$")
+# Move numbers ("1.", "12...") and game results that may appear in a typed move sequence.
+NOISE_RE = re.compile(r"\d+\.+|1-0|0-1|1/2-1/2|\*")
+
+Outcome = str  # "win", "draw" or "loss", from the indexed player's point of view
+OUTCOME_FIELDS = {"win": "wins", "draw": "draws", "loss": "losses"}
+
+
+def outcome_from_result(result: str, color: str) -> Optional[Outcome]:
+    """
+    Convert a PGN result ("1-0", "0-1", "1/2-1/2") into the outcome for `color`.
+    """
+    if result == "1/2-1/2":
+        return "draw"
+    if result in ("1-0", "0-1"):
+        return "win" if (result == "1-0") == (color == "white") else "loss"
+    return None
+
+
+def parse_moves(moves: Union[str, Sequence[str]]) -> List[str]:
+    """
+    Parse a move sequence in SAN or UCI ("1.e4 c5 2.Nf3", "e2e4 c7c5") into UCI moves.
+
+    Raises:
+        ValueError: If a move is not legal in the position reached so far.
+    """
+    tokens = NOISE_RE.sub(" ", moves).split() if isinstance(moves, str) else list(moves)
+    board = chess.Board()
+    uci_moves = []
+    for token in tokens:
+        try:
+            move = chess.Move.from_uci(token) if UCI_RE.match(token) else board.parse_san(token)
+        except ValueError:
+            move = None
+        if move is None or move not in board.legal_moves:
+            raise ValueError(f"Illegal move {token!r} after {' '.join(uci_moves) or 'the start'}")
+        board.push(move)
+        uci_moves.append(move.uci())
+    return uci_moves
+
+
+class MoveNode:
+    __slots__ = ("children", "wins", "draws", "losses")
+
+    def __init__(self):
+        self.children: Dict[str, "MoveNode"] = {}
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+
+def _counts(nodes: Iterable[MoveNode]) -> Dict[str, Any]:
+    wins = draws = losses = 0
+    for node in nodes:
+        wins, draws, losses = wins + node.wins, draws + node.draws, losses + node.losses
+    games = wins + draws + losses
+    return {"games": games, "wins": wins, "draws": draws, "losses": losses,
+            "score": round((wins + draws / 2) / games, 3) if games else None}
+
+
+class MoveTree:
+    """
+    Prefix tree over one player's games, one root per colour the player had.
+
+    Every node holds the player's win/draw/loss counts for games that passed through that
+    move sequence, so any prefix query ("how do I score after 1.e4 c5 2.Nf3") is a walk of
+    a few dict lookups. Games are added incrementally and deduplicated by game id.
+
+    Args:
+        max_depth: Number of plies indexed per game; deeper moves are ignored.
+    """
+
+    def __init__(self, max_depth: int = 30):
+        self.max_depth = max_depth
+        self.roots = {color: MoveNode() for color in COLORS}
+        self.game_ids: set = set()
+        self._lock = threading.RLock()
+
+    def add_game(self, moves: Sequence[str], outcome: Outcome, color: str, game_id: Optional[str] = None) -> bool:
+        """
+        Index one game (UCI moves) played as `color`. Returns False if it was already indexed.
+        """
+        if outcome not in OUTCOME_FIELDS:
+            raise ValueError(f"Unknown outcome {outcome!r}")
+        field = OUTCOME_FIELDS[outcome]
+        with self._lock:
+            if game_id is not None:
+                if game_id in self.game_ids:
+                    return False
+                self.game_ids.add(game_id)
+            node = self.roots[color]
+            setattr(node, field, getattr(node, field) + 1)
+            for move in moves[:self.max_depth]:
+                node = node.children.setdefault(move, MoveNode())
+                setattr(node, field, getattr(node, field) + 1)
+            return True
+
+    def add_record(self, record: Dict[str, Any], username: str) -> bool:
+        """
+        Index a parsed game record (see pgnanalytics.parse_games) for `username`.
+        Returns False for games the user did not play, without a decisive result, or already indexed.
+        """
+        name = username.lower()
+        color = next((c for c in COLORS if (record.get(c) or "").lower() == name), None)
+        outcome = outcome_from_result(record.get("result", ""), color) if color else None
+        if outcome is None:
+            return False
+        return self.add_game(list(record.get("moves") or []), outcome, color, record.get("url"))
+
+    def query(self, moves: Union[str, Sequence[str]] = "", color: Optional[str] = None, top: int = 10) -> Dict[str, Any]:
+        """
+        Win/draw/loss counts after a move prefix, and for each move played next.
+
+        Args:
+            moves: Move prefix, SAN or UCI, as a string or list. Empty for the starting position.
+            color: "white" or "black" to restrict to games with that colour; both if None.
+            top: Number of continuations to return, most played first.
+
+        Raises:
+            ValueError: If the prefix is illegal or the colour unknown.
+        """
+        if color is not None and color not in COLORS:
+            raise ValueError(f"Unknown color {color!r}; expected white or black")
+        uci_moves = parse_moves(moves)
+        with self._lock:
+            nodes = [self.roots[c] for c in ([color] if color else COLORS)]
+            for move in uci_moves:
+                nodes = [node.children[move] for node in nodes if move in node.children]
+            children: Dict[str, List[MoveNode]] = {}
+            for node in nodes:
+                for move, child in node.children.items():
+                    children.setdefault(move, []).append(child)
+            next_counts = {move: _counts(group) for move, group in children.items()}
+            result = _counts(nodes)
+        board = chess.Board()
+        san_prefix = []
+        for move in uci_moves:
+            san_prefix.append(board.san(chess.Move.from_uci(move)))
+            board.push_uci(move)
+        ranked = sorted(next_counts.items(), key=lambda item: item[1]["games"], reverse=True)[:top]
+        result.update({
+            "moves": san_prefix,
+            "color": color or "any",
+            "next_moves": [{"move": board.san(chess.Move.from_uci(move)), "uci": move, **counts}
+                           for move, counts in ranked],
+        })
+        return result
+
+
+class MoveTreeIndex:
+    """
+    Per-user MoveTrees over a rolling window of games, kept up to date incrementally.
+
+    When the window version changes, only games not yet in the tree are added; the tree is
+    rebuilt from scratch only when an indexed game has left the window.
+
+    Args:
+        window_version: Returns a version string for (username, max_months) that changes
+            whenever the games in the window change.
+        load_games: Returns the parsed game records for (username, max_months).
+        max_users: Number of (username, max_months) trees kept, least recently used dropped.
+        max_depth: Plies indexed per game.
+    """
+
+    def __init__(
+        self,
+        window_version: Callable[[str, int], str],
+        load_games: Callable[[str, int], Iterable[Dict[str, Any]]],
+        max_users: int = 64,
+        max_depth: int = 30,
+    ):
+        self.window_version = window_version
+        self.load_games = load_games
+        self.max_users = max_users
+        self.max_depth = max_depth
+        self._trees: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, username: str, max_months: int = 3) -> MoveTree:
+        key = (username.lower(), max_months)
+        version = self.window_version(username, max_months)
+        with self._lock:
+            entry = self._trees.get(key)
+            if entry is not None:
+                self._trees.move_to_end(key)
+                if entry[0] == version:
+                    return entry[1]
+        records = list(self.load_games(username, max_months))
+        tree = entry[1] if entry is not None else None
+        window_ids = {record.get("url") for record in records}
+        if tree is None or not tree.game_ids <= window_ids:
+            tree = MoveTree(max_depth=self.max_depth)
+        for record in records:
+            tree.add_record(record, username)
+        with self._lock:
+            self._trees[key] = (version, tree)
+            self._trees.move_to_end(key)
+            while len(self._trees) > self.max_users:
+                self._trees.popitem(last=False)
+        return tree
@@ -1,68 +1,141 @@
-import logfire
 import pandas as pd
 import numpy as np
 import chess.pgn
 import io
-from typing import List, Dict, Any
-from chessdotcom import ChessDotComClient
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 
-client = ChessDotComClient(user_agent="thechessbuddy/0.1.0 (https://github.com/ryanoberoi/thechessbuddy)")
+from komodo.chessbuddy.config.env import Settings
+from komodo.chessbuddy.config.instrumentation import instrument
+from komodo.chessbuddy.config.metrics import metrics
+from komodo.chessbuddy.lib.archivecache import split_archive_url
+from komodo.chessbuddy.lib.chesscom import archive_cache
+from komodo.chessbuddy.lib.dataframecache import DataFrameCache
+from komodo.chessbuddy.lib.movetree import MoveTreeIndex
+from komodo.chessbuddy.lib.sharedcache import shared_cache
 
-@logfire.instrument
+# Fields of a parsed game record, as produced by parse_games.
+GAME_FIELDS = ("white", "black", "result", "eco", "opening", "date", "num_moves", "moves",
+               "end_time", "time_class", "url")
+
+# Parsed game DataFrames shared by the MCP tools and the FastAPI routes in this process.
+games_df_cache = DataFrameCache(max_bytes=Settings.CHESSBUDDY_DF_CACHE_MAX_BYTES)
+
+# Shared cache namespaces; keys carry the data version, so entries never go stale.
+PARSED_GAMES_NAMESPACE = "parsed-games"
+STATS_NAMESPACE = "stats"
+
+parse_duration = metrics.histogram("pgn.parse.duration", "Time to parse one batch of PGNs")
+games_parsed = metrics.counter("pgn.games_parsed", "PGN games parsed")
+metrics.add_collector(lambda: {
+    "games_df_cache.hits": games_df_cache.hits,
+    "games_df_cache.misses": games_df_cache.misses,
+    "games_df_cache.bytes": games_df_cache.size_bytes,
+})
+
+# The fetch_* wrappers are served from the archive cache on almost every call; a sample of spans is enough.
+CACHED_FETCH_SAMPLE_RATE = 0.1
+
+@instrument(sample_rate=CACHED_FETCH_SAMPLE_RATE)
 def fetch_archives(username: str) -> List[str]:
     """
-    Fetch the list of archive URLs for a given Chess.com username using chess.com package.
+    Fetch the list of archive URLs for a given Chess.com username (served from the archive cache).
+    """
+    return archive_cache.get_archive_urls(username)
+
+@instrument(sample_rate=CACHED_FETCH_SAMPLE_RATE)
+def fetch_month_games(username: str, year: int, month: int) -> List[Dict[str, Any]]:
+    """
+    Fetch the chess.com game dicts for a given user, year, and month (served from the archive cache).
     """
-    resp = client.get_player_game_archives(username)  # pyright: ignore [reportAttributeAccessIssue]
-    return resp.json.get("archives", [])
+    return archive_cache.get_month_games(username, str(year), str(month).zfill(2))
 
-@logfire.instrument
+@instrument(sample_rate=CACHED_FETCH_SAMPLE_RATE)
 def fetch_games_pgn(username: str, year: int, month: int) -> List[str]:
     """
-    Fetch all PGNs for a given user, year, and month using chess.com package.
+    Fetch all PGNs for a given user, year, and month (served from the archive cache).
     Returns a list of PGN strings.
     """
-    resp = client.get_player_games_by_month_pgn(username, year, month)  # pyright: ignore [reportAttributeAccessIssue]
-    if not hasattr(resp, "text") or not resp.text:
-        return []
-    pgn_text = resp.text
-    # Split PGN text into individual games
-    games = pgn_text.strip().split("\n\n\n")
-    return [g for g in games if g.strip()]
+    return [g["pgn"] for g in fetch_month_games(username, year, month) if g.get("pgn")]
 
-@logfire.instrument
+def _parse_pgn(pgn: str) -> Optional[Dict[str, Any]]:
+    game_io = io.StringIO(pgn)
+    game = chess.pgn.read_game(game_io)
+    if not game:
+        return None
+    headers = game.headers
+    moves = [move.uci() for move in game.mainline_moves()]
+    result = headers.get("Result", "")
+    eco = headers.get("ECO", "")
+    opening = headers.get("Opening", "")
+    white = headers.get("White", "")
+    black = headers.get("Black", "")
+    date = headers.get("Date", "")
+    return {
+        "white": white,
+        "black": black,
+        "result": result,
+        "eco": eco,
+        "opening": opening,
+        "date": date,
+        "num_moves": len(moves),
+        "moves": moves,
+    }
+
+def _record_parse(started: float, source: str, count: int) -> None:
+    # Throughput is pgn.games_parsed over the pgn.parse.duration sum.
+    parse_duration.record(time.perf_counter() - started, source=source)
+    games_parsed.add(count, source=source)
+
+@instrument
 def parse_pgns(pgn_list: List[str]) -> List[Dict[str, Any]]:
     """
     Parse a list of PGN strings into game data dictionaries.
     """
+    started = time.perf_counter()
     games_data = []
     for pgn in pgn_list:
-        game_io = io.StringIO(pgn)
-        game = chess.pgn.read_game(game_io)
-        if not game:
+        record = _parse_pgn(pgn)
+        if record:
+            games_data.append(record)
+    _record_parse(started, "pgns", len(games_data))
+    return games_data
+
+@instrument
+def parse_games(games: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Parse chess.com game dicts into game data dictionaries.
+    Like parse_pgns, plus the end_time, time_class and url of each game.
+    """
+    started = time.perf_counter()
+    games_data = []
+    for game in games:
+        record = _parse_pgn(game.get("pgn", ""))
+        if not record:
             continue
-        headers = game.headers
-        moves = [move.uci() for move in game.mainline_moves()]
-        result = headers.get("Result", "")
-        eco = headers.get("ECO", "")
-        opening = headers.get("Opening", "")
-        white = headers.get("White", "")
-        black = headers.get("Black", "")
-        date = headers.get("Date", "")
-        games_data.append({
-            "white": white,
-            "black": black,
-            "result": result,
-            "eco": eco,
-            "opening": opening,
-            "date": date,
-            "num_moves": len(moves),
-            "moves": moves,
-        })
+        record["end_time"] = game.get("end_time")
+        record["time_class"] = game.get("time_class")
+        record["url"] = game.get("url")
+        games_data.append(record)
+    _record_parse(started, "games", len(games_data))
     return games_data
 
 
-@logfire.instrument(record_return=True)
+def _parse_month_games(username: str, year: str, month: str) -> List[Dict[str, Any]]:
+    """
+    Parse a month of a user's games, reusing records parsed by any process sharing the cache.
+    """
+    games = fetch_month_games(username, int(year), int(month))
+    if shared_cache is None:
+        return parse_games(games)
+    end_time = max((g.get("end_time") or 0 for g in games), default=0)
+    slot = f"{username.lower()}/{year}{month}"
+    key = f"{slot}/{len(games)}.{end_time}"
+    return shared_cache.get_or_compute_json(PARSED_GAMES_NAMESPACE, key, lambda: parse_games(games), slot=slot)
+
+
+@instrument(record_return=True)
 def get_user_games_df(username: str, max_months: int = 3) -> pd.DataFrame:
     """
     Fetch and analyze recent games for a user, returning a DataFrame.
@@ -73,10 +146,8 @@ def get_user_games_df(username: str, max_months: int = 3) -> pd.DataFrame:
     recent_archives = archives[-max_months:]
     all_games = []
     for archive_url in recent_archives:
-        parts = archive_url.rstrip("/").split("/")
-        year, month = int(parts[-2]), int(parts[-1])
-        pgns = fetch_games_pgn(username, year, month)
-        all_games.extend(parse_pgns(pgns))
+        year, month = split_archive_url(archive_url)
+        all_games.extend(_parse_month_games(username, year, month))
     if not all_games:
         return pd.DataFrame()
     df = pd.DataFrame(all_games)
@@ -86,13 +157,81 @@ def get_user_games_df(username: str, max_months: int = 3) -> pd.DataFrame:
         df = df.sort_values("parsed_date", ascending=False).reset_index(drop=True)
     return df
 
-@logfire.instrument(record_return=True)
+
+@instrument
+def get_cached_user_games_df(username: str, max_months: int = 3) -> pd.DataFrame:
+    """
+    Like get_user_games_df, but served from the shared DataFrame cache while the user's
+    archives are unchanged. The returned DataFrame is shared and must not be mutated.
+    """
+    version, _ = archive_cache.window_version(username, max_months)
+    key = (username.lower(), max_months, version)
+    return games_df_cache.get_or_compute(key, lambda: get_user_games_df(username, max_months=max_months))
+
+
+# Per-user move-prefix trees, updated incrementally as new games arrive.
+move_tree_index = MoveTreeIndex(
+    window_version=lambda username, max_months: archive_cache.window_version(username, max_months)[0],
+    load_games=lambda username, max_months: get_cached_user_games_df(username, max_months).to_dict(orient="records"),
+)
+
+
+@instrument
+def get_user_move_stats(
+    username: str, moves: str = "", max_months: int = 3, color: Optional[str] = None, top: int = 10
+) -> Dict[str, Any]:
+    """
+    Win/draw/loss counts for a user after a move prefix (SAN or UCI, e.g. "1.e4 c5 2.Nf3"),
+    with the most played continuations. See MoveTree.query.
+    """
+    return move_tree_index.get(username, max_months).query(moves, color=color, top=top)
+
+
+def iter_user_games(username: str, max_months: int = 3) -> Iterator[Dict[str, Any]]:
+    """
+    Yield parsed games for a user one month at a time, newest month first.
+    Only one month of games is held in memory at once, so callers can stream large windows.
+    """
+    archives = fetch_archives(username)
+    for archive_url in reversed(archives[-max_months:]):
+        year, month = split_archive_url(archive_url)
+        games = parse_games(fetch_month_games(username, int(year), int(month)))
+        games.sort(key=lambda g: g["end_time"] or 0, reverse=True)
+        yield from games
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated field selection such as "white,black,result".
+
+    Raises:
+        ValueError: If a field is not a known game field.
+    """
+    if not fields:
+        return None
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in GAME_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown game fields: {', '.join(unknown)}. Valid fields: {', '.join(GAME_FIELDS)}")
+    return selected
+
+
+def select_fields(records: Iterable[Dict[str, Any]], fields: Optional[List[str]]) -> Iterator[Dict[str, Any]]:
+    """
+    Project each game record onto the selected fields (all fields if None).
+    """
+    for record in records:
+        yield record if fields is None else {f: record.get(f) for f in fields}
+
+@instrument(record_return=True)
 def summarize_user_stats(df: pd.DataFrame, username: str) -> Dict[str, Any]:
     """
     Given a DataFrame of games, return summary statistics for the user.
     """
     if df.empty:
         return {"total_games": 0}
+    # Work on a copy: the DataFrame may be shared through games_df_cache
+    df = df.copy()
     # Determine if user was white or black in each game
     df["is_white"] = df["white"].str.lower() == username.lower()
     df["is_black"] = df["black"].str.lower() == username.lower()
@@ -125,6 +264,66 @@ def summarize_user_stats(df: pd.DataFrame, username: str) -> Dict[str, Any]:
     }
     return stats
 
+
+@instrument
+def get_cached_user_stats(username: str, max_months: int = 3) -> Dict[str, Any]:
+    """
+    Summary stats for a user's recent games, reused across processes through the shared
+    cache while the user's archives are unchanged.
+    """
+    def compute():
+        df = get_cached_user_games_df(username, max_months=max_months)
+        return summarize_user_stats(df, username)
+
+    if shared_cache is None:
+        return compute()
+    version, _ = archive_cache.window_version(username, max_months)
+    slot = f"{username.lower()}/{max_months}"
+    key = f"{slot}/{version}"
+    return shared_cache.get_or_compute_json(STATS_NAMESPACE, key, compute, slot=slot)
+
+
+def _user_stats(username: str, max_months: int) -> Dict[str, Any]:
+    return get_cached_user_stats(username, max_months=max_months)
+
+
+def iter_batch_user_stats(usernames: List[str], max_months: int = 3, max_workers: int = 8) -> Iterator[Dict[str, Any]]:
+    """
+    Compute summary stats for many users concurrently, yielding each result as it finishes.
+    Requests to chess.com share the process-wide rate limiter, so this is safe for large clubs.
+
+    Yields:
+        dict: {"username": ..., "stats": {...}} or {"username": ..., "error": "..."}.
+    """
+    unique = list(dict.fromkeys(u.strip() for u in usernames if u.strip()))
+    if not unique:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique))) as pool:
+        futures = {pool.submit(_user_stats, username, max_months): username for username in unique}
+        for future in as_completed(futures):
+            username = futures[future]
+            try:
+                yield {"username": username, "stats": future.result()}
+            except Exception as e:
+                yield {"username": username, "error": str(e)}
+
+
+@instrument
+def get_batch_user_stats(usernames: List[str], max_months: int = 3) -> Dict[str, Any]:
+    """
+    Compute summary stats for many users concurrently.
+
+    Returns:
+        dict: {"stats": {username: stats}, "errors": {username: message}}.
+    """
+    stats, errors = {}, {}
+    for item in iter_batch_user_stats(usernames, max_months=max_months):
+        if "error" in item:
+            errors[item["username"]] = item["error"]
+        else:
+            stats[item["username"]] = item["stats"]
+    return {"stats": stats, "errors": errors}
+
 if __name__ == "__main__":
     username = "ryanoberoi"
     df = get_user_games_df(username)
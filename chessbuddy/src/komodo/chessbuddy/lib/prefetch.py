@@ -0,0 +1,173 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+import logfire
+
+from komodo.chessbuddy.config.env import Settings
+from komodo.chessbuddy.lib.archivecache import split_archive_url
+from komodo.chessbuddy.lib.chesscom import archive_cache
+from komodo.chessbuddy.lib.lazy import lazy_module
+
+# Only needed by warm_games_df; keeps track_user cheap to import for the routes and tools.
+pgnanalytics = lazy_module("komodo.chessbuddy.lib.pgnanalytics")
+
+Warmer = Callable[[str], None]
+
+
+class ActiveUserTracker:
+    """
+    Remembers which chess.com usernames were asked about recently.
+
+    Args:
+        max_users: Maximum number of usernames kept (least recently seen are dropped).
+        ttl_seconds: Usernames not seen for this long are no longer considered active.
+        clock: Time source, in seconds since the epoch.
+    """
+
+    def __init__(self, max_users: int = 200, ttl_seconds: float = 24 * 3600, clock: Callable[[], float] = time.time):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._users: "OrderedDict[str, float]" = OrderedDict()
+        self._last_activity = 0.0
+
+    def touch(self, username: str) -> None:
+        now = self._clock()
+        key = username.lower()
+        with self._lock:
+            self._users[key] = now
+            self._users.move_to_end(key)
+            self._last_activity = now
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def recent(self) -> List[str]:
+        """
+        Return active usernames, most recently seen first.
+        """
+        cutoff = self._clock() - self.ttl_seconds
+        with self._lock:
+            for key in [k for k, seen in self._users.items() if seen < cutoff]:
+                del self._users[key]
+            return list(reversed(self._users))
+
+    def idle_for(self) -> float:
+        """
+        Seconds since the last tracked request.
+        """
+        return self._clock() - self._last_activity
+
+
+def warm_archives(username: str, max_months: Optional[int] = None) -> None:
+    """
+    Refresh the archive list and the most recent months of games for a user.
+    """
+    max_months = max_months or Settings.CHESSBUDDY_PREFETCH_MAX_MONTHS
+    archive_urls = archive_cache.get_archive_urls(username, refresh=True)
+    for i, archive_url in enumerate(reversed(archive_urls[-max_months:])):
+        year, month = split_archive_url(archive_url)
+        # Only the newest month can have new games; older ones are served from cache.
+        archive_cache.get_month_games(username, year, month, refresh=i == 0)
+
+
+def warm_games_df(username: str, max_months: Optional[int] = None) -> None:
+    """
+    Pre-parse the analytics DataFrame for a user into the shared DataFrame cache.
+    """
+    pgnanalytics.get_cached_user_games_df(username, max_months=max_months or Settings.CHESSBUDDY_PREFETCH_MAX_MONTHS)
+
+
+class Prefetcher:
+    """
+    Background refresher that keeps caches warm for recently active users.
+
+    Each round runs every registered warmer for every active user, but only once
+    the server has been idle for `idle_seconds`, so it never competes with live requests.
+
+    Args:
+        tracker: Source of recently active usernames.
+        warmers: Callables run for each username, in order.
+        interval_seconds: Delay between rounds.
+        idle_seconds: Minimum time since the last request before a round starts.
+    """
+
+    def __init__(
+        self,
+        tracker: ActiveUserTracker,
+        warmers: Optional[List[Warmer]] = None,
+        interval_seconds: float = 600,
+        idle_seconds: float = 30,
+    ):
+        self.tracker = tracker
+        self.warmers: List[Warmer] = list(warmers or [])
+        self.interval_seconds = interval_seconds
+        self.idle_seconds = idle_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def add_warmer(self, warmer: Warmer) -> None:
+        if warmer not in self.warmers:
+            self.warmers.append(warmer)
+
+    def refresh_user(self, username: str) -> None:
+        for warmer in self.warmers:
+            try:
+                warmer(username)
+            except Exception:
+                logfire.exception("Prefetch warmer {warmer} failed for {username}",
+                                  warmer=getattr(warmer, "__name__", repr(warmer)), username=username)
+
+    @logfire.instrument("Prefetch round")
+    def refresh_once(self, usernames: Optional[List[str]] = None) -> int:
+        """
+        Warm caches for the given usernames (default: all active users).
+
+        Returns:
+            int: Number of users refreshed.
+        """
+        usernames = self.tracker.recent() if usernames is None else usernames
+        for username in usernames:
+            self.refresh_user(username)
+        return len(usernames)
+
+    async def run_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            while self.tracker.idle_for() < self.idle_seconds:
+                await asyncio.sleep(self.idle_seconds)
+            await asyncio.to_thread(self.refresh_once)
+
+    def ensure_started(self) -> Optional[asyncio.Task]:
+        """
+        Start the refresh loop on the running event loop, if not already running.
+        Does nothing when called outside an event loop.
+        """
+        if self._task is not None and not self._task.done():
+            return self._task
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        self._task = loop.create_task(self.run_forever())
+        return self._task
+
+
+active_users = ActiveUserTracker()
+prefetcher = Prefetcher(
+    active_users,
+    warmers=[warm_archives, warm_games_df],
+    interval_seconds=Settings.CHESSBUDDY_PREFETCH_INTERVAL_SECONDS,
+    idle_seconds=Settings.CHESSBUDDY_PREFETCH_IDLE_SECONDS,
+)
+
+
+def track_user(username: str) -> None:
+    """
+    Record a request for `username` and, if enabled, make sure the prefetcher is running.
+    """
+    active_users.touch(username)
+    if Settings.CHESSBUDDY_PREFETCH_ENABLED:
+        prefetcher.ensure_started()
@@ -0,0 +1,77 @@
+import threading
+import time
+from typing import Callable
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter for outbound API calls: at most `max_concurrent` calls in
+    flight, started at no more than `rate_per_second` (token bucket with burst `burst`).
+
+    Use as a context manager around each call:
+
+        with limiter:
+            client.get_player_profile(username)
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        rate_per_second: float = 8.0,
+        burst: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+        # Calls queued for a slot or token, and calls holding a slot.
+        self.waiting = 0
+        self.in_flight = 0
+
+    def acquire(self) -> None:
+        with self._lock:
+            self.waiting += 1
+        try:
+            self._semaphore.acquire()
+            try:
+                self._take_token()
+            except BaseException:
+                self._semaphore.release()
+                raise
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        with self._lock:
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._semaphore.release()
+
+    def _take_token(self) -> None:
+        if self.rate_per_second <= 0:
+            return
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_second)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate_per_second
+            self._sleep(wait)
+
+    def __enter__(self) -> "RateLimiter":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
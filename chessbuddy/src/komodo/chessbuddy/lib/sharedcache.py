@@ -0,0 +1,365 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import logfire
+
+from komodo.chessbuddy.config.env import Settings
+from komodo.chessbuddy.config.metrics import metrics
+
+BACKENDS = ("", "disk", "modal")
+# Unreferenced objects younger than this are kept: a concurrent put writes the object before its ref.
+ORPHAN_GRACE_SECONDS = 3600
+SWEEP_MARKER = ".last-sweep"
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class DirectoryCache:
+    """
+    Content-addressed cache of bytes values under a directory, shared by every process
+    that can see the directory.
+
+    Values are stored once under `objects/<ab>/<sha256 of value>`; a key is a small ref file
+    `refs/<namespace>/<cd>/<sha256 of key>` holding the object digest. Identical values
+    stored under different keys share one object, and every file is written to a temporary
+    name and renamed into place, so concurrent readers never see a partial value.
+
+    The tier is bounded in two ways. A put with a `slot` (the key without its data version,
+    e.g. "user/202506") replaces the slot's previous ref, so only the newest version of a
+    value stays reachable. And at most once per `sweep_interval_seconds`, across every
+    process sharing the directory, a background sweep deletes refs written more than
+    `max_age_seconds` ago and then every object no ref points to.
+
+    Errors are logged and treated as misses: the shared tier only ever saves work.
+
+    Args:
+        root: Cache directory; created if missing.
+        max_age_seconds: Refs older than this are removed by the sweep.
+        sweep_interval_seconds: Minimum time between sweeps.
+    """
+
+    def __init__(self, root: str, max_age_seconds: float = 30 * 86400, sweep_interval_seconds: float = 86400):
+        self.root = root
+        self.max_age_seconds = max_age_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.hits = 0
+        self.misses = 0
+        self._sweep_lock = threading.Lock()
+        self._last_sweep_check = float("-inf")
+
+    def _ref_path(self, namespace: str, key: str) -> str:
+        name = _digest(key.encode("utf-8"))
+        return os.path.join(self.root, "refs", namespace, name[:2], name)
+
+    def _slot_path(self, namespace: str, slot: str) -> str:
+        name = _digest(slot.encode("utf-8"))
+        return os.path.join(self.root, "slots", namespace, name[:2], name)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def _write(self, path: str, data: bytes) -> None:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _read(self, namespace: str, key: str) -> Optional[bytes]:
+        try:
+            with open(self._ref_path(namespace, key), "r", encoding="ascii") as f:
+                digest = f.read().strip()
+            with open(self._object_path(digest), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # A torn or foreign object is a miss, not a wrong answer.
+        return data if _digest(data) == digest else None
+
+    def get_bytes(self, namespace: str, key: str) -> Optional[bytes]:
+        try:
+            data = self._read(namespace, key)
+        except Exception:
+            logfire.exception("Shared cache read failed", namespace=namespace)
+            data = None
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def put_bytes(self, namespace: str, key: str, data: bytes, slot: Optional[str] = None) -> Optional[str]:
+        """
+        Store `data` under (namespace, key), replacing the ref previously stored in `slot`.
+        Returns the object digest, or None on failure.
+        """
+        digest = _digest(data)
+        try:
+            object_path = self._object_path(digest)
+            if not os.path.exists(object_path):
+                self._write(object_path, data)
+            ref_path = self._ref_path(namespace, key)
+            self._write(ref_path, digest.encode("ascii"))
+            if slot is not None:
+                self._replace_slot(namespace, slot, ref_path)
+        except Exception:
+            logfire.exception("Shared cache write failed", namespace=namespace)
+            return None
+        self._written()
+        self.maybe_sweep()
+        return digest
+
+    def _replace_slot(self, namespace: str, slot: str, ref_path: str) -> None:
+        slot_path = self._slot_path(namespace, slot)
+        try:
+            with open(slot_path, "r", encoding="utf-8") as f:
+                previous = f.read().strip()
+        except FileNotFoundError:
+            previous = None
+        if previous == ref_path:
+            return
+        self._write(slot_path, ref_path.encode("utf-8"))
+        if previous:
+            try:
+                os.unlink(previous)
+            except FileNotFoundError:
+                pass
+
+    def get_json(self, namespace: str, key: str) -> Any:
+        """
+        Return the JSON value stored under (namespace, key), or None on a miss.
+        """
+        data = self.get_bytes(namespace, key)
+        if data is None:
+            return None
+        try:
+            return json.loads(zlib.decompress(data))
+        except (zlib.error, ValueError):
+            logfire.warn("Shared cache entry is not valid JSON", namespace=namespace)
+            return None
+
+    def put_json(self, namespace: str, key: str, value: Any, slot: Optional[str] = None) -> Optional[str]:
+        data = zlib.compress(json.dumps(value, separators=(",", ":"), default=str).encode("utf-8"))
+        return self.put_bytes(namespace, key, data, slot)
+
+    def get_or_compute_json(self, namespace: str, key: str, compute: Callable[[], Any],
+                            slot: Optional[str] = None) -> Any:
+        value = self.get_json(namespace, key)
+        if value is None:
+            value = compute()
+            self.put_json(namespace, key, value, slot)
+        return value
+
+    def maybe_sweep(self, background: bool = True) -> bool:
+        """
+        Start a sweep if no process sharing the directory has run one within
+        `sweep_interval_seconds`. Returns True if a sweep was started.
+        """
+        with self._sweep_lock:
+            now = time.time()
+            if now - self._last_sweep_check < self.sweep_interval_seconds:
+                return False
+            self._last_sweep_check = now
+        marker = os.path.join(self.root, SWEEP_MARKER)
+        try:
+            if now - os.path.getmtime(marker) < self.sweep_interval_seconds:
+                return False
+        except FileNotFoundError:
+            pass
+        try:
+            self._write(marker, str(now).encode("ascii"))
+        except Exception:
+            logfire.exception("Could not write shared cache sweep marker")
+            return False
+        if background:
+            threading.Thread(target=self._sweep_logged, name="shared-cache-sweep", daemon=True).start()
+        else:
+            self._sweep_logged()
+        return True
+
+    def _sweep_logged(self) -> None:
+        try:
+            removed = self.sweep()
+        except Exception:
+            logfire.exception("Shared cache sweep failed")
+            return
+        logfire.info("Swept shared cache", **removed)
+
+    def sweep(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Delete refs and slots written more than `max_age_seconds` ago, then objects that no
+        remaining ref points to. Returns the number of refs and objects removed and the bytes freed.
+        """
+        now = time.time() if now is None else now
+        removed = {"refs": 0, "objects": 0, "bytes": 0}
+        referenced = set()
+        for kind in ("refs", "slots"):
+            for path in _files(os.path.join(self.root, kind)):
+                try:
+                    if now - os.path.getmtime(path) > self.max_age_seconds:
+                        os.unlink(path)
+                        removed["refs"] += kind == "refs"
+                    elif kind == "refs":
+                        with open(path, "r", encoding="ascii") as f:
+                            referenced.add(f.read().strip())
+                except FileNotFoundError:
+                    pass
+        for path in _files(os.path.join(self.root, "objects")):
+            if os.path.basename(path) in referenced:
+                continue
+            try:
+                stat = os.stat(path)
+                if now - stat.st_mtime > ORPHAN_GRACE_SECONDS:
+                    os.unlink(path)
+                    removed["objects"] += 1
+                    removed["bytes"] += stat.st_size
+            except FileNotFoundError:
+                pass
+        if removed["refs"] or removed["objects"]:
+            self._written()
+        return removed
+
+    def flush(self) -> None:
+        pass
+
+    def _written(self) -> None:
+        pass
+
+
+def _files(directory: str) -> Iterator[str]:
+    for parent, _, names in os.walk(directory):
+        for name in names:
+            if not name.startswith(".tmp-"):
+                yield os.path.join(parent, name)
+
+
+class ModalVolumeCache(DirectoryCache):
+    """
+    DirectoryCache over a Modal Volume mounted in the container, so every replica of a
+    deployment shares warm data.
+
+    Writes become visible to other containers once the volume is committed, and a container
+    only sees their writes after reloading it. Commits are batched to at most one per
+    `commit_interval_seconds` (the rest are flushed on the next write or by `flush`), and a
+    miss reloads the volume at most once per `reload_interval_seconds` before giving up.
+
+    Args:
+        volume: The modal.Volume mounted at `root`.
+        root: Cache directory inside the mount.
+        commit_interval_seconds: Minimum time between commits.
+        reload_interval_seconds: Minimum time between reloads on a miss.
+        clock: Monotonic time source, in seconds.
+        **kwargs: Retention settings passed to DirectoryCache.
+    """
+
+    def __init__(
+        self,
+        volume: Any,
+        root: str,
+        commit_interval_seconds: float = 5,
+        reload_interval_seconds: float = 30,
+        clock: Callable[[], float] = time.monotonic,
+        **kwargs: Any,
+    ):
+        super().__init__(root, **kwargs)
+        self.volume = volume
+        self.commit_interval_seconds = commit_interval_seconds
+        self.reload_interval_seconds = reload_interval_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_commit = float("-inf")
+        self._last_reload = clock()
+
+    def _read(self, namespace: str, key: str) -> Optional[bytes]:
+        data = super()._read(namespace, key)
+        if data is None and self._reload():
+            data = super()._read(namespace, key)
+        return data
+
+    def _reload(self) -> bool:
+        with self._lock:
+            now = self._clock()
+            if now - self._last_reload < self.reload_interval_seconds:
+                return False
+            self._last_reload = now
+        try:
+            self.volume.reload()
+        except Exception:
+            # Reload refuses while files on the volume are open; try again later.
+            logfire.exception("Could not reload shared cache volume")
+            return False
+        return True
+
+    def _written(self) -> None:
+        with self._lock:
+            self._dirty = True
+            if self._clock() - self._last_commit < self.commit_interval_seconds:
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Commit pending writes to the volume. The Modal server classes call it on container exit.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._last_commit = self._clock()
+        try:
+            self.volume.commit()
+        except Exception:
+            logfire.exception("Could not commit shared cache volume")
+            with self._lock:
+                self._dirty = True
+
+
+def build_shared_cache(backend: str, directory: str, max_age_days: float = 30) -> Optional[DirectoryCache]:
+    """
+    Build the shared cache tier for `backend`: "" for none, "disk" for a local directory,
+    or "modal" for the workspaces volume mounted at `directory`. Entries are kept for
+    `max_age_days` after they were written.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown shared cache backend {backend!r}; expected one of {BACKENDS}")
+    if not backend:
+        return None
+    directory = os.path.expanduser(directory)
+    max_age_seconds = max_age_days * 86400
+    if backend == "disk":
+        return DirectoryCache(directory, max_age_seconds=max_age_seconds)
+    from komodo.chessbuddy.services.config import get_workspaces_volume
+
+    return ModalVolumeCache(get_workspaces_volume(), directory, max_age_seconds=max_age_seconds)
+
+
+def flush_shared_cache() -> None:
+    """
+    Commit the shared tier's pending writes, if it is enabled; call before the process exits.
+    """
+    if shared_cache is not None:
+        shared_cache.flush()
+
+
+# Shared by the archive cache, parsed games and stats; None when the tier is disabled.
+shared_cache = build_shared_cache(Settings.CHESSBUDDY_SHARED_CACHE, Settings.CHESSBUDDY_SHARED_CACHE_DIR,
+                                  Settings.CHESSBUDDY_SHARED_CACHE_MAX_AGE_DAYS)
+if shared_cache is not None:
+    metrics.add_collector(lambda: {"shared_cache.hits": shared_cache.hits, "shared_cache.misses": shared_cache.misses})
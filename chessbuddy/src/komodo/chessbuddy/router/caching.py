@@ -0,0 +1,45 @@
+import hashlib
+from email.utils import formatdate
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+# A finished game's PGN never changes.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def make_etag(*parts: object) -> str:
+    """
+    Build a strong ETag from the given parts.
+    """
+    digest = hashlib.sha1(":".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def cache_headers(etag: str, cache_control: str, last_modified: Optional[int] = None) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    True if the request's If-None-Match header matches `etag`.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def conditional(request: Request, response: Response, headers: Dict[str, str]) -> Optional[Response]:
+    """
+    Return a 304 response if the client already has this version, otherwise attach
+    the validators to `response` and return None so the route builds the body.
+    """
+    if is_not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -1,17 +1,60 @@
-from fastapi import APIRouter, Body, Query
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from fastapi import APIRouter, Body, HTTPException, Query, Request, Response
 from fastapi.concurrency import run_in_threadpool
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
+from komodo.chessbuddy.config.env import Settings
+from komodo.chessbuddy.lib.lazy import lazy_module
 from komodo.chessbuddy.lib.welcome import welcome
 from komodo.chessbuddy.lib.chesscom import (
     get_profile,
     get_latest_games,
     download_pgn,
+    page_games,
+    parse_cursor,
+    archive_cache,
+)
+from komodo.chessbuddy.lib.prefetch import track_user
+from komodo.chessbuddy.router.caching import (
+    IMMUTABLE_CACHE_CONTROL,
+    cache_headers,
+    conditional,
+    make_etag,
 )
 
 router = APIRouter(prefix="/chessbuddy", tags=["chessbuddy"])
 
 
+def _revalidate_cache_control() -> str:
+    # Archive-backed responses may change when new games arrive; clients revalidate with If-None-Match.
+    return f"public, max-age={int(archive_cache.ttl_seconds)}"
+
+
+async def _window_conditional(
+    request: Request, response: Response, username: str, max_months: int, *extra: object
+) -> Optional[Response]:
+    version, last_modified = await run_in_threadpool(archive_cache.window_version, username, max_months)
+    etag = make_etag(request.url.path, max_months, *extra, version)
+    return conditional(request, response, cache_headers(etag, _revalidate_cache_control(), last_modified))
+
+
+def _check_cursors(*cursors: Optional[str]) -> None:
+    for cursor in cursors:
+        if cursor is not None:
+            try:
+                parse_cursor(cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _latest_conditional(request: Request, response: Response, username: str, *extra: object) -> Optional[Response]:
+    # Only the newest month can gain games, and a new month shows up as a new newest archive,
+    # so its version validates any listing of the user's games, however far back it reaches.
+    return await _window_conditional(request, response, username, 1, *extra)
+
+
 @router.post("/welcome", response_model=str, description="Respond with a special welcome message")
 async def welcome_api(name: str = Body(...)):
     return welcome(name)
@@ -19,35 +62,159 @@ async def welcome_api(name: str = Body(...)):
 
 @router.get("/chesscom/profile/{username}", description="Get chess.com profile for a user")
 async def chesscom_profile(username: str):
+    track_user(username)
     return await run_in_threadpool(get_profile, username)
 
 
 @router.get("/chesscom/latest-games/{username}", description="Get latest chess.com games for a user")
-async def chesscom_latest_games(username: str):
-    return await run_in_threadpool(get_latest_games, username)
+async def chesscom_latest_games(
+    request: Request,
+    response: Response,
+    username: str,
+    n: int = Query(10, ge=1, le=500, description="Number of games"),
+):
+    track_user(username)
+    not_modified = await _latest_conditional(request, response, username, n)
+    if not_modified:
+        return not_modified
+    return await run_in_threadpool(get_latest_games, username, n)
+
+
+@router.get("/chesscom/games/{username}", description="Page through a user's chess.com games, newest first")
+async def chesscom_games(
+    request: Request,
+    response: Response,
+    username: str,
+    limit: int = Query(20, ge=1, le=500, description="Maximum number of games per page"),
+    before: Optional[str] = Query(None, description="Only games before this cursor (cursors.before) or unix time"),
+    after: Optional[str] = Query(None, description="Only games after this cursor (cursors.after) or unix time"),
+    time_class: Optional[str] = Query(None, description="Only games of this time class, e.g. blitz"),
+):
+    track_user(username)
+    _check_cursors(before, after)
+    not_modified = await _latest_conditional(request, response, username, limit, before, after, time_class)
+    if not_modified:
+        return not_modified
+    return await run_in_threadpool(page_games, username, limit, before, after, time_class)
 
 
 @router.get("/chesscom/pgn", response_class=PlainTextResponse, description="Download PGN for a chess.com game")
 async def chesscom_pgn(
+    request: Request,
+    response: Response,
     username: str = Query(..., description="Chess.com username"),
     game_url: str = Query(..., description="Full chess.com game URL")
 ):
+    track_user(username)
+    etag = make_etag("pgn", username.lower(), game_url)
+    not_modified = conditional(request, response, cache_headers(etag, IMMUTABLE_CACHE_CONTROL))
+    if not_modified:
+        return not_modified
     return await run_in_threadpool(download_pgn, username, game_url)
 
 
 # --- PGN Analytics Endpoints ---
-from komodo.chessbuddy.lib.pgnanalytics import get_user_games_df, summarize_user_stats
+# pandas, numpy and python-chess load when an analytics endpoint first runs, not at import.
+pgnanalytics = lazy_module("komodo.chessbuddy.lib.pgnanalytics")
+movetree = lazy_module("komodo.chessbuddy.lib.movetree")
+
+
+def _ndjson_lines(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, default=str) + "\n"
+
+
+@router.get(
+    "/chesscom/analytics/games/{username}",
+    description="Get recent games for a user as DataFrame (JSON). "
+                "With `limit`, returns one page {games, has_more, cursors} keyed on (end_time, game id) instead.",
+)
+async def chesscom_analytics_games(
+    request: Request,
+    response: Response,
+    username: str,
+    max_months: int = 3,
+    stream: bool = Query(False, description="Stream games as NDJSON, one month at a time"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. white,black,result"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; enables cursor pagination"),
+    before: Optional[str] = Query(None, description="Only games before this cursor (cursors.before) or unix time"),
+    after: Optional[str] = Query(None, description="Only games after this cursor (cursors.after) or unix time"),
+    time_class: Optional[str] = Query(None, description="Only games of this time class, e.g. blitz"),
+):
+    track_user(username)
+    try:
+        selected = pgnanalytics.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if limit is not None:
+        if stream:
+            raise HTTPException(status_code=400, detail="stream cannot be combined with limit; page with cursors instead")
+        _check_cursors(before, after)
+        not_modified = await _latest_conditional(request, response, username, limit, before, after,
+                                                 time_class, selected)
+        if not_modified:
+            return not_modified
 
-@router.get("/chesscom/analytics/games/{username}", description="Get recent games for a user as DataFrame (JSON)")
-async def chesscom_analytics_games(username: str, max_months: int = 3):
+        def get_page():
+            page = page_games(username, limit, before, after, time_class)
+            page["games"] = list(pgnanalytics.select_fields(pgnanalytics.parse_games(page["games"]), selected))
+            return page
+        return await run_in_threadpool(get_page)
+    not_modified = await _window_conditional(request, response, username, max_months, stream, selected)
+    if not_modified:
+        return not_modified
+    if stream:
+        games = pgnanalytics.select_fields(pgnanalytics.iter_user_games(username, max_months=max_months), selected)
+        return StreamingResponse(_ndjson_lines(games), media_type="application/x-ndjson",
+                                 headers=dict(response.headers))
     def get_df_dict():
-        df = get_user_games_df(username, max_months=max_months)
-        return df.to_dict(orient="records")
+        df = pgnanalytics.get_cached_user_games_df(username, max_months=max_months)
+        return list(pgnanalytics.select_fields(df.to_dict(orient="records"), selected))
     return await run_in_threadpool(get_df_dict)
 
 @router.get("/chesscom/analytics/stats/{username}", description="Get summary stats for a user")
-async def chesscom_analytics_stats(username: str, max_months: int = 3):
-    def get_stats():
-        df = get_user_games_df(username, max_months=max_months)
-        return summarize_user_stats(df, username)
-    return await run_in_threadpool(get_stats)
+async def chesscom_analytics_stats(request: Request, response: Response, username: str, max_months: int = 3):
+    track_user(username)
+    not_modified = await _window_conditional(request, response, username, max_months)
+    if not_modified:
+        return not_modified
+    return await run_in_threadpool(pgnanalytics.get_cached_user_stats, username, max_months)
+
+
+@router.get("/chesscom/analytics/moves/{username}",
+            description="Get a user's win/draw/loss counts after a move prefix, and their next moves")
+async def chesscom_analytics_moves(
+    request: Request,
+    response: Response,
+    username: str,
+    moves: str = Query("", description='Move prefix in SAN or UCI, e.g. "1.e4 c5 2.Nf3"'),
+    max_months: int = 3,
+    color: Optional[str] = Query(None, pattern="^(white|black)$", description="Only games played with this colour"),
+    top: int = Query(10, ge=1, le=50, description="Number of continuations to return"),
+):
+    track_user(username)
+    try:
+        movetree.parse_moves(moves)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    not_modified = await _window_conditional(request, response, username, max_months, moves, color, top)
+    if not_modified:
+        return not_modified
+    return await run_in_threadpool(pgnanalytics.get_user_move_stats, username, moves, max_months, color, top)
+
+
+@router.post("/chesscom/analytics/stats", description="Get summary stats for many users at once")
+async def chesscom_analytics_stats_batch(
+    usernames: List[str] = Body(..., embed=True, description="Chess.com usernames"),
+    max_months: int = Body(3, embed=True),
+    stream: bool = Query(False, description="Stream one NDJSON line per user as each finishes"),
+):
+    if len(usernames) > Settings.CHESSBUDDY_BATCH_MAX_USERS:
+        raise HTTPException(status_code=400,
+                            detail=f"At most {Settings.CHESSBUDDY_BATCH_MAX_USERS} usernames per request")
+    for username in usernames:
+        track_user(username)
+    if stream:
+        return StreamingResponse(_ndjson_lines(pgnanalytics.iter_batch_user_stats(usernames, max_months=max_months)),
+                                 media_type="application/x-ndjson")
+    return await run_in_threadpool(pgnanalytics.get_batch_user_stats, usernames, max_months)
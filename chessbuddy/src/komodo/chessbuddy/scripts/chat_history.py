@@ -0,0 +1,96 @@
+from typing import Dict, List
+
+ROLE_LABELS = {"user": "User", "assistant": "Bot"}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (about four characters per token), good enough for budgeting.
+    """
+    return len(text) // 4 + 1
+
+
+def _first_line(text: str, max_chars: int) -> str:
+    line = next((line.strip("#*| ") for line in text.splitlines() if line.strip("#*| ")), "")
+    return line if len(line) <= max_chars else line[:max_chars].rstrip() + "..."
+
+
+def compact_reference(entry: Dict[str, str], max_chars: int = 120) -> str:
+    """
+    One summary line for an old turn. Answers (which carry the tool results) are reduced to
+    their first line and size, so the agent knows they exist without re-reading them.
+    """
+    content = entry["content"]
+    if entry["role"] == "assistant":
+        return f"- Bot answered: {_first_line(content, max_chars)} [{len(content)} chars, not repeated]"
+    return f"- User asked: {_first_line(content, max_chars)}"
+
+
+class ChatHistory:
+    """
+    Chat history that builds prompts within a token budget.
+
+    Recent turns are kept verbatim (long answers are clipped to `max_entry_chars`); once the
+    prompt would exceed `max_tokens`, the oldest turns are folded into a rolling summary of
+    compact references, itself capped at `summary_max_chars`. Prompt size, and so turn
+    latency, stays flat however long the conversation runs.
+
+    Args:
+        max_tokens: Token budget for the rendered prompt.
+        max_entry_chars: Longest verbatim answer kept from a previous turn.
+        summary_max_chars: Size of the rolling summary before its oldest lines are dropped.
+    """
+
+    def __init__(self, max_tokens: int = 1500, max_entry_chars: int = 800, summary_max_chars: int = 1200):
+        self.max_tokens = max_tokens
+        self.max_entry_chars = max_entry_chars
+        self.summary_max_chars = summary_max_chars
+        self.entries: List[Dict[str, str]] = []
+        self.summary: List[str] = []
+        self.dropped_turns = 0
+
+    def add(self, role: str, content: str) -> None:
+        self.entries.append({"role": role, "content": content})
+
+    def is_first_turn(self) -> bool:
+        """
+        True while the history holds only the current question, so an answer to it cannot
+        depend on earlier turns.
+        """
+        return len(self.entries) <= 1 and not self.summary and not self.dropped_turns
+
+    def _render_entry(self, entry: Dict[str, str], is_last: bool) -> str:
+        content = entry["content"]
+        if not is_last and entry["role"] == "assistant" and len(content) > self.max_entry_chars:
+            omitted = len(content) - self.max_entry_chars
+            content = content[:self.max_entry_chars].rstrip() + f" [... {omitted} more chars, not repeated]"
+        return f"{ROLE_LABELS.get(entry['role'], entry['role'])}: {content}"
+
+    def render(self) -> str:
+        lines = []
+        if self.summary or self.dropped_turns:
+            lines.append("Summary of earlier conversation:")
+            if self.dropped_turns:
+                lines.append(f"- ({self.dropped_turns} older turns omitted)")
+            lines += self.summary
+        last = len(self.entries) - 1
+        lines += [self._render_entry(entry, i == last) for i, entry in enumerate(self.entries)]
+        lines.append("Bot:")
+        return "\n".join(lines)
+
+    def _fold_oldest(self) -> None:
+        self.summary.append(compact_reference(self.entries.pop(0)))
+        while self.summary and sum(len(line) + 1 for line in self.summary) > self.summary_max_chars:
+            self.summary.pop(0)
+            self.dropped_turns += 1
+
+    def build_prompt(self) -> str:
+        """
+        Render the history as a prompt, folding old turns into the summary to fit the budget.
+        The latest entry (the current question) is always kept verbatim.
+        """
+        prompt = self.render()
+        while estimate_tokens(prompt) > self.max_tokens and len(self.entries) > 1:
+            self._fold_oldest()
+            prompt = self.render()
+        return prompt
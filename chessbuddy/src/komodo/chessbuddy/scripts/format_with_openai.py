@@ -1,37 +1,129 @@
-import openai
+import json
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterator, Optional
+
 import logfire
 from komodo.chessbuddy.config.env import Settings
+from komodo.chessbuddy.config.instrumentation import instrument
 
-openai.api_key = Settings.OPENAI_API_KEY
+if TYPE_CHECKING:
+    import openai
 
-@logfire.instrument(record_return=True)
-def format_with_openai(question, result, max_result_chars=10000):
-    if isinstance(result, str) and len(result) > max_result_chars:
-        truncated_result = result[:max_result_chars] + "\n\n[Result truncated due to length]"
-    else:
-        truncated_result = result
+from .local_format import format_locally
+
+FORMAT_MODEL = "gpt-4o"
+FORMAT_MODES = ("llm", "auto", "fused")
+
+SYSTEM_PROMPT = (
+    "You are a helpful assistant. "
+    "Format the following tool result into a detailed, complete, and user-friendly answer to the user's question. "
+    "List all available fields and their values from the tool result. "
+    "Do not summarize, omit, or refer the user elsewhere; include all raw details in your response. "
+    "Output will be displayed on streamlit, format images and tables with markdown. "
+)
+
+# Appended to the agent prompt in fused mode, so its final answer is already the user-facing text.
+FUSED_INSTRUCTIONS = (
+    "Pass final_answer a complete, user-friendly markdown string that answers the question, "
+    "listing all fields and values from the tool result, with tables in markdown. "
+)
+
+
+def get_format_mode(mode: Optional[str] = None) -> str:
+    mode = (mode or Settings.CHESSBUDDY_FORMAT_MODE).lower()
+    if mode not in FORMAT_MODES:
+        raise ValueError(f"Unknown format mode {mode!r}; expected one of {', '.join(FORMAT_MODES)}")
+    return mode
+
+
+@lru_cache(maxsize=1)
+def get_openai_client() -> "openai.OpenAI":
+    import openai
+
+    openai.api_key = Settings.OPENAI_API_KEY
     client = openai.OpenAI()
     logfire.instrument_openai(client)
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are a helpful assistant. "
-                    "Format the following tool result into a detailed, complete, and user-friendly answer to the user's question. "
-                    "List all available fields and their values from the tool result. "
-                    "Do not summarize, omit, or refer the user elsewhere; include all raw details in your response. "
-                    "Output will be displayed on streamlit, format images and tables with markdown. "
-                ),
-            },
-            {
-                "role": "user",
-                "content": f"Question: {question}\nResult: {truncated_result}\n\n"
-                           f"Format this result as a detailed, readable response for the user."
-            }
-        ],
+    return client
+
+
+def build_format_messages(question, result, max_result_chars=10000) -> list:
+    if not isinstance(result, str):
+        try:
+            result = json.dumps(result, separators=(",", ":"), default=str)
+        except (TypeError, ValueError):
+            result = str(result)
+    if len(result) > max_result_chars:
+        omitted = len(result) - max_result_chars
+        truncated_result = result[:max_result_chars] + f"\n\n[Result truncated: {omitted} more characters omitted]"
+    else:
+        truncated_result = result
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": f"Question: {question}\nResult: {truncated_result}\n\n"
+                       f"Format this result as a detailed, readable response for the user."
+        }
+    ]
+
+
+@instrument(record_return=True)
+def format_with_openai(question, result, max_result_chars=10000):
+    response = get_openai_client().chat.completions.create(
+        model=FORMAT_MODEL,
+        messages=build_format_messages(question, result, max_result_chars),
         max_tokens=2048,
         temperature=0.7,
     )
     return response.choices[0].message.content.strip()
+
+
+def stream_format_with_openai(question, result, max_result_chars=10000) -> Iterator[str]:
+    """
+    Same as format_with_openai, but yields the answer's text as it is generated.
+    """
+    stream = get_openai_client().chat.completions.create(
+        model=FORMAT_MODEL,
+        messages=build_format_messages(question, result, max_result_chars),
+        max_tokens=2048,
+        temperature=0.7,
+        stream=True,
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def local_answer(result, mode: Optional[str] = None) -> Optional[str]:
+    """
+    Return the answer without a second LLM call when the mode allows it, else None.
+    Structured results are rendered locally; in fused mode a text result is already the answer.
+    """
+    mode = get_format_mode(mode)
+    if mode == "llm":
+        return None
+    answer = format_locally(result)
+    if answer is None and mode == "fused" and isinstance(result, str):
+        return result
+    return answer
+
+
+def format_result(question, result, mode: Optional[str] = None, max_result_chars=10000) -> str:
+    """
+    Turn an agent result into the user-facing answer, skipping the LLM pass where possible.
+    """
+    answer = local_answer(result, mode)
+    if answer is not None:
+        return answer
+    return format_with_openai(question, result, max_result_chars)
+
+
+def stream_format_result(question, result, mode: Optional[str] = None, max_result_chars=10000) -> Iterator[str]:
+    """
+    Streaming variant of format_result; a locally produced answer is yielded in one piece.
+    """
+    answer = local_answer(result, mode)
+    if answer is not None:
+        yield answer
+        return
+    yield from stream_format_with_openai(question, result, max_result_chars)
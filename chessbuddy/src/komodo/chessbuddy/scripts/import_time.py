@@ -0,0 +1,83 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, Iterable, List
+
+# Modules each entry point should only import once it actually needs them.
+ENTRY_POINTS = {
+    "fastapi": "komodo.chessbuddy.servers.fastapi_server",
+    "routes": "komodo.chessbuddy.router.routes",
+    "mcp": "komodo.chessbuddy.servers.mcp_server",
+    "mcp_client": "komodo.chessbuddy.scripts.mcp_client",
+    "mcp_client_single": "komodo.chessbuddy.scripts.mcp_client_single",
+}
+HEAVY_MODULES = ("pandas", "numpy", "chess", "smolagents", "openai")
+
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module: str, repeat: int = 3, heavy: Iterable[str] = HEAVY_MODULES) -> Dict[str, Any]:
+    """
+    Import `module` in `repeat` fresh interpreters and report the median and best wall time,
+    plus which of the `heavy` modules the import pulled in.
+
+    Raises:
+        RuntimeError: If the module fails to import.
+    """
+    code = _CHILD.format(module=module, heavy=tuple(heavy))
+    samples: List[float] = []
+    loaded: List[str] = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{proc.stderr.strip()}")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        samples.append(result["seconds"])
+        loaded = result["heavy"]
+    return {
+        "module": module,
+        "median_seconds": round(statistics.median(samples), 4),
+        "best_seconds": round(min(samples), 4),
+        "heavy_modules": loaded,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold import time of each chessbuddy entry point.")
+    parser.add_argument("entry_points", nargs="*",
+                        help=f"Entry points to measure: {', '.join(ENTRY_POINTS)} (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per entry point")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+    unknown = [name for name in args.entry_points if name not in ENTRY_POINTS]
+    if unknown:
+        parser.error(f"unknown entry points: {', '.join(unknown)}")
+
+    results = {}
+    for name in args.entry_points or ENTRY_POINTS:
+        try:
+            results[name] = measure_import(ENTRY_POINTS[name], repeat=args.repeat)
+        except RuntimeError as e:
+            results[name] = {"module": ENTRY_POINTS[name], "error": str(e)}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:<18} failed: {result['error'].splitlines()[-1]}")
+            continue
+        heavy = ", ".join(result["heavy_modules"]) or "-"
+        print(f"{name:<18} {result['median_seconds'] * 1000:8.1f} ms (best {result['best_seconds'] * 1000:.1f} ms)"
+              f"  heavy: {heavy}")
+
+
+if __name__ == "__main__":
+    main()
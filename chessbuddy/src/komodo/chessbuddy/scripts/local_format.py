@@ -0,0 +1,83 @@
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+# Profile fields that chess.com returns as unix timestamps.
+TIMESTAMP_FIELDS = {"joined", "last_online", "end_time", "start_time"}
+STATS_KEYS = {"total_games", "wins", "losses", "draws"}
+
+
+def _cell(key: str, value: Any) -> str:
+    if key in TIMESTAMP_FIELDS and isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(value, timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+    elif isinstance(value, float):
+        value = f"{value:.2%}" if key.endswith("rate") else f"{value:.1f}"
+    elif isinstance(value, dict):
+        value = ", ".join(f"{k}: {v}" for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        value = " ".join(str(v) for v in value)
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+
+def _is_scalar_dict(d: Dict[str, Any]) -> bool:
+    return all(not isinstance(v, (dict, list)) for v in d.values())
+
+
+def field_table(d: Dict[str, Any]) -> str:
+    rows = [f"| {key.replace('_', ' ').capitalize()} | {_cell(key, value)} |" for key, value in d.items()]
+    return "\n".join(["| Field | Value |", "| --- | --- |", *rows])
+
+
+def records_table(records: List[Dict[str, Any]]) -> str:
+    columns = list(dict.fromkeys(key for record in records for key in record))
+    header = "| " + " | ".join(c.replace("_", " ").capitalize() for c in columns) + " |"
+    divider = "| " + " | ".join("---" for _ in columns) + " |"
+    rows = ["| " + " | ".join(_cell(c, r.get(c, "")) for c in columns) + " |" for r in records]
+    return "\n".join([header, divider, *rows])
+
+
+def format_stats(stats: Dict[str, Any], title: str = "Summary stats") -> str:
+    scalars = {k: v for k, v in stats.items() if not isinstance(v, dict)}
+    parts = [f"### {title}", field_table(scalars)]
+    for key, value in stats.items():
+        if isinstance(value, dict) and value:
+            parts += [f"**{key.replace('_', ' ').capitalize()}**",
+                      records_table([{"name": k, "count": v} for k, v in value.items()])]
+    return "\n\n".join(parts)
+
+
+def format_locally(result: Any) -> Optional[str]:
+    """
+    Render a structured tool result (profile, stats, batch stats, game lists, flat
+    records) as markdown without an LLM. Returns None when the result is not one of
+    these shapes, so the caller can fall back to the LLM formatter.
+    JSON text (as MCP tools return it) is parsed first.
+    """
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except ValueError:
+            return None
+    if isinstance(result, dict):
+        if "player_id" in result and "username" in result:
+            return f"### Profile: {result['username']}\n\n" + field_table(
+                {k: v for k, v in result.items() if not isinstance(v, (dict, list))})
+        if STATS_KEYS <= result.keys():
+            return format_stats(result)
+        if isinstance(result.get("stats"), dict) and "errors" in result:
+            parts = [format_stats(stats, title=f"Summary stats: {username}")
+                     for username, stats in result["stats"].items()]
+            parts += [f"**{username}:** {error}" for username, error in result["errors"].items()]
+            return "\n\n".join(parts)
+        if isinstance(result.get("games"), list) and all(isinstance(g, dict) for g in result["games"]):
+            games = result["games"]
+            text = records_table(games) if games else "No games found."
+            if result.get("note"):
+                text += f"\n\n_{result['note']}_"
+            return text
+        if result and _is_scalar_dict(result):
+            return field_table(result)
+        return None
+    if isinstance(result, list) and result and all(isinstance(r, dict) and _is_scalar_dict(r) for r in result):
+        return records_table(result)
+    return None
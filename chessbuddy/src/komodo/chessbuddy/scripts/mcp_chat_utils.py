@@ -1,8 +1,15 @@
+import re
+
 import logfire
 from dotenv import load_dotenv
-from smolagents import CodeAgent, OpenAIServerModel, ToolCollection
 from komodo.chessbuddy.config.env import Settings
-from .format_with_openai import format_with_openai
+from .format_with_openai import (
+    FUSED_INSTRUCTIONS,
+    format_result,
+    get_format_mode,
+    stream_format_result,
+)
+from .response_cache import ResponseCache, usernames_in_steps
 
 from contextlib import contextmanager
 
@@ -14,36 +21,109 @@ def tool_collection_context():
     mcp_server_url = Settings.CHESSBUDDY_MCP_SERVER_URL
     mcp_sse_url = mcp_server_url.rstrip("/") + "/sse"
     server_parameters = {"url": mcp_sse_url}
+    # smolagents is slow to import; CLI entry points only pay for it once they run an agent.
+    from smolagents import ToolCollection
+
     with ToolCollection.from_mcp(server_parameters, trust_remote_code=True) as tool_collection:
         yield tool_collection
 
 
 INSTRUCTIONS = (
     " Only use the mcp tools provided. and only use specific usernames. "
-    "Only call the mcp tool once and return the values. "
+    "Call each tool you need once, then return the values. "
     "Analyze the last 1 months of games by default when asking for a summary. "
+    "Prefer summary=True or a small fields selection on game tools; report any omitted games. "
+    "When a question needs several tool calls (e.g. two players, or profile and stats), "
+    "make them all in one parallel_tool_calls call. "
 )
 
+# Formatted answers to repeat questions, valid until the users involved have new games.
+response_cache = ResponseCache(ttl_seconds=Settings.CHESSBUDDY_RESPONSE_CACHE_TTL_SECONDS)
+
+def remember_answer(user_input: str, steps, answer) -> bool:
+    """
+    Cache a formatted answer under the question, keyed to the usernames its tools were called with.
+    """
+    return response_cache.put(user_input, usernames_in_steps(steps), answer)
+
 def get_agent_model(model_id: str = "gpt-4o"):
+    from smolagents import OpenAIServerModel
+
     model = OpenAIServerModel(model_id=model_id)
     logfire.instrument_openai(model.client)
     return model
 
-def build_prompt(user_input: str, instructions: str = INSTRUCTIONS) -> str:
-    return f"{user_input}{instructions}"
+def instructions_for(mode: str | None = None) -> str:
+    """
+    Agent instructions for the given format mode; fused mode asks for markdown in final_answer.
+    """
+    if get_format_mode(mode) == "fused":
+        return INSTRUCTIONS + FUSED_INSTRUCTIONS
+    return INSTRUCTIONS
+
+def build_prompt(user_input: str, instructions: str | None = None) -> str:
+    return f"{user_input}{instructions_for() if instructions is None else instructions}"
 
 def build_agent(
     tools,
     model,
     additional_authorized_imports=None,
 ):
-    return CodeAgent(
-        tools=tools,
+    from smolagents import CodeAgent
+
+    from .parallel_tools import ParallelToolCalls
+
+    parallel = ParallelToolCalls({})
+    agent = CodeAgent(
+        tools=[*tools, parallel],
         model=model,
         add_base_tools=True,
         additional_authorized_imports=additional_authorized_imports or [],
         max_steps=3
     )
+    # Dispatch through the agent's live tool dict, so reconnected tools are picked up.
+    parallel.tools_by_name = agent.tools
+    return agent
+
+def iter_agent_steps(agent, prompt: str, reset: bool = False):
+    """
+    Run the agent, yielding its step events (planning, action, final answer) as they complete.
+    """
+    yield from agent.run(prompt, reset=reset, stream=True)
+
+
+def final_answer_of(event):
+    """
+    Return the final answer carried by a step event, or None if it is not the final step.
+    """
+    if type(event).__name__ != "FinalAnswerStep":
+        return None
+    # Older smolagents releases name the field final_answer.
+    return getattr(event, "output", getattr(event, "final_answer", None))
+
+
+def describe_step(event) -> str | None:
+    """
+    One-line, human-readable description of an agent step event, or None for events
+    that are not worth showing.
+    """
+    kind = type(event).__name__
+    if kind == "PlanningStep":
+        return "Planning..."
+    if kind == "ActionStep":
+        # CodeAgent wraps everything in python_interpreter; name the MCP tools its code calls instead.
+        # Older smolagents releases lack some step fields (e.g. code_action), as in usernames_in_steps.
+        code = getattr(event, "code_action", None) or ""
+        called = re.findall(r"\b(chesscom_\w+|welcome_tool|parallel_tool_calls)\b", code)
+        tool_calls = getattr(event, "tool_calls", None) or []
+        tools = ", ".join(dict.fromkeys(called)) or ", ".join(call.name for call in tool_calls)
+        text = f"Step {event.step_number}" + (f": {tools}" if tools else "")
+        error = getattr(event, "error", None)
+        if error is not None:
+            text += f" (error: {str(error)[:120]})"
+        return text
+    return None
+
 
 def run_agent_and_format(
     user_input,
@@ -51,16 +131,20 @@ def run_agent_and_format(
     model_id: str = "gpt-4o",
     reset=False,
     additional_authorized_imports=None,
+    cache_key: str | None = None,
 ):
     model = get_agent_model(model_id=model_id)
-    prompt = build_prompt(user_input, INSTRUCTIONS)
+    prompt = build_prompt(user_input)
     agent = build_agent(
         tools=tools,
         model=model,
         additional_authorized_imports=additional_authorized_imports,
     )
+    steps_before = 0 if reset else len(agent.memory.steps)
     result = agent.run(prompt, reset=reset)
-    formatted = format_with_openai(user_input, result)
+    formatted = format_result(user_input, result)
+    if cache_key is not None:
+        remember_answer(cache_key, agent.memory.steps[steps_before:], formatted)
     return formatted
 
 
@@ -69,10 +153,36 @@ def run_mcp_chat_generic(
     model_id: str = "gpt-4o",
     reset: bool = False,
     additional_authorized_imports=None,
+    session_id: str | None = None,
+    cache_key: str | None = None,
 ) -> str:
     """
     Generic MCP chat runner for both single and multi-agent chat.
-    """ 
+    With a session_id, the MCP connection, model and agent are kept warm across turns.
+
+    `user_input` is the full prompt handed to the agent (for a conversation, the rendered
+    history). `cache_key` is the standalone question the answer is cached under: repeat
+    questions are answered from the response cache while the data is unchanged. Pass None
+    (the default) when the answer depends on earlier turns, to bypass the cache.
+    """
+    if cache_key is not None:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    if session_id is not None:
+        from .mcp_sessions import session_manager
+
+        session = session_manager.get(
+            session_id,
+            model_id=model_id,
+            additional_authorized_imports=additional_authorized_imports,
+        )
+        steps_before = 0 if reset or session.agent is None else len(session.agent.memory.steps)
+        result = session.run(build_prompt(user_input), reset=reset)
+        formatted = format_result(user_input, result)
+        if cache_key is not None:
+            remember_answer(cache_key, session.agent.memory.steps[steps_before:], formatted)
+        return formatted
     with tool_collection_context() as tool_collection:
         return run_agent_and_format(
             user_input=user_input,
@@ -80,4 +190,5 @@ def run_mcp_chat_generic(
             model_id=model_id,
             reset=reset,
             additional_authorized_imports=additional_authorized_imports,
+            cache_key=cache_key,
         )
@@ -1,19 +1,8 @@
 import sys
 
-import openai
-
-from komodo.chessbuddy.config.env import Settings
 from komodo.chessbuddy.config.logging import init_logfire
 from komodo.chessbuddy.scripts.mcp_chat_utils import run_mcp_chat_generic
 
-init_logfire("mcp_client_single")
-openai.api_key = Settings.OPENAI_API_KEY
-
-INSTRUCTIONS = (
-    " Only use the mcp tools provided. and only use specific usernames. "
-    "Only call the mcp tool once and return the values. "
-)
-
 def run_mcp_chat(user_input: str) -> str:
     if not user_input:
         return "No input provided."
@@ -22,10 +11,12 @@ def run_mcp_chat(user_input: str) -> str:
         user_input=user_input,
         reset=True,
         additional_authorized_imports=[],
+        cache_key=user_input,
     )
 
 def main():
     # CLI entry point
+    init_logfire("mcp_client_single")
     if len(sys.argv) > 1:
         user_input = " ".join(sys.argv[1:]).strip()
     else:
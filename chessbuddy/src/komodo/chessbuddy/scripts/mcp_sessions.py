@@ -0,0 +1,234 @@
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ExitStack
+from typing import Callable, Iterator, List, Optional
+
+import logfire
+
+from komodo.chessbuddy.config.env import Settings
+
+from .mcp_chat_utils import build_agent, get_agent_model, iter_agent_steps, tool_collection_context
+
+# Substrings of errors that mean the MCP transport is gone rather than a tool failing.
+CONNECTION_ERROR_MARKERS = (
+    "ClosedResourceError",
+    "BrokenResourceError",
+    "EndOfStream",
+    "ConnectError",
+    "RemoteProtocolError",
+    "Connection refused",
+    "Connection reset",
+    "connection closed",
+)
+
+
+def is_connection_error(error: object) -> bool:
+    text = f"{type(error).__name__}: {error}"
+    return any(marker.lower() in text.lower() for marker in CONNECTION_ERROR_MARKERS)
+
+
+class ChatSession:
+    """
+    A warm MCP tool connection, model and agent for one conversation.
+
+    The SSE connection, tool list, model client and agent are created once and reused
+    on every turn. If the connection drops, the session reconnects and retries the
+    turn once, keeping the agent (and its memory) and swapping in the fresh tools.
+    """
+
+    def __init__(self, model_id: str = "gpt-4o", additional_authorized_imports: Optional[List[str]] = None):
+        self.model_id = model_id
+        self.additional_authorized_imports = additional_authorized_imports
+        self.agent = None
+        self.model = None
+        self._stack: Optional[ExitStack] = None
+        self._lock = threading.RLock()
+
+    @property
+    def connected(self) -> bool:
+        return self._stack is not None
+
+    @logfire.instrument("Connect MCP chat session")
+    def connect(self) -> None:
+        with self._lock:
+            self.close()
+            stack = ExitStack()
+            tool_collection = stack.enter_context(tool_collection_context())
+            tools = [*tool_collection.tools]
+            if self.model is None:
+                self.model = get_agent_model(model_id=self.model_id)
+            if self.agent is None:
+                self.agent = build_agent(
+                    tools=tools,
+                    model=self.model,
+                    additional_authorized_imports=self.additional_authorized_imports,
+                )
+            else:
+                # Keep the agent's memory; only the tool proxies are bound to the old connection.
+                self.agent.tools.update({tool.name: tool for tool in tools})
+            self._stack = stack
+
+    def close(self) -> None:
+        with self._lock:
+            if self._stack is not None:
+                stack, self._stack = self._stack, None
+                try:
+                    stack.close()
+                except Exception:
+                    logfire.exception("Error closing MCP chat session")
+
+    def run(self, prompt: str, reset: bool = False):
+        """
+        Run one agent turn, reconnecting and retrying once if the MCP connection has failed.
+        """
+        with self._lock:
+            if not self.connected:
+                self.connect()
+            try:
+                result, transport_failed = self._run_once(prompt, reset)
+            except Exception as e:
+                if not is_connection_error(e):
+                    raise
+                transport_failed = True
+            if transport_failed:
+                logfire.warn("MCP connection lost, reconnecting")
+                self.connect()
+                result, _ = self._run_once(prompt, reset)
+            return result
+
+    def iter_steps(self, prompt: str, reset: bool = False) -> Iterator:
+        """
+        Run one agent turn, yielding step events as they complete (see iter_agent_steps).
+        Streaming turns are not retried; a dropped connection is re-established on the next turn.
+        """
+        with self._lock:
+            if not self.connected:
+                self.connect()
+            try:
+                yield from iter_agent_steps(self.agent, prompt, reset=reset)
+            except Exception as e:
+                if is_connection_error(e):
+                    self.close()
+                raise
+
+    def _run_once(self, prompt: str, reset: bool):
+        steps_before = 0 if reset else len(self.agent.memory.steps)
+        result = self.agent.run(prompt, reset=reset)
+        errors = [getattr(step, "error", None) for step in self.agent.memory.steps[steps_before:]]
+        return result, any(error is not None and is_connection_error(error) for error in errors)
+
+
+class McpSessionManager:
+    """
+    Keeps one ChatSession per conversation id, shared across turns, within bounds.
+
+    Sessions unused for `idle_seconds` are closed, and when more than `max_sessions` are
+    open the least recently used one is closed, so a long-running process serving many
+    conversations holds a bounded number of MCP connections and agents. Idle sessions are
+    swept by a daemon thread, started on the first get(), so they are closed even when no
+    further conversation comes in.
+
+    Args:
+        session_factory: Creates a ChatSession from the keyword arguments passed to get().
+        max_sessions: Maximum number of open sessions.
+        idle_seconds: Sessions unused for this long are closed by the sweeper, the next get()
+            or close_idle().
+        sweep_interval_seconds: Time between sweeps (default idle_seconds / 2).
+        clock: Time source, in seconds.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[..., ChatSession] = ChatSession,
+        max_sessions: int = 50,
+        idle_seconds: float = 1800,
+        sweep_interval_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._session_factory = session_factory
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds or idle_seconds / 2
+        self._clock = clock
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._last_used: dict = {}
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_sweeping = threading.Event()
+
+    def _start_sweeper(self) -> None:
+        # Called with the lock held.
+        if self._sweeper is None or not self._sweeper.is_alive():
+            self._stop_sweeping.clear()
+            self._sweeper = threading.Thread(target=self._sweep, name="mcp-session-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def _sweep(self) -> None:
+        while not self._stop_sweeping.wait(self.sweep_interval_seconds):
+            try:
+                self.close_idle()
+            except Exception:
+                logfire.exception("Error sweeping idle MCP chat sessions")
+
+    def _pop_expired(self) -> List[ChatSession]:
+        cutoff = self._clock() - self.idle_seconds
+        expired = [session_id for session_id, used in self._last_used.items() if used < cutoff]
+        while len(self._sessions) - len(expired) > self.max_sessions:
+            expired.append(next(session_id for session_id in self._sessions if session_id not in expired))
+        for session_id in expired:
+            del self._last_used[session_id]
+        return [self._sessions.pop(session_id) for session_id in expired]
+
+    def get(self, session_id: str, **kwargs) -> ChatSession:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = self._session_factory(**kwargs)
+            self._sessions.move_to_end(session_id)
+            self._last_used[session_id] = self._clock()
+            evicted = self._pop_expired()
+            self._start_sweeper()
+        for old in evicted:
+            old.close()
+        return session
+
+    def close_idle(self) -> int:
+        """
+        Close sessions that have been idle too long. Returns the number closed.
+        """
+        with self._lock:
+            evicted = self._pop_expired()
+        for session in evicted:
+            session.close()
+        return len(evicted)
+
+    def close(self, session_id: str) -> None:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            self._last_used.pop(session_id, None)
+        if session is not None:
+            session.close()
+
+    def close_all(self) -> None:
+        """
+        Close every session and stop the sweeper (it restarts on the next get()).
+        """
+        self._stop_sweeping.set()
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._last_used.clear()
+        for session in sessions:
+            session.close()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+session_manager = McpSessionManager(
+    max_sessions=Settings.CHESSBUDDY_CHAT_MAX_SESSIONS,
+    idle_seconds=Settings.CHESSBUDDY_CHAT_SESSION_IDLE_SECONDS,
+)
+atexit.register(session_manager.close_all)
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Mapping
+
+from smolagents import Tool
+
+# Tools that must not be fanned out: the dispatcher itself and the agent's terminal step.
+NOT_DISPATCHABLE = {"parallel_tool_calls", "final_answer"}
+
+
+class ParallelToolCalls(Tool):
+    """
+    Runs several independent tool calls concurrently over the shared MCP connection.
+
+    CodeAgent executes the tool calls in its code one after another; this tool lets the
+    agent hand over all calls of a step at once, so a multi-player or profile-plus-stats
+    question takes as long as its slowest call instead of the sum of all of them.
+
+    Args:
+        tools: Tools that may be called, by name. Pass the agent's live tool dict so tools
+            swapped in after a reconnect are used.
+        max_workers: Maximum number of calls in flight.
+    """
+
+    name = "parallel_tool_calls"
+    description = (
+        "Run several independent tool calls at the same time and return their results in order. "
+        "Use it whenever a question needs more than one tool call, e.g. two players, or a profile and stats. "
+        "Each call is a dict like {'tool': 'chesscom_profile', 'arguments': {'username': 'hikaru'}}. "
+        "A failed call returns {'error': '...'} in its place."
+    )
+    inputs = {
+        "calls": {
+            "type": "array",
+            "description": "List of {'tool': <tool name>, 'arguments': {<argument>: <value>}} dicts.",
+        }
+    }
+    output_type = "array"
+
+    def __init__(self, tools: Mapping[str, Any], max_workers: int = 8):
+        super().__init__()
+        self.tools_by_name = tools
+        self.max_workers = max_workers
+
+    def _call_one(self, call: Dict[str, Any]) -> Any:
+        try:
+            name = call["tool"]
+            if name in NOT_DISPATCHABLE or name not in self.tools_by_name:
+                raise ValueError(f"Unknown tool {name!r}")
+            return self.tools_by_name[name](**(call.get("arguments") or {}))
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+
+    def forward(self, calls: List[Dict[str, Any]]) -> List[Any]:
+        if not calls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(calls))) as pool:
+            return list(pool.map(self._call_one, calls))
@@ -0,0 +1,135 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import logfire
+
+# Politeness and request phrasing that does not change what is being asked.
+FILLER_RE = re.compile(r"\b(please|pls|thanks|thank you|can you|could you|would you|tell me|show me|give me)\b")
+# Usernames passed to the chess.com tools in the agent's code, positional or keyword.
+TOOL_USERNAME_RE = re.compile(r"\bchesscom_\w+\(\s*(?:username\s*=\s*)?[\"']([\w-]+)[\"']")
+TOOL_USERNAMES_RE = re.compile(r"\busernames[\"']?\s*[=:]\s*\[([^\]]*)\]")
+# Usernames in parallel_tool_calls argument dicts.
+ARGUMENT_USERNAME_RE = re.compile(r"[\"']username[\"']\s*:\s*[\"']([\w-]+)[\"']")
+QUOTED_RE = re.compile(r"[\"']([\w-]+)[\"']")
+
+
+def normalize_question(question: str) -> str:
+    """
+    Lowercase, drop filler phrases and punctuation, and collapse whitespace, so trivially
+    different phrasings of the same question share a cache key.
+    """
+    text = FILLER_RE.sub(" ", question.lower())
+    text = re.sub(r"[^\w\s-]", " ", text)
+    return " ".join(text.split())
+
+
+def usernames_in_code(code: str) -> List[str]:
+    found = TOOL_USERNAME_RE.findall(code) + ARGUMENT_USERNAME_RE.findall(code)
+    for group in TOOL_USERNAMES_RE.findall(code):
+        found += QUOTED_RE.findall(group)
+    return list(dict.fromkeys(name.lower() for name in found))
+
+
+def usernames_in_steps(steps: Iterable) -> List[str]:
+    """
+    Usernames the agent passed to chess.com tools in the given memory steps or step events.
+    """
+    found: List[str] = []
+    for step in steps:
+        found += usernames_in_code(getattr(step, "code_action", None) or "")
+    return list(dict.fromkeys(found))
+
+
+def _latest_archive_version(username: str) -> str:
+    from komodo.chessbuddy.lib.chesscom import archive_cache
+
+    # Only the newest month can gain games, and a new month shows up as a new newest archive.
+    return archive_cache.window_version(username, 1)[0]
+
+
+class ResponseCache:
+    """
+    Caches formatted chat answers by normalized question, validated against the data
+    version of every username the answer was built from.
+
+    An answer is only cached when all the usernames its tools were called with appear in
+    the question itself, so the question alone determines whose data it is about. A hit
+    re-checks each username's archive version (cheap while the archive cache is warm) and
+    drops the entry when new games have arrived.
+
+    Args:
+        version_of: Returns the current data version for a username.
+        max_entries: Maximum number of answers kept (least recently used are dropped).
+        ttl_seconds: Answers older than this are recomputed regardless of version.
+        clock: Time source, in seconds since the epoch.
+    """
+
+    def __init__(
+        self,
+        version_of: Callable[[str], str] = _latest_archive_version,
+        max_entries: int = 256,
+        ttl_seconds: float = 3600,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.version_of = version_of
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Dict[str, str], str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _versions(self, usernames: Iterable[str]) -> Optional[Dict[str, str]]:
+        try:
+            return {username: self.version_of(username) for username in usernames}
+        except Exception:
+            logfire.exception("Could not read data version for chat response cache")
+            return None
+
+    def get(self, question: str) -> Optional[str]:
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            versions, answer, stored_at = entry
+            if self._clock() - stored_at <= self.ttl_seconds and self._versions(versions) == versions:
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                    self.hits += 1
+                return answer
+            with self._lock:
+                self._entries.pop(key, None)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, question: str, usernames: Iterable[str], answer: str) -> bool:
+        """
+        Store an answer built from `usernames`' data. Returns False if it is not cacheable.
+        """
+        key = normalize_question(question)
+        usernames = [username.lower() for username in usernames]
+        tokens = set(key.split())
+        if not usernames or not answer or not all(username in tokens for username in usernames):
+            return False
+        versions = self._versions(usernames)
+        if versions is None:
+            return False
+        with self._lock:
+            self._entries[key] = (versions, answer, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,7 +1,9 @@
 import logfire
-from fastapi import FastAPI
+from fastapi import FastAPI, Query
+from fastapi.responses import PlainTextResponse
 
 from komodo.chessbuddy.config.logging import init_logfire
+from komodo.chessbuddy.config.metrics import metrics
 from komodo.chessbuddy.router.routes import router
 
 init_logfire("fastapi_chessbuddy")
@@ -15,6 +17,13 @@ app = FastAPI(
 logfire.instrument_fastapi(app)
 app.include_router(router)
 
+
+@app.get("/metrics", description="Process metrics: fetch, parse and tool latencies, cache hit counts, queue depth")
+def metrics_endpoint(format: str = Query("prometheus", pattern="^(prometheus|json)$")):
+    if format == "json":
+        return metrics.snapshot()
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 chess_buddy_app = app
 
 if __name__ == "__main__":
@@ -1,12 +1,12 @@
 from datetime import datetime
+from functools import lru_cache
 
 import logfire
+from mcp.server.fastmcp import FastMCP
 
+from komodo.chessbuddy.config.env import Settings
 from komodo.chessbuddy.config.logging import init_logfire
-
-init_logfire("mcp_server_chessbuddy")
-
-from mcp.server.fastmcp import FastMCP
+from komodo.chessbuddy.config.metrics import metrics
 
 from komodo.chessbuddy.lib.welcome import welcome
 from komodo.chessbuddy.lib.chesscom import (
@@ -14,16 +14,33 @@ from komodo.chessbuddy.lib.chesscom import (
     get_latest_games as chesscom_get_latest_games,
     download_pgn as chesscom_download_pgn,
 )
-from komodo.chessbuddy.lib.pgnanalytics import (
-    get_user_games_df,
-    summarize_user_stats,
+from komodo.chessbuddy.lib.compact import (
+    DEFAULT_MAX_CHARS,
+    compact_chesscom_game,
+    compact_game_record,
+    fit_to_budget,
+    summarize_game_records,
 )
+from komodo.chessbuddy.lib.lazy import lazy_module
+from komodo.chessbuddy.lib.prefetch import track_user
+
+# pandas, numpy and python-chess load when an analytics tool first runs, not at import.
+pgnanalytics = lazy_module("komodo.chessbuddy.lib.pgnanalytics")
 
 # This is the shared MCP server instance
 mcp = FastMCP(name="Chess Buddy MCP Server")
-logfire.instrument_starlette(mcp.sse_app())
+tool_duration = metrics.histogram("mcp.tool.duration", "MCP tool call latency, by tool and status")
+
 
-@mcp.tool()
+def tool():
+    """
+    mcp.tool() that also records each call's duration and outcome in mcp.tool.duration.
+    """
+    def decorate(fn):
+        return mcp.tool()(tool_duration.timed(tool=fn.__name__)(fn))
+    return decorate
+
+@tool()
 def welcome_tool(name: str) -> str:
     """
     Respond with welcome message
@@ -44,47 +61,106 @@ def get_current_time():
     return now.strftime("%Y-%m-%d %H:%M:%S")
 
 
-@mcp.tool()
+@tool()
 def chesscom_profile(username: str) -> dict:
     """
     Retrieve the public profile information for a chess.com user.
     """
+    track_user(username)
     return chesscom_get_profile(username)
 
-@mcp.tool()
-def chesscom_latest_games(username: str, n: int = 10) -> dict:
+@tool()
+def chesscom_latest_games(username: str, n: int = 10, include_pgn: bool = False,
+                          max_chars: int = DEFAULT_MAX_CHARS) -> dict:
     """
-    Retrieve the latest games played by a chess.com user.
+    Retrieve the latest games played by a chess.com user, newest first.
+    Args:
+        username: chess.com username
+        n: number of games
+        include_pgn: include the full PGN of each game (large)
+        max_chars: size budget for the result; games beyond it are counted in "omitted"
     """
-    return chesscom_get_latest_games(username, n)
+    track_user(username)
+    games = chesscom_get_latest_games(username, n)["games"]
+    return fit_to_budget([compact_chesscom_game(g, include_pgn) for g in games], max_chars, key="games")
 
-@mcp.tool()
+@tool()
 def chesscom_download_pgn(username: str, game_url: str) -> str:
     """
     Download the PGN for a given chess.com game.
     """
+    track_user(username)
     return chesscom_download_pgn(username, game_url)
 
-@mcp.tool()
-def chesscom_analytics_games(username: str, max_months: int = 3) -> list:
+@tool()
+def chesscom_analytics_games(username: str, max_months: int = 3, summary: bool = False,
+                             fields: str | None = None, max_chars: int = DEFAULT_MAX_CHARS) -> dict:
     """
-    Get recent games for a user as a list of dicts (DataFrame records).
+    Get recent games for a user, newest first.
+    Args:
+        username: chess.com username
+        max_months: number of monthly archives to include
+        summary: return pre-aggregated counts (the user's wins/losses/draws, time classes, openings) instead of games
+        fields: comma-separated fields per game, default date,white,black,result,opening,num_moves,time_class,url;
+            add "moves" for the moves as a space-separated UCI string
+        max_chars: size budget for the result; games beyond it are counted in "omitted"
     """
-    df = get_user_games_df(username, max_months=max_months)
-    return df.to_dict(orient="records")
-
-@mcp.tool()
+    track_user(username)
+    selected = pgnanalytics.parse_fields(fields)
+    df = pgnanalytics.get_cached_user_games_df(username, max_months=max_months)
+    records = df.to_dict(orient="records")
+    if summary:
+        return summarize_game_records(records, username)
+    return fit_to_budget([compact_game_record(r, selected) for r in records], max_chars, key="games")
+
+@tool()
 def chesscom_analytics_stats(username: str, max_months: int = 3) -> dict:
     """
     Get summary stats for a user.
     """
-    df = get_user_games_df(username, max_months=max_months)
-    return summarize_user_stats(df, username)
+    track_user(username)
+    return pgnanalytics.get_cached_user_stats(username, max_months=max_months)
+
+@tool()
+def chesscom_analytics_stats_batch(usernames: list[str], max_months: int = 3) -> dict:
+    """
+    Get summary stats for several users at once (e.g. a club or team), fetched concurrently.
+    Returns {"stats": {username: stats}, "errors": {username: message}}.
+    """
+    if len(usernames) > Settings.CHESSBUDDY_BATCH_MAX_USERS:
+        raise ValueError(f"At most {Settings.CHESSBUDDY_BATCH_MAX_USERS} usernames per call")
+    for username in usernames:
+        track_user(username)
+    return pgnanalytics.get_batch_user_stats(usernames, max_months=max_months)
+
+@tool()
+def chesscom_move_stats(username: str, moves: str = "", max_months: int = 3,
+                        color: str | None = None, top: int = 10) -> dict:
+    """
+    How a user scores after a sequence of opening moves, and what they play next.
+    moves is SAN or UCI, e.g. "1.e4 c5 2.Nf3" (empty for the starting position);
+    color is "white" or "black" to restrict to games with that colour.
+    """
+    track_user(username)
+    return pgnanalytics.get_user_move_stats(username, moves, max_months=max_months, color=color, top=top)
 
 
 mcp_native = mcp
 
+
+@lru_cache(maxsize=1)
+def get_sse_app():
+    """
+    Configure logfire, then build and instrument the SSE app; done once, on first call,
+    so importing this module stays cheap.
+    """
+    init_logfire("mcp_server_chessbuddy")
+    app = mcp.sse_app()
+    logfire.instrument_starlette(app)
+    return app
+
 def main():
+    init_logfire("mcp_server_chessbuddy")
     mcp.run(transport="sse")
 
 # Entry point to run the server
@@ -1,6 +1,7 @@
+import codecs
 import os
 from enum import Enum
-from typing import Type
+from typing import Iterator, List, Type
 
 import modal
 from dotenv.main import DotEnv, find_dotenv
@@ -125,6 +126,11 @@ def get_image_with_source_and_uv_install():
     return get_image_with_uv_install().add_local_python_source(*LOCAL_PYTHON_SOURCES, copy=True)
 
 
+def get_memory_snapshot_enabled():
+    """Whether Modal server classes start from a memory snapshot taken after warm-up."""
+    return os.getenv("CHESSBUDDY_MEMORY_SNAPSHOT", "true").lower() not in ("0", "false", "no")
+
+
 def get_workspaces_name():
     return "workspaces"
 
@@ -133,8 +139,51 @@ def get_workspaces_volume():
     return modal.Volume.from_name(get_workspaces_name(), create_if_missing=True)
 
 
-def read_file_from_modal(volume: modal.Volume, path: str):
-    data = b""
-    for chunk in volume.read_file(path):
-        data += chunk
-    return data.decode("utf-8")
+def get_workspaces_mount():
+    return "/workspaces"
+
+
+def get_shared_cache_env():
+    """Environment that points the shared cache tier at the mounted workspaces volume."""
+    return {
+        "CHESSBUDDY_SHARED_CACHE": "modal",
+        "CHESSBUDDY_SHARED_CACHE_DIR": f"{get_workspaces_mount()}/chessbuddy-cache",
+    }
+
+
+def iter_file_chunks_from_modal(volume: modal.Volume, path: str) -> Iterator[bytes]:
+    """Yield a volume file's raw bytes chunk by chunk, without holding the whole file."""
+    yield from volume.read_file(path)
+
+
+def iter_file_lines_from_modal(volume: modal.Volume, path: str, encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Yield a volume file's decoded lines, newline included, like iterating an open text file.
+    Multi-byte characters and lines split across chunks are reassembled.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending: List[str] = []
+    for chunk in iter_file_chunks_from_modal(volume, path):
+        text = decoder.decode(chunk)
+        start = 0
+        while (end := text.find("\n", start)) >= 0:
+            pending.append(text[start:end + 1])
+            yield "".join(pending)
+            pending = []
+            start = end + 1
+        if start < len(text):
+            pending.append(text[start:])
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        pending.append(tail)
+    if pending:
+        yield "".join(pending)
+
+
+def read_bytes_from_modal(volume: modal.Volume, path: str) -> bytes:
+    """Read a whole volume file, joining its chunks once."""
+    return b"".join(iter_file_chunks_from_modal(volume, path))
+
+
+def read_file_from_modal(volume: modal.Volume, path: str, encoding: str = "utf-8") -> str:
+    return read_bytes_from_modal(volume, path).decode(encoding)
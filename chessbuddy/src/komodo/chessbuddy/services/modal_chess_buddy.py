@@ -1,41 +1,99 @@
 import modal
 
-from .config import get_relevant_modal_config, get_image_with_uv_install
+from .config import (
+    get_image_with_uv_install,
+    get_memory_snapshot_enabled,
+    get_relevant_modal_config,
+    get_shared_cache_env,
+    get_workspaces_mount,
+    get_workspaces_volume,
+)
 
 config = get_relevant_modal_config()
-image = get_image_with_uv_install()
+# Heavy imports and warm-up run once in @modal.enter(snap=True); scaled-out containers
+# restore that memory instead of repeating them.
+memory_snapshot = get_memory_snapshot_enabled()
+# Every replica reads and writes the same cache tier on the workspaces volume. The snapshot
+# flag is passed through so containers re-importing this module see the deployed value.
+image = get_image_with_uv_install().env({
+    **get_shared_cache_env(),
+    "CHESSBUDDY_MEMORY_SNAPSHOT": str(memory_snapshot).lower(),
+})
+volumes = {get_workspaces_mount(): get_workspaces_volume()}
 app = modal.App(name="ChessBuddy", image=image)
 
 
+def _load_mcp_app():
+    from komodo.chessbuddy.servers.mcp_server import get_sse_app
+    return get_sse_app()
+
+
+def _load_fastapi_app():
+    from komodo.chessbuddy.servers.fastapi_server import chess_buddy_app
+    return chess_buddy_app
+
+
 @app.cls(
     image=image,
     secrets=[config.dotenv_secret()],
+    volumes=volumes,
     min_containers=1,
     max_containers=3,
     memory=512,
     scaledown_window=300,
-    enable_memory_snapshot=False,
+    enable_memory_snapshot=memory_snapshot,
 )
 @modal.concurrent(max_inputs=100)
 class McpServer:
+    @modal.enter(snap=True)
+    def load(self):
+        from komodo.chessbuddy.services.startup import load_server
+        self.asgi, self.startup_timings = load_server(_load_mcp_app)
+
+    @modal.enter(snap=False)
+    def report(self):
+        from komodo.chessbuddy.services.startup import report_startup
+        report_startup("McpServer", self.startup_timings, memory_snapshot)
+
+    @modal.exit()
+    def shutdown(self):
+        # Commit shared cache writes still waiting for the batched volume commit.
+        from komodo.chessbuddy.lib.sharedcache import flush_shared_cache
+        flush_shared_cache()
+
     @modal.asgi_app()
     def app(self):
-        from komodo.chessbuddy.servers.mcp_server import mcp_native
-        return mcp_native.sse_app()
+        return self.asgi
 
 
 @app.cls(
     image=image,
     secrets=[config.dotenv_secret()],
+    volumes=volumes,
     min_containers=1,
     max_containers=3,
     memory=512,
     scaledown_window=300,
-    enable_memory_snapshot=False,
+    enable_memory_snapshot=memory_snapshot,
 )
 @modal.concurrent(max_inputs=100)
 class FastApiServer:
+    @modal.enter(snap=True)
+    def load(self):
+        from komodo.chessbuddy.services.startup import load_server
+        self.asgi, self.startup_timings = load_server(_load_fastapi_app)
+
+    @modal.enter(snap=False)
+    def report(self):
+        from komodo.chessbuddy.services.startup import report_startup
+        report_startup("FastApiServer", self.startup_timings, memory_snapshot)
+
+    @modal.exit()
+    def shutdown(self):
+        # Commit shared cache writes still waiting for the batched volume commit.
+        from komodo.chessbuddy.lib.sharedcache import flush_shared_cache
+        flush_shared_cache()
+
     @modal.asgi_app()
     def app(self):
-        from komodo.chessbuddy.servers.fastapi_server import chess_buddy_app
-        return chess_buddy_app
+        return self.asgi
@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+
+from komodo.chessbuddy.lib.archivecache import ArchiveCache, split_archive_url
+
+NOW = datetime(2025, 6, 15, tzinfo=timezone.utc).timestamp()
+ARCHIVES = [
+    "https://api.chess.com/pub/player/someone/games/2025/05",
+    "https://api.chess.com/pub/player/someone/games/2025/06",
+]
+
+
+class FakeChessCom:
+    def __init__(self):
+        self.archive_calls = 0
+        self.month_calls = []
+
+    def fetch_archive_urls(self, username):
+        self.archive_calls += 1
+        return ARCHIVES
+
+    def fetch_month(self, username, year, month):
+        self.month_calls.append((year, month))
+        return [{"url": f"https://www.chess.com/game/live/{year}{month}", "end_time": 1}]
+
+
+def make_cache(fake, clock):
+    return ArchiveCache(fake.fetch_archive_urls, fake.fetch_month, ttl_seconds=60, clock=clock)
+
+
+def test_archive_urls_are_cached_until_ttl():
+    fake, now = FakeChessCom(), [NOW]
+    cache = make_cache(fake, lambda: now[0])
+    assert cache.get_archive_urls("Someone") == ARCHIVES
+    assert cache.get_archive_urls("someone") == ARCHIVES
+    assert fake.archive_calls == 1
+    now[0] += 61
+    cache.get_archive_urls("someone")
+    assert fake.archive_calls == 2
+
+
+def test_closed_months_never_expire_but_current_month_does():
+    fake, now = FakeChessCom(), [NOW]
+    cache = make_cache(fake, lambda: now[0])
+    cache.get_month_games("someone", "2025", "05")
+    cache.get_month_games("someone", "2025", "6")
+    now[0] += 3600
+    cache.get_month_games("someone", "2025", "05")
+    cache.get_month_games("someone", "2025", "06")
+    assert fake.month_calls == [("2025", "05"), ("2025", "06"), ("2025", "06")]
+
+
+def test_refresh_and_invalidate_refetch():
+    fake = FakeChessCom()
+    cache = make_cache(fake, lambda: NOW)
+    cache.get_month_games("someone", "2025", "05")
+    cache.get_month_games("someone", "2025", "05", refresh=True)
+    cache.invalidate("SOMEONE")
+    cache.get_month_games("someone", "2025", "05")
+    assert len(fake.month_calls) == 3
+
+
+def test_months_are_evicted_lru():
+    fake = FakeChessCom()
+    cache = ArchiveCache(fake.fetch_archive_urls, fake.fetch_month, max_months=1, clock=lambda: NOW)
+    cache.get_month_games("someone", "2025", "04")
+    cache.get_month_games("someone", "2025", "05")
+    cache.get_month_games("someone", "2025", "04")
+    assert fake.month_calls == [("2025", "04"), ("2025", "05"), ("2025", "04")]
+
+
+def test_split_archive_url():
+    assert split_archive_url(ARCHIVES[0] + "/") == ("2025", "05")
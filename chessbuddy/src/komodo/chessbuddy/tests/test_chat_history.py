@@ -0,0 +1,51 @@
+from komodo.chessbuddy.scripts.chat_history import ChatHistory, compact_reference, estimate_tokens
+
+
+def test_short_history_is_rendered_verbatim():
+    history = ChatHistory()
+    history.add("user", "stats for hikaru")
+    history.add("assistant", "### Summary stats\n| Wins | 6 |")
+    history.add("user", "and magnus?")
+    assert history.build_prompt() == (
+        "User: stats for hikaru\nBot: ### Summary stats\n| Wins | 6 |\nUser: and magnus?\nBot:"
+    )
+
+
+def test_is_first_turn():
+    history = ChatHistory()
+    history.add("user", "stats for hikaru")
+    assert history.is_first_turn()
+    history.add("assistant", "6 wins")
+    history.add("user", "and his openings?")
+    assert not history.is_first_turn()
+
+
+def test_old_answers_become_compact_references():
+    assert compact_reference({"role": "assistant", "content": "### Summary stats\n" + "x" * 500}) == (
+        "- Bot answered: Summary stats [518 chars, not repeated]"
+    )
+    history = ChatHistory(max_entry_chars=10)
+    history.add("assistant", "a" * 50)
+    history.add("user", "next")
+    assert "Bot: aaaaaaaaaa [... 40 more chars, not repeated]" in history.build_prompt()
+
+
+def test_prompt_stays_within_budget_over_long_sessions():
+    history = ChatHistory(max_tokens=300, summary_max_chars=400)
+    sizes = []
+    for turn in range(200):
+        history.add("user", f"question {turn} about hikaru")
+        prompt = history.build_prompt()
+        sizes.append(estimate_tokens(prompt))
+        assert prompt.endswith(f"User: question {turn} about hikaru\nBot:")
+        history.add("assistant", f"### Answer {turn}\n" + "| row | value |\n" * 30)
+    assert max(sizes) <= 300
+    assert "Summary of earlier conversation:" in prompt
+    assert history.dropped_turns > 0
+    assert len(history.entries) < 10
+
+
+def test_current_question_is_kept_even_if_over_budget():
+    history = ChatHistory(max_tokens=5)
+    history.add("user", "q" * 100)
+    assert history.build_prompt() == "User: " + "q" * 100 + "\nBot:"
@@ -1,9 +1,18 @@
 import pytest
 
-from komodo.chessbuddy.lib.chesscom import get_profile, get_latest_games, download_pgn
+from komodo.chessbuddy.lib import chesscom
+from komodo.chessbuddy.lib.chesscom import get_profile, get_latest_games, download_pgn, page_games
 
 USERNAME = "ryanoberoi"
 
+# Offline archive fixture for page_games: 2025/04 .. 2025/06, three games each.
+FAKE_ARCHIVES = [f"https://api.chess.com/pub/player/someone/games/2025/{m:02d}" for m in (4, 5, 6)]
+MONTH_STARTS = {"04": 1743465600, "05": 1746057600, "06": 1748736000}
+FAKE_MONTHS = {
+    month: [{"end_time": start + i * 86400, "time_class": "blitz" if i % 2 else "rapid"} for i in range(3)]
+    for month, start in MONTH_STARTS.items()
+}
+
 def test_get_profile():
     profile = get_profile(USERNAME)
     assert isinstance(profile, dict)
@@ -40,3 +49,67 @@ def test_download_pgn():
     assert "[Event" in pgn
     assert "[Site" in pgn
     assert USERNAME.lower() in pgn.lower()
+
+
+@pytest.fixture
+def fake_archive_cache(monkeypatch):
+    requested = []
+
+    def get_month_games(username, year, month):
+        requested.append(month)
+        return FAKE_MONTHS[month]
+
+    monkeypatch.setattr(chesscom.archive_cache, "get_archive_urls", lambda username: FAKE_ARCHIVES)
+    monkeypatch.setattr(chesscom.archive_cache, "get_month_games", get_month_games)
+    return requested
+
+
+def end_times(page):
+    return [g["end_time"] for g in page["games"]]
+
+
+def test_page_games_walks_backward_with_before_cursor(fake_archive_cache):
+    first = page_games("someone", limit=2)
+    assert end_times(first) == [MONTH_STARTS["06"] + 2 * 86400, MONTH_STARTS["06"] + 86400]
+    assert first["has_more"]
+    assert fake_archive_cache == ["06"]
+
+    second = page_games("someone", limit=2, before=first["cursors"]["before"])
+    assert end_times(second) == [MONTH_STARTS["06"], MONTH_STARTS["05"] + 2 * 86400]
+
+
+def test_page_games_after_cursor_returns_next_newer_games(fake_archive_cache):
+    page = page_games("someone", limit=2, after=MONTH_STARTS["04"] + 2 * 86400)
+    assert end_times(page) == [MONTH_STARTS["05"] + 86400, MONTH_STARTS["05"]]
+    assert page["has_more"]
+    assert "04" in fake_archive_cache and "06" not in fake_archive_cache
+
+
+def test_page_games_filters_time_class_and_skips_months(fake_archive_cache):
+    page = page_games("someone", limit=10, before=MONTH_STARTS["05"], time_class="blitz")
+    assert end_times(page) == [MONTH_STARTS["04"] + 86400]
+    assert not page["has_more"]
+    assert fake_archive_cache == ["05", "04"]
+
+
+def test_page_games_does_not_skip_games_sharing_an_end_time(monkeypatch):
+    games = [{"end_time": 1748736000 + (i // 3), "url": f"https://www.chess.com/game/live/{100 + i}"}
+             for i in range(7)]
+    monkeypatch.setattr(chesscom.archive_cache, "get_archive_urls", lambda username: FAKE_ARCHIVES[-1:])
+    monkeypatch.setattr(chesscom.archive_cache, "get_month_games", lambda username, year, month: games)
+    seen, cursor = [], None
+    while True:
+        page = page_games("someone", limit=2, before=cursor)
+        seen += [g["url"] for g in page["games"]]
+        if not page["has_more"]:
+            break
+        cursor = page["cursors"]["before"]
+    assert seen == [g["url"] for g in reversed(games)]
+
+    newer = page_games("someone", limit=2, after=page["cursors"]["after"])
+    assert [g["url"] for g in newer["games"]] == [games[2]["url"], games[1]["url"]]
+
+
+def test_page_games_rejects_malformed_cursor(fake_archive_cache):
+    with pytest.raises(ValueError):
+        page_games("someone", before="yesterday")
@@ -0,0 +1,58 @@
+from komodo.chessbuddy.lib.compact import (
+    compact_chesscom_game,
+    compact_game_record,
+    fit_to_budget,
+    json_size,
+    summarize_game_records,
+)
+
+RECORD = {
+    "white": "someone", "black": "rival", "result": "1-0", "eco": "C44", "opening": "King's Pawn",
+    "date": "2025.06.03", "num_moves": 4, "moves": ["e2e4", "e7e5", "g1f3", "b8c6"],
+    "end_time": 1748900000, "time_class": "blitz", "url": "https://www.chess.com/game/live/1",
+}
+
+
+def test_compact_game_record_drops_moves_by_default():
+    compact = compact_game_record(RECORD)
+    assert "moves" not in compact
+    assert compact["num_moves"] == 4
+    assert compact_game_record(RECORD, ["moves"]) == {"moves": "e2e4 e7e5 g1f3 b8c6"}
+
+
+def test_compact_chesscom_game_omits_pgn_unless_asked():
+    game = {"url": "u", "pgn": "[Event ...]", "white": {"username": "a", "rating": 1500, "result": "win",
+                                                    "@id": "https://api.chess.com/pub/player/a"}}
+    assert "pgn" not in compact_chesscom_game(game)
+    assert compact_chesscom_game(game)["white"] == {"username": "a", "rating": 1500, "result": "win"}
+    assert compact_chesscom_game(game, include_pgn=True)["pgn"] == "[Event ...]"
+
+
+def test_fit_to_budget_reports_omitted_items():
+    items = [compact_game_record(RECORD)] * 10
+    result = fit_to_budget(items, max_chars=3 * json_size(items[0]) + 10, key="games")
+    assert result["returned"] == 3
+    assert result["omitted"] == 7
+    assert "7 of 10 games omitted" in result["note"]
+    assert "note" not in fit_to_budget(items, max_chars=100000)
+
+
+def test_summarize_game_records():
+    summary = summarize_game_records([RECORD, dict(RECORD, date="2025.05.01", result="0-1")], "someone")
+    assert summary["total_games"] == 2
+    assert (summary["first_date"], summary["last_date"]) == ("2025.05.01", "2025.06.03")
+    assert (summary["wins"], summary["losses"], summary["draws"]) == (1, 1, 0)
+    assert summary["time_classes"] == {"blitz": 2}
+
+
+def test_summarize_game_records_counts_results_from_the_users_side():
+    records = [
+        dict(RECORD, white="Someone", black="rival", result="1-0"),   # win as white
+        dict(RECORD, white="rival", black="someone", result="0-1"),   # win as black
+        dict(RECORD, white="rival", black="someone", result="1-0"),   # loss as black
+        dict(RECORD, white="someone", black="rival", result="1/2-1/2"),
+        dict(RECORD, white="other", black="rival", result="1-0"),     # not the user's game
+    ]
+    summary = summarize_game_records(records, "someone")
+    assert (summary["wins"], summary["losses"], summary["draws"]) == (2, 1, 1)
+    assert summary["win_rate"] == 2 / 5
@@ -0,0 +1,55 @@
+import pandas as pd
+
+from komodo.chessbuddy.lib.dataframecache import DataFrameCache, frame_size_bytes
+
+
+def frame(rows):
+    return pd.DataFrame({"white": ["someone"] * rows, "num_moves": range(rows)})
+
+
+def test_get_or_compute_computes_once():
+    cache = DataFrameCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return frame(3)
+
+    first = cache.get_or_compute(("someone", 3, "v1"), compute)
+    second = cache.get_or_compute(("someone", 3, "v1"), compute)
+    assert first is second
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_new_version_replaces_old_one():
+    cache = DataFrameCache()
+    cache.put(("someone", 3, "v1"), frame(3))
+    cache.put(("someone", 1, "v1"), frame(1))
+    cache.put(("someone", 3, "v2"), frame(4))
+    assert cache.get(("someone", 3, "v1")) is None
+    assert cache.get(("someone", 1, "v1")) is not None
+    assert len(cache) == 2
+
+
+def test_evicts_least_recently_used_when_over_budget():
+    size = frame_size_bytes(frame(100))
+    cache = DataFrameCache(max_bytes=2 * size)
+    cache.put(("a", 3, "v"), frame(100))
+    cache.put(("b", 3, "v"), frame(100))
+    cache.get(("a", 3, "v"))
+    cache.put(("c", 3, "v"), frame(100))
+    assert cache.get(("b", 3, "v")) is None
+    assert cache.get(("a", 3, "v")) is not None
+    assert cache.size_bytes <= cache.max_bytes
+
+
+def test_frame_size_counts_list_contents():
+    moves = [[f"e2e{i % 8 + 1}" for i in range(80)] for _ in range(200)]
+    df = pd.DataFrame({"white": ["someone"] * 200, "moves": moves})
+    pointer_only = int(df.memory_usage(deep=True).sum())
+    contents = sum(sum(len(m.encode()) for m in game) for game in moves)
+    assert frame_size_bytes(df) > pointer_only + contents
+    cache = DataFrameCache()
+    cache.put(("someone", 3, "v"), df)
+    assert cache.size_bytes == frame_size_bytes(df)
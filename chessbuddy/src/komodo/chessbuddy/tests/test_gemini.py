@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+import pytest
+
+from komodo.chessbuddy.lib.gemini import (
+    GeminiAdviceError,
+    GeminiModelRegistry,
+    generate_content,
+    is_model_not_found,
+    is_quota_error,
+)
+
+
+class FakeGenerativeModel:
+    def __init__(self, genai, name):
+        self.genai = genai
+        self.name = name
+
+    def generate_content(self, prompt):
+        self.genai.calls.append(self.name)
+        errors = self.genai.errors.get(self.name, [])
+        if errors:
+            raise Exception(errors.pop(0))
+        return SimpleNamespace(text=f"{self.name}: {prompt}")
+
+
+class FakeGenai:
+    def __init__(self, names, errors=None):
+        self.names = names
+        self.errors = errors or {}
+        self.calls = []
+        self.listed = 0
+
+    def list_models(self):
+        self.listed += 1
+        return [SimpleNamespace(name=f"models/{name}", supported_generation_methods=["generateContent"])
+                for name in self.names]
+
+    def GenerativeModel(self, name):
+        return FakeGenerativeModel(self, name)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_error_classification():
+    not_supported = "404 models/gemini-pro is not found for API version v1beta, or is not supported for generateContent"
+    assert is_model_not_found(not_supported)
+    assert not is_quota_error(not_supported)
+    assert is_quota_error("429 Resource has been exhausted (e.g. check quota).")
+    assert is_quota_error("RESOURCE_EXHAUSTED")
+    assert is_quota_error("Rate limit exceeded")
+    assert not is_quota_error("500 Internal error generating content")
+
+
+def test_registry_lists_models_once_per_ttl():
+    genai, clock = FakeGenai(["gemini-a", "gemini-b"]), FakeClock()
+    registry = GeminiModelRegistry(genai, ttl_seconds=60, clock=clock)
+    assert registry.get_model()[0] == "gemini-a"
+    registry.mark_not_found("gemini-a")
+    clock.now = 30
+    assert registry.get_model()[0] == "gemini-b"
+    assert genai.listed == 1
+
+    clock.now = 61
+    assert registry.get_model()[0] == "gemini-a"  # exclusions are forgotten with the list
+    assert genai.listed == 2
+
+
+def test_not_found_falls_back_to_next_model():
+    genai = FakeGenai(["gemini-a", "gemini-b"], errors={
+        "gemini-a": ["404 models/gemini-a is not supported for generateContent"],
+    })
+    registry = GeminiModelRegistry(genai, clock=FakeClock())
+    sleeps = []
+    assert generate_content(registry, "advice?", sleep=sleeps.append) == "gemini-b: advice?"
+    assert genai.calls == ["gemini-a", "gemini-b"]
+    assert sleeps == []
+    assert registry.get_model()[0] == "gemini-b"
+
+
+def test_quota_error_retries_same_model_after_delay():
+    genai = FakeGenai(["gemini-a", "gemini-b"], errors={
+        "gemini-a": ["429 quota exceeded, retry in 7 seconds"],
+    })
+    registry = GeminiModelRegistry(genai, clock=FakeClock())
+    sleeps = []
+    assert generate_content(registry, "advice?", sleep=sleeps.append) == "gemini-a: advice?"
+    assert genai.calls == ["gemini-a", "gemini-a"]
+    assert sleeps == [7]
+
+
+def test_persistent_quota_error_raises():
+    genai = FakeGenai(["gemini-a"], errors={"gemini-a": ["429 quota exceeded"] * 3})
+    registry = GeminiModelRegistry(genai, clock=FakeClock())
+    with pytest.raises(GeminiAdviceError, match="QUOTA"):
+        generate_content(registry, "advice?", max_retries=3, sleep=lambda seconds: None)
+    assert genai.calls == ["gemini-a"] * 3
@@ -0,0 +1,79 @@
+from contextlib import contextmanager
+
+import pandas as pd
+import pytest
+
+from komodo.chessbuddy.config import instrumentation
+from komodo.chessbuddy.config.instrumentation import instrument, summarize_value
+
+
+class FakeSpan:
+    def __init__(self):
+        self.attributes = {}
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+
+class FakeLogfire:
+    def __init__(self):
+        self.spans = []
+
+    @contextmanager
+    def span(self, msg_template, _span_name=None, **attributes):
+        span = FakeSpan()
+        span.attributes.update(attributes)
+        self.spans.append((_span_name, span))
+        yield span
+
+
+@pytest.fixture
+def fake_logfire(monkeypatch):
+    fake = FakeLogfire()
+    monkeypatch.setattr(instrumentation, "logfire", fake)
+    return fake
+
+
+def test_summaries_keep_small_values_and_shrink_large_ones():
+    df = pd.DataFrame({"white": ["a", "b"], "result": ["1-0", "0-1"]})
+    assert summarize_value(df) == {"type": "DataFrame", "rows": 2, "columns": ["white", "result"]}
+    assert summarize_value({"wins": 1}) == {"wins": 1}
+    assert summarize_value(list(range(100))) == {"type": "list", "len": 100}
+    assert summarize_value("x" * 30, max_chars=10) == "xxxxxxxxxx... (+20 chars)"
+    assert summarize_value({"pgn": "x" * 30}, max_chars=10) == {"type": "dict", "len": 1, "keys": ["pgn"]}
+
+
+def test_spans_record_summarized_arguments_and_return(fake_logfire):
+    @instrument(record_return=True)
+    def games(df, username):
+        return df
+
+    df = pd.DataFrame({"white": ["a"]})
+    assert games(df, "someone") is df
+    name, span = fake_logfire.spans[0]
+    assert name.endswith("games")
+    assert span.attributes == {"df": {"type": "DataFrame", "rows": 1, "columns": ["white"]},
+                               "username": "someone",
+                               "return": {"type": "DataFrame", "rows": 1, "columns": ["white"]}}
+
+
+def test_zero_rate_is_a_no_op_and_overrides_apply(monkeypatch):
+    def helper():
+        return 1
+
+    assert instrument(sample_rate=0)(helper) is helper
+    monkeypatch.setitem(instrumentation.Settings.CHESSBUDDY_TRACE_SAMPLE_RATES, "helper", 0.0)
+    assert instrument(helper) is helper
+
+
+def test_calls_are_sampled(monkeypatch, fake_logfire):
+    draws = iter([0.05, 0.5, 0.09])
+    monkeypatch.setattr(instrumentation.random, "random", lambda: next(draws))
+
+    @instrument(sample_rate=0.1)
+    def fetch(username):
+        return username
+
+    assert [fetch("a"), fetch("b"), fetch("c")] == ["a", "b", "c"]
+    assert [span.attributes for _, span in fake_logfire.spans] == [
+        {"username": "a", "sample_rate": 0.1}, {"username": "c", "sample_rate": 0.1}]
@@ -0,0 +1,25 @@
+import pytest
+
+from komodo.chessbuddy.lib.lazy import lazy_module
+from komodo.chessbuddy.scripts.import_time import ENTRY_POINTS, measure_import
+
+
+def test_module_is_imported_on_first_attribute_access():
+    module = lazy_module("komodo.chessbuddy.lib.compact")
+    assert "not loaded" in repr(module)
+    assert module.json_size([1]) == 3
+    assert module.loaded
+
+
+def test_attributes_follow_monkeypatching(monkeypatch):
+    from komodo.chessbuddy.lib import compact
+
+    module = lazy_module("komodo.chessbuddy.lib.compact")
+    monkeypatch.setattr(compact, "json_size", lambda value: -1)
+    assert module.json_size([1]) == -1
+
+
+@pytest.mark.parametrize("entry_point", ["routes", "mcp", "mcp_client_single"])
+def test_entry_points_do_not_import_analytics_or_agent_dependencies(entry_point):
+    result = measure_import(ENTRY_POINTS[entry_point], repeat=1)
+    assert result["heavy_modules"] == []
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from komodo.chessbuddy.scripts import format_with_openai
+from komodo.chessbuddy.scripts.format_with_openai import format_result, local_answer
+from komodo.chessbuddy.scripts.local_format import format_locally
+
+PROFILE = {"username": "hikaru", "player_id": 15448422, "joined": 1389043258, "status": "premium",
+           "streaming_platforms": [{"type": "twitch"}]}
+STATS = {"total_games": 10, "wins": 6, "losses": 3, "draws": 1, "win_rate": 0.6,
+         "most_common_openings": {"Sicilian Defense": 4, "French Defense": 2}}
+
+
+def test_profile_renders_scalar_fields_as_table():
+    text = format_locally(PROFILE)
+    assert text.startswith("### Profile: hikaru")
+    assert "| Player id | 15448422 |" in text
+    assert "2014-01-06" in text
+    assert "streaming" not in text.lower()
+
+
+def test_stats_render_counts_and_nested_tables():
+    text = format_locally(json.dumps(STATS))
+    assert "| Win rate | 60.00% |" in text
+    assert "| Sicilian Defense | 4 |" in text
+
+
+def test_batch_stats_and_games_with_note():
+    batch = format_locally({"stats": {"a": STATS}, "errors": {"b": "not found"}})
+    assert "Summary stats: a" in batch and "**b:** not found" in batch
+    games = format_locally({"games": [{"white": "a", "black": "b|c"}], "total": 3, "note": "2 of 3 games omitted"})
+    assert "| a | b\\|c |" in games and "_2 of 3 games omitted_" in games
+
+
+def test_unstructured_results_are_left_to_the_llm():
+    assert format_locally("Hikaru won the game.") is None
+    assert format_locally({"a": {"b": 1}}) is None
+    assert format_locally([]) is None
+
+
+def test_local_answer_modes():
+    assert local_answer(STATS, mode="llm") is None
+    assert local_answer(STATS, mode="auto").startswith("### Summary stats")
+    assert local_answer("**done**", mode="auto") is None
+    assert local_answer("**done**", mode="fused") == "**done**"
+    with pytest.raises(ValueError):
+        local_answer(STATS, mode="bogus")
+
+
+def test_format_result_falls_back_to_llm(monkeypatch):
+    calls = []
+    monkeypatch.setattr(format_with_openai, "format_with_openai",
+                        lambda question, result, max_result_chars: calls.append(result) or "llm")
+    assert format_result("q", STATS, mode="auto").startswith("### Summary stats")
+    assert format_result("q", "free text", mode="auto") == "llm"
+    assert calls == ["free text"]
@@ -0,0 +1,16 @@
+from komodo.chessbuddy.scripts.mcp_chat_utils import describe_step
+
+
+class ActionStep:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+def test_describe_step_names_the_tools_in_the_code():
+    step = ActionStep(step_number=1, code_action='chesscom_profile("hikaru")', tool_calls=[], error=None)
+    assert describe_step(step) == "Step 1: chesscom_profile"
+
+
+def test_describe_step_tolerates_missing_step_fields():
+    # Older smolagents ActionSteps have no code_action.
+    assert describe_step(ActionStep(step_number=2)) == "Step 2"
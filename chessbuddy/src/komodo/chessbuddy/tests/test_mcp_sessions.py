@@ -0,0 +1,120 @@
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from komodo.chessbuddy.scripts import mcp_sessions
+from komodo.chessbuddy.scripts.mcp_sessions import ChatSession, McpSessionManager
+
+
+class FakeAgent:
+    def __init__(self, tools, failures):
+        self.tools = {tool.name: tool for tool in tools}
+        self.memory = SimpleNamespace(steps=[])
+        self.failures = failures
+
+    def run(self, prompt, reset=False):
+        error = self.failures.pop(0) if self.failures else None
+        self.memory.steps.append(SimpleNamespace(error=error))
+        return f"answer from {self.tools['tool'].connection}"
+
+
+@pytest.fixture
+def fake_mcp(monkeypatch):
+    state = {"connections": 0, "closed": 0, "failures": []}
+
+    @contextmanager
+    def tool_collection_context():
+        state["connections"] += 1
+        try:
+            yield SimpleNamespace(tools=[SimpleNamespace(name="tool", connection=state["connections"])])
+        finally:
+            state["closed"] += 1
+
+    monkeypatch.setattr(mcp_sessions, "tool_collection_context", tool_collection_context)
+    monkeypatch.setattr(mcp_sessions, "get_agent_model", lambda model_id: object())
+    monkeypatch.setattr(mcp_sessions, "build_agent",
+                        lambda tools, model, additional_authorized_imports: FakeAgent(tools, state["failures"]))
+    return state
+
+
+def test_session_reuses_connection_across_turns(fake_mcp):
+    session = ChatSession()
+    assert session.run("hi") == "answer from 1"
+    assert session.run("again") == "answer from 1"
+    assert fake_mcp["connections"] == 1
+
+
+def test_session_reconnects_on_transport_error_and_keeps_agent(fake_mcp):
+    session = ChatSession()
+    session.run("hi")
+    agent = session.agent
+    fake_mcp["failures"].append(RuntimeError("anyio.ClosedResourceError"))
+    assert session.run("again") == "answer from 2"
+    assert session.agent is agent
+    assert fake_mcp["closed"] == 1
+
+
+def test_manager_shares_sessions_by_id(fake_mcp):
+    manager = McpSessionManager()
+    assert manager.get("a") is manager.get("a")
+    manager.get("a").run("hi")
+    manager.close_all()
+    assert fake_mcp["closed"] == 1
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_manager_closes_idle_sessions(fake_mcp):
+    clock = Clock()
+    manager = McpSessionManager(idle_seconds=60, clock=clock)
+    manager.get("a").run("hi")
+    clock.now = 30
+    manager.get("b").run("hi")
+    clock.now = 70
+    assert manager.close_idle() == 1
+    assert len(manager) == 1
+    assert fake_mcp["closed"] == 1
+
+
+def test_sweeper_closes_idle_sessions_without_further_gets(fake_mcp):
+    clock = Clock()
+    manager = McpSessionManager(idle_seconds=60, sweep_interval_seconds=0.01, clock=clock)
+    manager.get("a").run("hi")
+    clock.now = 70
+    deadline = time.monotonic() + 2
+    while not fake_mcp["closed"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(manager) == 0
+    assert fake_mcp["closed"] == 1
+    manager.close_all()
+
+
+def test_manager_evicts_least_recently_used_over_cap(fake_mcp):
+    clock = Clock()
+    manager = McpSessionManager(max_sessions=2, clock=clock)
+    a = manager.get("a")
+    a.run("hi")
+    manager.get("b")
+    manager.get("a")
+    manager.get("c")
+    assert len(manager) == 2
+    assert manager.get("a") is a
+    assert fake_mcp["closed"] == 0
+    manager.get("d")
+    assert manager.get("a") is a
+    assert len(manager) == 2
+
+
+def test_streaming_turn_connects_lazily(fake_mcp, monkeypatch):
+    monkeypatch.setattr(mcp_sessions, "iter_agent_steps", lambda agent, prompt, reset: iter(["step", "final"]))
+    session = ChatSession()
+    assert list(session.iter_steps("hi")) == ["step", "final"]
+    assert fake_mcp["connections"] == 1
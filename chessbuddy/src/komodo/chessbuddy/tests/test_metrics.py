@@ -0,0 +1,51 @@
+import pytest
+
+from komodo.chessbuddy.config.metrics import MetricsRegistry
+
+
+def test_counters_and_histograms_keep_per_label_totals():
+    registry = MetricsRegistry()
+    parsed = registry.counter("pgn.games_parsed", "games")
+    parsed.add(3, source="games")
+    parsed.add(2, source="games")
+    latency = registry.histogram("chesscom.fetch.duration", "latency", buckets=(0.1, 1.0))
+    latency.record(0.05, endpoint="month")
+    latency.record(0.1, endpoint="month")
+    latency.record(5, endpoint="month")
+    assert registry.counter("pgn.games_parsed") is parsed
+
+    snapshot = registry.snapshot()
+    assert snapshot["counters"]["pgn.games_parsed"] == [{"labels": {"source": "games"}, "value": 5}]
+    [series] = snapshot["histograms"]["chesscom.fetch.duration"]
+    assert series["count"] == 3
+    assert series["buckets"] == {"0.1": 2, "1.0": 0, "+Inf": 1}
+
+
+def test_timed_labels_outcome():
+    registry = MetricsRegistry()
+    duration = registry.histogram("mcp.tool.duration")
+
+    @duration.timed(tool="broken")
+    def broken():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        broken()
+    with duration.time(tool="ok"):
+        pass
+    labels = [s["labels"] for s in registry.snapshot()["histograms"]["mcp.tool.duration"]]
+    assert labels == [{"status": "error", "tool": "broken"}, {"status": "ok", "tool": "ok"}]
+
+
+def test_prometheus_text_has_cumulative_buckets_and_gauges():
+    registry = MetricsRegistry()
+    latency = registry.histogram("engine.ply.duration", "per ply", buckets=(0.01, 0.1))
+    latency.record(0.005)
+    latency.record(0.05)
+    registry.add_collector(lambda: {"archive_cache.hits": 7})
+    registry.add_collector(lambda: 1 / 0)
+    text = registry.render_prometheus()
+    assert 'engine_ply_duration_seconds_bucket{le="0.01"} 1' in text
+    assert 'engine_ply_duration_seconds_bucket{le="+Inf"} 2' in text
+    assert "engine_ply_duration_seconds_count 2" in text
+    assert "archive_cache_hits 7" in text
@@ -0,0 +1,85 @@
+import pytest
+
+from komodo.chessbuddy.lib.movetree import MoveTree, MoveTreeIndex, outcome_from_result, parse_moves
+
+SICILIAN = ["e2e4", "c7c5", "g1f3", "d7d6"]
+FRENCH = ["e2e4", "e7e6", "d2d4", "d7d5"]
+
+
+def record(white, black, result, moves, url):
+    return {"white": white, "black": black, "result": result, "moves": moves, "url": url}
+
+
+@pytest.fixture
+def tree():
+    tree = MoveTree()
+    tree.add_game(SICILIAN, "win", "white", "g1")
+    tree.add_game(SICILIAN[:3], "loss", "white", "g2")
+    tree.add_game(FRENCH, "draw", "white", "g3")
+    tree.add_game(SICILIAN, "win", "black", "g4")
+    return tree
+
+
+def test_parse_moves_accepts_san_uci_and_move_numbers():
+    assert parse_moves("1.e4 c5 2.Nf3") == SICILIAN[:3]
+    assert parse_moves("e2e4 c7c5") == SICILIAN[:2]
+    assert parse_moves(["e4", "e6"]) == FRENCH[:2]
+    with pytest.raises(ValueError):
+        parse_moves("1.e4 e4")
+
+
+def test_outcome_from_result():
+    assert outcome_from_result("1-0", "white") == "win"
+    assert outcome_from_result("1-0", "black") == "loss"
+    assert outcome_from_result("1/2-1/2", "black") == "draw"
+    assert outcome_from_result("*", "white") is None
+
+
+def test_prefix_query_counts_and_continuations(tree):
+    stats = tree.query("1.e4 c5 2.Nf3", color="white")
+    assert (stats["games"], stats["wins"], stats["losses"], stats["score"]) == (2, 1, 1, 0.5)
+    assert stats["moves"] == ["e4", "c5", "Nf3"]
+    assert stats["next_moves"] == [{"move": "d6", "uci": "d7d6", "games": 1, "wins": 1, "draws": 0,
+                                    "losses": 0, "score": 1.0}]
+
+
+def test_query_merges_colours_and_handles_unplayed_lines(tree):
+    root = tree.query()
+    assert root["games"] == 4
+    assert root["next_moves"][0]["move"] == "e4"
+    assert [m["move"] for m in tree.query("e4", color="white")["next_moves"]] == ["c5", "e6"]
+    assert tree.query("1.d4")["games"] == 0
+    with pytest.raises(ValueError):
+        tree.query(color="red")
+
+
+def test_games_are_deduplicated_and_depth_limited():
+    tree = MoveTree(max_depth=2)
+    assert tree.add_record(record("Me", "x", "1-0", SICILIAN, "g1"), "me")
+    assert not tree.add_record(record("Me", "x", "1-0", SICILIAN, "g1"), "me")
+    assert not tree.add_record(record("a", "b", "1-0", SICILIAN, "g2"), "me")
+    assert tree.query("e4 c5")["games"] == 1
+    assert tree.query("e4 c5")["next_moves"] == []
+
+
+def test_index_adds_new_games_incrementally_and_rebuilds_when_window_moves():
+    state = {"version": "v1", "records": [record("me", "x", "1-0", SICILIAN, "g1")], "loads": 0}
+
+    def load_games(username, max_months):
+        state["loads"] += 1
+        return list(state["records"])
+
+    index = MoveTreeIndex(window_version=lambda u, m: state["version"], load_games=load_games)
+    tree = index.get("Me")
+    assert index.get("me") is tree and state["loads"] == 1
+
+    state["version"] = "v2"
+    state["records"].append(record("x", "me", "1-0", FRENCH, "g2"))
+    assert index.get("me") is tree
+    assert tree.query()["games"] == 2
+
+    state["version"] = "v3"
+    state["records"] = state["records"][1:]
+    rebuilt = index.get("me")
+    assert rebuilt is not tree
+    assert rebuilt.query()["games"] == 1
@@ -0,0 +1,61 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from komodo.chessbuddy.scripts.parallel_tools import ParallelToolCalls
+from komodo.chessbuddy.scripts.response_cache import usernames_in_steps
+
+
+def slow_tool(delay, barrier=None):
+    def call(username):
+        if barrier is not None:
+            barrier.wait(timeout=5)
+        time.sleep(delay)
+        return {"username": username}
+    return call
+
+
+def test_calls_run_concurrently_and_keep_order():
+    barrier = threading.Barrier(3)
+    tools = {"chesscom_profile": slow_tool(0.05, barrier), "chesscom_analytics_stats": slow_tool(0.05, barrier)}
+    parallel = ParallelToolCalls(tools)
+    started = time.perf_counter()
+    result = parallel.forward([
+        {"tool": "chesscom_profile", "arguments": {"username": "a"}},
+        {"tool": "chesscom_analytics_stats", "arguments": {"username": "b"}},
+        {"tool": "chesscom_profile", "arguments": {"username": "c"}},
+    ])
+    assert time.perf_counter() - started < 0.15
+    assert result == [{"username": "a"}, {"username": "b"}, {"username": "c"}]
+
+
+def test_failures_are_returned_in_place():
+    def broken(username):
+        raise RuntimeError("boom")
+
+    parallel = ParallelToolCalls({"ok": slow_tool(0), "broken": broken, "final_answer": slow_tool(0)})
+    assert parallel.forward([
+        {"tool": "ok", "arguments": {"username": "a"}},
+        {"tool": "broken", "arguments": {"username": "a"}},
+        {"tool": "final_answer", "arguments": {"username": "a"}},
+        {"tool": "missing"},
+    ]) == [
+        {"username": "a"},
+        {"error": "RuntimeError: boom"},
+        {"error": "ValueError: Unknown tool 'final_answer'"},
+        {"error": "ValueError: Unknown tool 'missing'"},
+    ]
+    assert parallel.forward([]) == []
+
+
+def test_tool_dict_is_read_live():
+    tools = {}
+    parallel = ParallelToolCalls(tools)
+    tools["ok"] = slow_tool(0)
+    assert parallel.forward([{"tool": "ok", "arguments": {"username": "a"}}]) == [{"username": "a"}]
+
+
+def test_response_cache_sees_usernames_in_parallel_calls():
+    code = ("r = parallel_tool_calls(calls=[{'tool': 'chesscom_profile', 'arguments': {'username': 'Hikaru'}}, "
+            "{\"tool\": \"chesscom_analytics_stats\", \"arguments\": {\"username\": \"magnus\"}}])")
+    assert usernames_in_steps([SimpleNamespace(code_action=code)]) == ["hikaru", "magnus"]
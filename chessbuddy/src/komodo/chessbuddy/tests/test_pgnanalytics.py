@@ -0,0 +1,103 @@
+import pytest
+
+from komodo.chessbuddy.lib import pgnanalytics
+from komodo.chessbuddy.lib.pgnanalytics import iter_user_games, parse_fields, select_fields
+
+USERNAME = "someone"
+ARCHIVES = [
+    "https://api.chess.com/pub/player/someone/games/2025/04",
+    "https://api.chess.com/pub/player/someone/games/2025/05",
+    "https://api.chess.com/pub/player/someone/games/2025/06",
+]
+
+
+def make_pgn(date, white=USERNAME, black="rival", result="1-0", moves="1. e4 e5 2. Nf3 Nc6"):
+    return (
+        f'[Event "Live Chess"]\n[Date "{date}"]\n[White "{white}"]\n[Black "{black}"]\n'
+        f'[Result "{result}"]\n[ECO "C44"]\n[Opening "King\'s Pawn Opening"]\n\n{moves} {result}\n'
+    )
+
+
+def make_game(date, end_time, **kwargs):
+    return {"pgn": make_pgn(date, **kwargs), "end_time": end_time, "time_class": "blitz",
+            "url": f"https://www.chess.com/game/live/{end_time}"}
+
+
+MONTHS = {
+    ("2025", "04"): [make_game("2025.04.02", 1743600000)],
+    ("2025", "05"): [make_game("2025.05.01", 1746100000), make_game("2025.05.20", 1747700000, result="0-1")],
+    ("2025", "06"): [make_game("2025.06.03", 1748900000, result="1/2-1/2")],
+}
+
+
+@pytest.fixture
+def fake_archives(monkeypatch):
+    fetched = []
+
+    def fetch_month_games(username, year, month):
+        key = (str(year), str(month).zfill(2))
+        fetched.append(key)
+        return MONTHS[key]
+
+    monkeypatch.setattr(pgnanalytics, "fetch_archives", lambda username: ARCHIVES)
+    monkeypatch.setattr(pgnanalytics, "fetch_month_games", fetch_month_games)
+    return fetched
+
+
+def test_iter_user_games_yields_newest_first(fake_archives):
+    games = list(iter_user_games(USERNAME, max_months=2))
+    assert [g["date"] for g in games] == ["2025.06.03", "2025.05.20", "2025.05.01"]
+    assert games[0]["moves"] == ["e2e4", "e7e5", "g1f3", "b8c6"]
+    assert games[0]["end_time"] == 1748900000
+    assert games[0]["time_class"] == "blitz"
+
+
+def test_iter_user_games_is_lazy(fake_archives):
+    games = iter_user_games(USERNAME, max_months=3)
+    assert fake_archives == []
+    assert next(games)["date"] == "2025.06.03"
+    assert fake_archives == [("2025", "06")]
+
+
+def test_parse_games_skips_games_without_pgn():
+    records = pgnanalytics.parse_games([{"end_time": 1}, make_game("2025.06.03", 2)])
+    assert len(records) == 1
+    assert records[0]["url"] == "https://www.chess.com/game/live/2"
+
+
+def test_parse_and_select_fields():
+    assert parse_fields(None) is None
+    assert parse_fields("white, result") == ["white", "result"]
+    with pytest.raises(ValueError):
+        parse_fields("white,elo")
+    records = [{"white": "a", "black": "b", "result": "1-0"}]
+    assert list(select_fields(records, ["white", "result"])) == [{"white": "a", "result": "1-0"}]
+    assert list(select_fields(records, None)) == records
+
+
+def test_batch_user_stats_collects_results_and_errors(monkeypatch):
+    def fake_stats(username, max_months):
+        if username == "missing":
+            raise ValueError("user not found")
+        return {"total_games": len(username)}
+
+    monkeypatch.setattr(pgnanalytics, "_user_stats", fake_stats)
+    result = pgnanalytics.get_batch_user_stats(["alice", "bob", "alice", " ", "missing"])
+    assert result == {"stats": {"alice": {"total_games": 5}, "bob": {"total_games": 3}},
+                      "errors": {"missing": "user not found"}}
+
+
+def test_stats_are_reused_from_the_shared_cache_per_window_version(monkeypatch, tmp_path):
+    from komodo.chessbuddy.lib.sharedcache import DirectoryCache
+
+    version = ["v1"]
+    computed = []
+    monkeypatch.setattr(pgnanalytics, "shared_cache", DirectoryCache(str(tmp_path)))
+    monkeypatch.setattr(pgnanalytics.archive_cache, "window_version", lambda username, max_months: (version[0], None))
+    monkeypatch.setattr(pgnanalytics, "get_cached_user_games_df", lambda username, max_months: computed.append(1))
+    monkeypatch.setattr(pgnanalytics, "summarize_user_stats", lambda df, username: {"total_games": len(computed)})
+
+    assert pgnanalytics.get_cached_user_stats("Someone") == {"total_games": 1}
+    assert pgnanalytics.get_cached_user_stats("someone") == {"total_games": 1}
+    version[0] = "v2"
+    assert pgnanalytics.get_cached_user_stats("someone") == {"total_games": 2}
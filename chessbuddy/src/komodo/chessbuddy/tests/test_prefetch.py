@@ -0,0 +1,36 @@
+from komodo.chessbuddy.lib.prefetch import ActiveUserTracker, Prefetcher
+
+
+def test_tracker_orders_by_recency_and_expires():
+    now = [1000.0]
+    tracker = ActiveUserTracker(max_users=2, ttl_seconds=100, clock=lambda: now[0])
+    tracker.touch("Alice")
+    now[0] += 10
+    tracker.touch("bob")
+    now[0] += 10
+    tracker.touch("alice")
+    assert tracker.recent() == ["alice", "bob"]
+    tracker.touch("carol")
+    assert tracker.recent() == ["carol", "alice"]
+    now[0] += 101
+    assert tracker.recent() == []
+    assert tracker.idle_for() == 101
+
+
+def test_refresh_once_runs_warmers_and_survives_failures():
+    tracker = ActiveUserTracker()
+    tracker.touch("alice")
+    tracker.touch("bob")
+    seen = []
+
+    def failing(username):
+        raise RuntimeError("chess.com is down")
+
+    prefetcher = Prefetcher(tracker, warmers=[failing, seen.append])
+    assert prefetcher.refresh_once() == 2
+    assert seen == ["bob", "alice"]
+
+
+def test_ensure_started_outside_event_loop_is_noop():
+    prefetcher = Prefetcher(ActiveUserTracker())
+    assert prefetcher.ensure_started() is None
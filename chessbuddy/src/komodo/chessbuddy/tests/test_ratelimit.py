@@ -0,0 +1,60 @@
+import threading
+
+from komodo.chessbuddy.lib.ratelimit import RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_burst_then_throttled_to_rate():
+    clock = FakeClock()
+    limiter = RateLimiter(max_concurrent=10, rate_per_second=2, burst=2, clock=clock, sleep=clock.sleep)
+    for _ in range(4):
+        with limiter:
+            pass
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_concurrency_is_bounded():
+    limiter = RateLimiter(max_concurrent=2, rate_per_second=0)
+    in_flight, peak, lock = [0], [0], threading.Lock()
+    release = threading.Event()
+
+    def call():
+        with limiter:
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            release.wait(0.05)
+            with lock:
+                in_flight[0] -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] == 2
+
+
+def test_waiting_and_in_flight_are_counted():
+    limiter = RateLimiter(max_concurrent=1, rate_per_second=0)
+    limiter.acquire()
+    waiter = threading.Thread(target=lambda: (limiter.acquire(), limiter.release()))
+    waiter.start()
+    while limiter.waiting == 0:
+        threading.Event().wait(0.001)
+    assert (limiter.waiting, limiter.in_flight) == (1, 1)
+    limiter.release()
+    waiter.join()
+    assert (limiter.waiting, limiter.in_flight) == (0, 0)
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+from komodo.chessbuddy.scripts.response_cache import (
+    ResponseCache,
+    normalize_question,
+    usernames_in_steps,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(versions, **kwargs):
+    calls = []
+
+    def version_of(username):
+        calls.append(username)
+        return versions[username]
+
+    return ResponseCache(version_of=version_of, **kwargs), calls
+
+
+def test_normalize_question_ignores_case_punctuation_and_filler():
+    assert normalize_question("Please summarize Hikaru's last month!") == normalize_question(
+        "summarize  hikaru s last month")
+    assert normalize_question("Can you show me games of magnus-c?") == "games of magnus-c"
+
+
+def test_usernames_in_steps_reads_tool_calls_from_code():
+    steps = [
+        SimpleNamespace(code_action='r = chesscom_analytics_stats(username="Hikaru", max_months=1)'),
+        SimpleNamespace(code_action="chesscom_analytics_stats_batch(usernames=['a', 'b'])\nfinal_answer(r)"),
+        SimpleNamespace(),
+    ]
+    assert usernames_in_steps(steps) == ["hikaru", "a", "b"]
+
+
+def test_repeat_question_hits_until_new_games_arrive():
+    versions = {"hikaru": "202501.10.100"}
+    cache, _ = make_cache(versions)
+    assert cache.get("summarize hikaru last month") is None
+    assert cache.put("Summarize Hikaru last month", ["Hikaru"], "answer")
+    assert cache.get("summarize hikaru last month?") == "answer"
+    versions["hikaru"] = "202501.11.200"
+    assert cache.get("summarize hikaru last month") is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_only_questions_naming_their_users_are_cached():
+    cache, _ = make_cache({"hikaru": "v"})
+    assert not cache.put("summarize my last month", ["hikaru"], "answer")
+    assert not cache.put("summarize the weather", [], "answer")
+    assert len(cache) == 0
+
+
+def test_ttl_and_lru_bound():
+    clock = Clock()
+    cache, _ = make_cache({"a": "v", "b": "v", "c": "v"}, max_entries=2, ttl_seconds=10, clock=clock)
+    for name in "abc":
+        cache.put(f"stats for {name}", [name], name)
+    assert cache.get("stats for a") is None
+    assert cache.get("stats for c") == "c"
+    clock.now = 11
+    assert cache.get("stats for c") is None
+
+
+def test_version_errors_are_misses():
+    def version_of(username):
+        raise RuntimeError("chess.com down")
+
+    cache = ResponseCache(version_of=version_of)
+    assert not cache.put("stats for a", ["a"], "answer")
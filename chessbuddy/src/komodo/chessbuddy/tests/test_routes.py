@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from komodo.chessbuddy.router import routes
+
+
+@pytest.fixture
+def client(monkeypatch):
+    state = {"version": "202506.3.1749000000", "calls": []}
+    fake_cache = SimpleNamespace(
+        ttl_seconds=300,
+        window_version=lambda username, max_months: (state["version"], 1749000000),
+    )
+    monkeypatch.setattr(routes, "archive_cache", fake_cache)
+    monkeypatch.setattr(routes, "track_user", lambda username: None)
+
+    def get_latest_games(username, n):
+        state["calls"].append(("latest", n))
+        return {"games": [{"url": "u1"}]}
+
+    def page_games(username, limit, before, after, time_class):
+        state["calls"].append(("page", limit, before))
+        return {"games": [], "has_more": False, "cursors": {}}
+
+    monkeypatch.setattr(routes, "get_latest_games", get_latest_games)
+    monkeypatch.setattr(routes, "page_games", page_games)
+    app = FastAPI()
+    app.include_router(routes.router)
+    return TestClient(app), state
+
+
+@pytest.mark.parametrize("path", ["/chessbuddy/chesscom/latest-games/someone?n=5",
+                                  "/chessbuddy/chesscom/games/someone?limit=5&before=1749000000"])
+def test_listing_revalidates_without_fetching(client, path):
+    http, state = client
+    first = http.get(path)
+    assert first.status_code == 200
+    assert len(state["calls"]) == 1
+
+    again = http.get(path, headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert len(state["calls"]) == 1  # answered from the validator alone
+
+    state["version"] = "202506.4.1749100000"
+    assert http.get(path, headers={"If-None-Match": first.headers["etag"]}).status_code == 200
+    assert len(state["calls"]) == 2
+
+
+def test_etag_depends_on_query(client):
+    http, _ = client
+    five = http.get("/chessbuddy/chesscom/latest-games/someone?n=5").headers["etag"]
+    ten = http.get("/chessbuddy/chesscom/latest-games/someone?n=10").headers["etag"]
+    assert five != ten
+
+
+def test_paged_analytics_rejects_stream_and_bad_cursors(client):
+    http, state = client
+    assert http.get("/chessbuddy/chesscom/analytics/games/someone?limit=5&stream=true").status_code == 400
+    assert http.get("/chessbuddy/chesscom/games/someone?before=yesterday").status_code == 400
+    assert state["calls"] == []
@@ -0,0 +1,33 @@
+from komodo.chessbuddy.services.config import (
+    iter_file_chunks_from_modal,
+    iter_file_lines_from_modal,
+    read_bytes_from_modal,
+    read_file_from_modal,
+)
+
+
+class FakeVolume:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def read_file(self, path):
+        yield from self.chunks
+
+
+def test_bulk_readers_join_chunks():
+    volume = FakeVolume([b"[Event ", b"\"Live\"]\n", b"1. e4 *\n"])
+    assert read_bytes_from_modal(volume, "games.pgn") == b"[Event \"Live\"]\n1. e4 *\n"
+    assert read_file_from_modal(volume, "games.pgn") == "[Event \"Live\"]\n1. e4 *\n"
+    assert list(iter_file_chunks_from_modal(volume, "games.pgn")) == volume.chunks
+
+
+def test_lines_are_reassembled_across_chunks_and_multibyte_characters():
+    text = "Grünfeld\nline two\n\nno newline"
+    data = text.encode("utf-8")
+    volume = FakeVolume([data[i:i + 3] for i in range(0, len(data), 3)])
+    assert list(iter_file_lines_from_modal(volume, "f")) == ["Grünfeld\n", "line two\n", "\n", "no newline"]
+
+
+def test_empty_file_has_no_lines():
+    assert list(iter_file_lines_from_modal(FakeVolume([]), "f")) == []
+    assert read_file_from_modal(FakeVolume([]), "f") == ""
@@ -0,0 +1,136 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from komodo.chessbuddy.lib.archivecache import ArchiveCache
+from komodo.chessbuddy.lib.sharedcache import DirectoryCache, ModalVolumeCache, build_shared_cache
+
+NOW = datetime(2025, 6, 15, tzinfo=timezone.utc).timestamp()
+
+
+class FakeChessCom:
+    def __init__(self):
+        self.month_calls = []
+
+    def fetch_archive_urls(self, username):
+        return []
+
+    def fetch_month(self, username, year, month):
+        self.month_calls.append((year, month))
+        return [{"url": f"https://www.chess.com/game/live/{year}{month}", "end_time": 1}]
+
+
+def object_files(root):
+    return [name for _, _, files in os.walk(os.path.join(root, "objects")) for name in files]
+
+
+def test_values_round_trip_and_identical_values_share_one_object(tmp_path):
+    cache = DirectoryCache(str(tmp_path))
+    assert cache.get_json("stats", "alice/3/v1") is None
+    cache.put_json("stats", "alice/3/v1", {"total_games": 2})
+    cache.put_json("stats", "alice/3/v2", {"total_games": 2})
+    assert DirectoryCache(str(tmp_path)).get_json("stats", "alice/3/v2") == {"total_games": 2}
+    assert len(object_files(tmp_path)) == 1
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_corrupt_objects_are_misses(tmp_path):
+    cache = DirectoryCache(str(tmp_path))
+    digest = cache.put_bytes("archives", "k", b"value")
+    with open(cache._object_path(digest), "wb") as f:
+        f.write(b"torn")
+    assert cache.get_bytes("archives", "k") is None
+    assert cache.get_or_compute_json("archives", "k", lambda: [1]) == [1]
+    assert cache.get_json("archives", "k") == [1]
+
+
+def ref_files(root):
+    return [name for _, _, files in os.walk(os.path.join(root, "refs")) for name in files]
+
+
+def test_slot_keeps_only_the_newest_version(tmp_path):
+    cache = DirectoryCache(str(tmp_path))
+    cache.put_json("parsed-games", "alice/202506/3.100", [1, 2, 3], slot="alice/202506")
+    cache.put_json("parsed-games", "alice/202506/4.200", [1, 2, 3, 4], slot="alice/202506")
+    cache.put_json("parsed-games", "alice/202505/9.50", [9], slot="alice/202505")
+    assert cache.get_json("parsed-games", "alice/202506/3.100") is None
+    assert cache.get_json("parsed-games", "alice/202506/4.200") == [1, 2, 3, 4]
+    assert len(ref_files(tmp_path)) == 2
+
+
+def test_sweep_removes_old_refs_and_unreferenced_objects(tmp_path):
+    cache = DirectoryCache(str(tmp_path), max_age_seconds=86400)
+    cache.maybe_sweep(background=False)  # so no background sweep races the explicit one
+    cache.put_json("stats", "old", {"v": 1})
+    cache.put_json("stats", "new", {"v": 2})
+    cache.put_json("archives", "overwritten", [1])
+    cache.put_json("archives", "overwritten", [2])
+    old_ref = cache._ref_path("stats", "old")
+    day_ago = os.path.getmtime(old_ref) - 2 * 86400
+    os.utime(old_ref, (day_ago, day_ago))
+    for name in object_files(tmp_path):
+        path = cache._object_path(name)
+        os.utime(path, (day_ago, day_ago))
+
+    removed = cache.sweep()
+    assert (removed["refs"], removed["objects"]) == (1, 2)
+    assert cache.get_json("stats", "old") is None
+    assert cache.get_json("stats", "new") == {"v": 2}
+    assert cache.get_json("archives", "overwritten") == [2]
+    assert len(object_files(tmp_path)) == 2
+
+
+def test_sweeps_are_throttled_across_processes(tmp_path):
+    first, second = DirectoryCache(str(tmp_path)), DirectoryCache(str(tmp_path))
+    assert first.maybe_sweep(background=False)
+    assert not first.maybe_sweep(background=False)
+    assert not second.maybe_sweep(background=False)
+
+
+class FakeVolume:
+    def __init__(self):
+        self.commits = 0
+        self.reloads = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def reload(self):
+        self.reloads += 1
+
+
+def test_volume_commits_are_batched_and_misses_reload_at_most_once_per_interval(tmp_path):
+    volume, now = FakeVolume(), [0.0]
+    cache = ModalVolumeCache(volume, str(tmp_path), commit_interval_seconds=5, reload_interval_seconds=30,
+                             clock=lambda: now[0])
+    cache.put_json("stats", "a", 1)
+    cache.put_json("stats", "b", 2)
+    assert volume.commits == 1
+    cache.flush()
+    assert volume.commits == 2
+
+    now[0] = 31
+    assert cache.get_json("stats", "missing") is None
+    assert cache.get_json("stats", "missing") is None
+    assert volume.reloads == 1
+
+
+def test_closed_months_are_shared_between_archive_caches(tmp_path):
+    first, second = FakeChessCom(), FakeChessCom()
+    shared = DirectoryCache(str(tmp_path))
+    for fake in (first, second):
+        cache = ArchiveCache(fake.fetch_archive_urls, fake.fetch_month, clock=lambda: NOW, shared=shared)
+        assert cache.get_month_games("Someone", "2025", "05") == [
+            {"url": "https://www.chess.com/game/live/202505", "end_time": 1}]
+        cache.get_month_games("someone", "2025", "06")
+    assert first.month_calls == [("2025", "05"), ("2025", "06")]
+    # The closed month came from the shared tier; the running month is always fetched.
+    assert second.month_calls == [("2025", "06")]
+
+
+def test_unknown_backend_is_rejected(tmp_path):
+    assert build_shared_cache("", str(tmp_path)) is None
+    assert isinstance(build_shared_cache("disk", str(tmp_path)), DirectoryCache)
+    with pytest.raises(ValueError):
+        build_shared_cache("redis", str(tmp_path))
@@ -0,0 +1,26 @@
+import sys
+
+import pytest
+
+from komodo.chessbuddy.services.startup import HEAVY_MODULES, import_timed, load_server, process_uptime
+
+
+def test_import_timed_reports_each_module():
+    timings = import_timed(["json", "komodo.chessbuddy.lib.compact"])
+    assert list(timings) == ["json", "komodo.chessbuddy.lib.compact"]
+    assert all(seconds >= 0 for seconds in timings.values())
+
+
+def test_load_server_preimports_warms_up_and_builds_the_app():
+    app, timings = load_server(lambda: "asgi-app")
+    assert app == "asgi-app"
+    assert all(name in sys.modules for name in HEAVY_MODULES)
+    assert set(HEAVY_MODULES) | {"warm_up", "server", "total"} == set(timings)
+    assert timings["total"] >= timings["warm_up"]
+
+
+def test_process_uptime_is_measured_from_process_start():
+    uptime = process_uptime()
+    if uptime is None:
+        pytest.skip("/proc is not available")
+    assert 0 < uptime < 24 * 3600
@@ -1,3 +1,5 @@
+import uuid
+
 import logfire
 import streamlit as st
 
@@ -14,32 +16,25 @@ if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
 
 from komodo.chessbuddy.scripts.mcp_chat_utils import (
-    tool_collection_context,
-    build_agent,
-    get_agent_model,
     build_prompt,
-    format_with_openai,
+    final_answer_of,
+    describe_step,
+    stream_format_result,
+    response_cache,
+    remember_answer,
 )
+from komodo.chessbuddy.scripts.mcp_sessions import session_manager
 
-class ToolAgentSession:
-    def __init__(self):
-        self.ctx = tool_collection_context()
-        self.tool_collection = self.ctx.__enter__()
-        self.model = get_agent_model()
-        self.agent = build_agent(
-            tools=[*self.tool_collection.tools],
-            model=self.model,
-            additional_authorized_imports=["*"],
-        )
-
-    def close(self):
-        if self.ctx:
-            self.ctx.__exit__(None, None, None)
-            self.ctx = None
+# Each browser session gets an id; its MCP connection and agent live in the process-wide
+# session manager, which closes idle sessions and caps how many are open at once.
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
-# Initialize ToolAgentSession if not already in session state
-if "tool_agent_session" not in st.session_state:
-    st.session_state.tool_agent_session = ToolAgentSession()
+with st.sidebar:
+    if st.button("End conversation"):
+        session_manager.close(st.session_state.session_id)
+        st.session_state.session_id = uuid.uuid4().hex
+        st.session_state.chat_history = []
 
 # Display chat history
 for entry in st.session_state.chat_history:
@@ -54,17 +49,32 @@ if user_input:
     with st.chat_message("user"):
         st.markdown(user_input)
 
-    # Get bot response
+    # Get bot response, streaming agent steps and then the formatted answer as they arrive
     with logfire.span("Thinking..."):
-        with st.spinner("Thinking..."):
-            prompt = build_prompt(user_input)
-            agent = st.session_state.tool_agent_session.agent
-            result = agent.run(prompt, reset=False)
-            bot_response = format_with_openai(user_input, result)
-
-        st.session_state.chat_history.append({"role": "assistant", "content": bot_response})
         with st.chat_message("assistant"):
-            st.markdown(bot_response)
+            # The session agent remembers earlier turns, so only an opening question is cacheable
+            cacheable = len(st.session_state.chat_history) == 1
+            bot_response = response_cache.get(user_input) if cacheable else None
+            if bot_response is not None:
+                st.markdown(bot_response)
+            else:
+                prompt = build_prompt(user_input)
+                session = session_manager.get(st.session_state.session_id, additional_authorized_imports=["*"])
+                result = None
+                events = []
+                with st.status("Thinking...", expanded=False) as status:
+                    for event in session.iter_steps(prompt, reset=False):
+                        events.append(event)
+                        description = describe_step(event)
+                        if description:
+                            status.update(label=description)
+                            status.write(description)
+                        answer = final_answer_of(event)
+                        if answer is not None:
+                            result = answer
+                    status.update(label="Done", state="complete")
+                bot_response = st.write_stream(stream_format_result(user_input, result))
+                if cacheable:
+                    remember_answer(user_input, events, bot_response)
 
-# Optionally, add a cleanup callback to close the context when the Streamlit session ends
-# (Streamlit does not provide a direct session end hook, but you could add a button to manually close)
+        st.session_state.chat_history.append({"role": "assistant", "content": bot_response})